@@ -0,0 +1,45 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""bench_config.py - Loading and saving the config file"""
+
+import pytest
+
+# Profiles and layouts in the config under test, as a heavy user has
+PROFILES = 20
+LAYOUTS = 20
+
+
+@pytest.fixture
+def config():
+    pytest.importorskip('gi')
+    from terminatorlib.config import Config
+    config = Config()
+    for n in range(PROFILES):
+        config.add_profile('profile%d' % n, None)
+        config.base.profiles['profile%d' % n]['font'] = 'Monospace %d' % (9 + n % 6)
+    for n in range(LAYOUTS):
+        layout = {'window0': {'type': 'Window', 'parent': ''}}
+        for t in range(16):
+            layout['terminal%d' % t] = {'type': 'Terminal', 'parent': 'window0',
+                                        'profile': 'profile%d' % (t % PROFILES)}
+        config.add_layout('layout%d' % n, layout)
+    config.save()
+    yield config
+    for n in range(PROFILES):
+        config.del_profile('profile%d' % n)
+    for n in range(LAYOUTS):
+        config.del_layout('layout%d' % n)
+
+
+def test_config_save(bench, config):
+    bench(config.save, rounds=20)
+
+
+def test_config_load(bench, config):
+    def load():
+        config.base.loaded = False
+        config.base.load()
+
+    bench(load, rounds=20)
+    bench.extra['profiles'] = len(config.list_profiles())
+    bench.extra['layouts'] = len(config.list_layouts())
@@ -0,0 +1,116 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""bench_output.py - Output throughput with and without plugins"""
+
+import pytest
+
+# Plugins that follow the output of the terminals they watch
+WATCHERS = ('ActivityWatch', 'InactivityWatch')
+
+
+@pytest.fixture
+def plugins(gtk):
+    """Load every available plugin, and disable them all again after"""
+    from terminatorlib.plugin import PluginRegistry
+    registry = PluginRegistry()
+    registry.load_plugins()
+    loaded = []
+    for name in registry.get_available_plugins():
+        if registry.is_enabled(name):
+            continue
+        try:
+            registry.enable(name)
+        except Exception:
+            continue
+        loaded.append(name)
+    yield registry
+    for name in loaded:
+        registry.disable(name)
+
+
+def flood(loop, lines, plugins=None):
+    """Print lines numbers in a terminal, returning the seconds taken until
+    the child exited and its output was processed"""
+    import time
+    from gi.repository import Gtk
+    from terminatorlib.gtk4terminal import Gtk4Terminal
+    window = Gtk.Window()
+    term = Gtk4Terminal()
+    window.set_child(term)
+    window.present()
+    loop()
+    if plugins is not None:
+        for name in WATCHERS:
+            if name in plugins.instances:
+                plugins.instances[name].watch(None, term)
+    done = []
+    term.connect('child-exited', lambda *args: done.append(True))
+    start = time.perf_counter()
+    term.spawn_command(['seq', str(lines)])
+    loop(lambda: done, timeout=3600)
+    loop()
+    elapsed = time.perf_counter() - start
+    if plugins is not None:
+        for name in WATCHERS:
+            if name in plugins.instances:
+                plugins.instances[name].unwatch(None, term)
+    window.destroy()
+    return elapsed
+
+
+def test_output_flood(bench, request, loop):
+    lines = request.config.getoption('bench_flood_lines')
+    elapsed = bench(flood, loop, lines, rounds=1)
+    bench.extra['lines'] = lines
+    bench.extra['lines_per_sec'] = lines / elapsed
+
+
+def test_output_flood_plugins(bench, request, loop, plugins):
+    lines = request.config.getoption('bench_flood_lines')
+    elapsed = bench(flood, loop, lines, plugins, rounds=1)
+    bench.extra['lines'] = lines
+    bench.extra['lines_per_sec'] = lines / elapsed
+    bench.extra['plugins'] = sorted(plugins.instances)
+
+
+@pytest.fixture
+def cast(tmp_path):
+    """A recording of 100000 lines of colourful output"""
+    from terminatorlib import asciicast
+    path = str(tmp_path / 'flood.cast')
+    clock = iter(range(1000000))
+    writer = asciicast.CastWriter(path, asciicast.header(80, 24),
+                                  clock=lambda: next(clock) / 1000.0)
+    writer.start()
+    for n in range(1000):
+        writer.write('o', ''.join(['\x1b[3%dmline %d\x1b[0m\r\n' % (l % 8, l)
+                                   for l in range(n * 100, n * 100 + 100)]))
+    writer.close()
+    return path
+
+
+@pytest.mark.parametrize('count', [1, 8])
+def test_replay_flood(bench, loop, cast, count):
+    """Replay a recording into count terminals at maximum speed"""
+    from gi.repository import Gtk
+    from terminatorlib import asciicast
+    from terminatorlib.gtk4terminal import Gtk4Terminal
+    window = Gtk.Window()
+    box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+    window.set_child(box)
+    terms = []
+    for _n in range(count):
+        terms.append(Gtk4Terminal())
+        box.append(terms[-1])
+    window.present()
+    loop()
+
+    def play():
+        player = asciicast.replay(cast, terms, speed=None)
+        loop(lambda: player.done, timeout=600)
+        loop()
+        return player
+
+    player = bench(play, rounds=3)
+    window.destroy()
+    bench.extra['bytes'] = player.bytes * count
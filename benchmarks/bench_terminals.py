@@ -0,0 +1,119 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""bench_terminals.py - Creating, splitting and updating many terminals"""
+
+
+def terminals_of(window):
+    from terminatorlib.terminator import Terminator
+    return [t for t in Terminator().terminals if t.get_root() is window]
+
+
+def paned_layout(depth, order=0):
+    """A layout node of 2 ** depth terminals in nested panes"""
+    if depth == 0:
+        return {'type': 'Terminal', 'order': order}
+    return {'type': 'hpaned' if depth % 2 else 'vpaned', 'order': order,
+            'ratio': 0.5,
+            'children': {'child0': paned_layout(depth - 1, 0),
+                         'child1': paned_layout(depth - 1, 1)}}
+
+
+def test_spawn_100_terminals(bench, window, loop):
+    """Open 100 tabs and wait until every shell is running"""
+    def spawn():
+        for _n in range(100):
+            window.open_new_tab()
+        terms = terminals_of(window)
+        loop(lambda: all([t.get_pty() is not None for t in terms]))
+        return len(terms)
+
+    count = bench(spawn, rounds=1)
+    bench.extra['terminals'] = count
+
+
+def test_split_storm(bench, window, loop):
+    """Split the newest terminal 32 times, alternating orientation"""
+    from gi.repository import Gtk
+    orientations = (Gtk.Orientation.HORIZONTAL, Gtk.Orientation.VERTICAL)
+
+    def storm():
+        for n in range(32):
+            window.split_terminal(terminals_of(window)[-1], orientations[n % 2])
+        loop()
+
+    bench(storm, rounds=1)
+    bench.extra['terminals'] = len(terminals_of(window))
+
+
+def test_load_64_pane_layout(bench, app, loop):
+    from terminatorlib.gtk4window import TerminatorGtk4Window
+    layout = {'children': {'child0': paned_layout(6)}}
+    windows = []
+
+    def load():
+        window = TerminatorGtk4Window(application=app)
+        windows.append(window)
+        window._apply_layout(layout)
+        window.present()
+        loop()
+        return window
+
+    def close():
+        windows.pop().destroy()
+        loop()
+
+    bench(load, teardown=close)
+    bench.extra['terminals'] = 64
+
+
+def test_profile_switch_all(bench, window, loop):
+    """Switch every terminal of a 64-pane layout between two profiles"""
+    from terminatorlib.config import Config
+    config = Config()
+    config.add_profile('bench', None)
+    config.base.profiles['bench']['background_color'] = '#102030'
+    config.base.profiles['bench']['font'] = 'Monospace 11'
+    window._apply_layout({'children': {'child0': paned_layout(6)}})
+    loop()
+    terms = terminals_of(window)
+    profiles = ['bench', 'default']
+
+    def switch():
+        profile = profiles.pop(0)
+        profiles.append(profile)
+        for term in terms:
+            term.set_profile(None, profile)
+        loop()
+
+    bench(switch)
+    bench.extra['terminals'] = len(terms)
+
+
+def test_broadcast_typing_50(bench, window, loop):
+    """Send 100 keystrokes to 50 terminals, as broadcast to all does"""
+    from gi.repository import Gtk
+    window._apply_layout({'children': {'child0': paned_layout(5)}})
+    for term in terminals_of(window)[:18]:
+        window.split_terminal(term, Gtk.Orientation.VERTICAL)
+    loop()
+    terms = terminals_of(window)[:50]
+    loop(lambda: all([t.get_pty() is not None for t in terms]))
+    keys = ('echo benchmark' * 8)[:99] + '\x15'
+
+    def type_keys():
+        for key in keys:
+            for term in terms:
+                term.feed_child(key.encode('utf-8'))
+            loop()
+
+    bench(type_keys)
+    bench.extra['terminals'] = len(terms)
+    bench.extra['keystrokes'] = len(keys)
+
+
+def test_right_click_menu(bench, window, loop):
+    """Build the context menu as a right-click does"""
+    from terminatorlib import plugin_gtk4_adapter
+    term = window.term
+    bench(term._build_menu_model, rounds=50)
+    bench.extra.update(plugin_gtk4_adapter.benchmark(term))
@@ -0,0 +1,240 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""conftest.py - Fixtures and JSON reporting for the benchmark suite
+
+The benchmarks drive real GTK4 windows and VTE terminals, so they need a
+display. On a headless box run them under Xvfb or the GDK broadway backend:
+
+    xvfb-run -a python -m pytest benchmarks --bench-json=results.json
+
+    broadwayd :5 & GDK_BACKEND=broadway BROADWAY_DISPLAY=:5 \\
+        python -m pytest benchmarks --bench-json=results.json
+
+Benchmarks that need a display are skipped without one. The suite runs
+with its own empty config and cache directories, so the user's config is
+never touched.
+
+Each result records the min, max, mean, median and standard deviation of
+its rounds in milliseconds, plus any extra figures the benchmark adds.
+--bench-compare=baseline.json fails benchmarks whose median got slower
+than the baseline by more than --bench-tolerance.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import statistics
+import subprocess
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..")))
+
+_results = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('terminator benchmarks')
+    group.addoption('--bench-json', default=None,
+                    help='write benchmark results to this JSON file')
+    group.addoption('--bench-rounds', type=int, default=5,
+                    help='rounds of each benchmark (default 5)')
+    group.addoption('--bench-compare', default=None,
+                    help='JSON results to compare medians against')
+    group.addoption('--bench-tolerance', type=float, default=0.2,
+                    help='allowed slowdown against --bench-compare (default 0.2)')
+    group.addoption('--bench-flood-lines', type=int, default=10000000,
+                    help='lines printed by the output flood (default 1e7)')
+
+
+def pytest_collect_file(file_path, parent):
+    """Benchmarks live in bench_*.py, away from the default test run"""
+    if file_path.name.startswith('bench_') and file_path.suffix == '.py':
+        return pytest.Module.from_parent(parent, path=file_path)
+
+
+def pytest_configure(config):
+    # Keep config, plugins' state and scrollback out of the user's home
+    home = tempfile.mkdtemp(prefix='terminator-bench-')
+    config._bench_home = home
+    for name in ('XDG_CONFIG_HOME', 'XDG_CACHE_HOME', 'XDG_DATA_HOME'):
+        os.environ[name] = os.path.join(home, name.lower())
+
+
+def pytest_unconfigure(config):
+    home = getattr(config, '_bench_home', None)
+    if home:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+class Bench(object):
+    """Times a callable over several rounds, like pytest-benchmark's
+    benchmark fixture"""
+
+    def __init__(self, name, rounds, baseline, tolerance):
+        self.name = name
+        self.rounds = rounds
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.extra = {}
+        self.stats = None
+
+    def __call__(self, func, *args, rounds=None, setup=None, teardown=None):
+        """Run func(*args) for each round, with setup() before and
+        teardown() after it untimed. A setup returning a tuple replaces
+        args. Returns the result of the last round"""
+        times = []
+        result = None
+        for _n in range(rounds or self.rounds):
+            call_args = args
+            if setup is not None:
+                prepared = setup()
+                if isinstance(prepared, tuple):
+                    call_args = prepared
+            start = time.perf_counter()
+            result = func(*call_args)
+            times.append((time.perf_counter() - start) * 1000.0)
+            if teardown is not None:
+                teardown()
+        self.stats = {'rounds': len(times),
+                      'min': min(times),
+                      'max': max(times),
+                      'mean': statistics.mean(times),
+                      'median': statistics.median(times),
+                      'stddev': statistics.pstdev(times)}
+        _results.append({'name': self.name, 'stats': self.stats,
+                         'extra': self.extra})
+        self._compare()
+        return result
+
+    def _compare(self):
+        if self.baseline is None:
+            return
+        before = self.baseline.get(self.name)
+        if not before:
+            return
+        limit = before * (1 + self.tolerance)
+        if self.stats['median'] > limit:
+            pytest.fail('%s regressed: median %.2fms, baseline %.2fms'
+                        % (self.name, self.stats['median'], before))
+
+
+@pytest.fixture(scope='session')
+def _baseline(request):
+    path = request.config.getoption('bench_compare')
+    if not path:
+        return None
+    with open(path) as handle:
+        data = json.load(handle)
+    return dict([(b['name'], b['stats']['median'])
+                 for b in data.get('benchmarks', [])])
+
+
+@pytest.fixture
+def bench(request, _baseline):
+    return Bench(request.node.name, request.config.getoption('bench_rounds'),
+                 _baseline, request.config.getoption('bench_tolerance'))
+
+
+@pytest.fixture(scope='session')
+def gtk():
+    """Gtk 4, initialised against a display, or skip"""
+    gi = pytest.importorskip('gi')
+    try:
+        gi.require_version('Gtk', '4.0')
+        gi.require_version('Vte', '3.91')
+        from gi.repository import Gtk
+    except (ValueError, ImportError) as ex:
+        pytest.skip('GTK4 or VTE for GTK4 is not available: %s' % ex)
+    if not Gtk.init_check():
+        pytest.skip('no display; run under Xvfb or broadway')
+    return Gtk
+
+
+def pump(until=None, timeout=30.0):
+    """Run the main loop until until() is true, or until it is idle when
+    until is None. Returns whether until() became true"""
+    from gi.repository import GLib
+    context = GLib.MainContext.default()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if until is None:
+            if not context.pending():
+                return True
+            context.iteration(False)
+            continue
+        if until():
+            return True
+        context.iteration(True)
+    return False
+
+
+@pytest.fixture
+def loop(gtk):
+    """The pump() function, once GTK is up"""
+    return pump
+
+
+@pytest.fixture(scope='session')
+def app(gtk):
+    from gi.repository import Gio
+    application = gtk.Application(application_id='io.github.gnome.Terminator.Bench',
+                                  flags=Gio.ApplicationFlags.NON_UNIQUE)
+    application.register(None)
+    return application
+
+
+@pytest.fixture
+def window(app):
+    """A fresh Terminator window with one terminal"""
+    from terminatorlib.gtk4window import TerminatorGtk4Window
+    from terminatorlib.terminator import Terminator
+    win = TerminatorGtk4Window(application=app)
+    win.present()
+    pump()
+    yield win
+    win.destroy()
+    terminator = Terminator()
+    for term in list(terminator.terminals):
+        if not term.get_realized():
+            terminator.terminals.remove(term)
+    pump()
+
+
+def _commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = session.config.getoption('bench_json')
+    if not path or not _results:
+        return
+    try:
+        from gi.repository import Gtk, Vte
+        versions = {'gtk': '%d.%d.%d' % (Gtk.get_major_version(),
+                                         Gtk.get_minor_version(),
+                                         Gtk.get_micro_version()),
+                    'vte': '%d.%d.%d' % (Vte.get_major_version(),
+                                         Vte.get_minor_version(),
+                                         Vte.get_micro_version())}
+    except Exception:
+        versions = {}
+    data = {'datetime': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'commit': _commit(),
+            'machine': {'python': platform.python_version(),
+                        'platform': platform.platform(),
+                        'cpus': os.cpu_count(),
+                        'gdk_backend': os.environ.get('GDK_BACKEND', ''),
+                        'versions': versions},
+            'benchmarks': _results}
+    with open(path, 'w') as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
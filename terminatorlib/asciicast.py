@@ -0,0 +1,317 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""asciicast.py - Record terminals to asciicast files and replay them
+
+Recordings use the asciicast v2 format of asciinema: a JSON header line,
+then one [time, type, data] line per event. 'o' is output, 'i' input and
+'r' a resize to "COLSxROWS". They play in asciinema as well as here.
+
+VTE reads the PTY itself and gives no access to the raw byte stream, so
+TerminalRecorder records what the terminal printed as text: new output
+whenever the contents change, and a screen redraw when the cursor moves
+back. Colours and attributes are not kept. A CastWriter thread encodes
+and writes events, so recording costs the main loop one queue put per
+contents change.
+
+>>> import tempfile
+>>> path = os.path.join(tempfile.mkdtemp(), 'demo.cast')
+>>> writer = CastWriter(path, header(80, 24, timestamp=0), clock=lambda: now)
+>>> now = 0.0
+>>> writer.start()
+>>> now = 0.5; writer.write('o', 'hello\\r\\n')
+>>> now = 2.0; writer.write('o', 'world\\r\\n')
+>>> writer.close()
+>>> cast, events = read(path)
+>>> cast['width'], cast['height']
+(80, 24)
+>>> list(events)
+[(0.5, 'o', 'hello\\r\\n'), (2.0, 'o', 'world\\r\\n')]
+
+A Player feeds events to any number of terminals, at recorded speed or,
+with speed None, as fast as they take it:
+
+>>> class Term(object):
+...     def __init__(self): self.data = b''
+...     def feed(self, data): self.data += data
+>>> calls = []
+>>> terms = [Term(), Term()]
+>>> player = Player(read(path)[1], terms, schedule=lambda ms, f: calls.append((ms, f)))
+>>> player.start()
+>>> calls[-1][0]
+500
+>>> calls[-1][1]()
+False
+>>> terms[1].data, calls[-1][0]
+(b'hello\\r\\n', 1500)
+>>> calls[-1][1]()
+False
+>>> terms[0].data == terms[1].data == b'hello\\r\\nworld\\r\\n', player.done
+(True, True)
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+
+from .scrollback_archive import _text as _range_text
+
+VERSION = 2
+# Bytes fed per main loop iteration when replaying at maximum speed
+CHUNK = 65536
+
+
+def header(width, height, timestamp=None, title=None, env=None,
+           idle_time_limit=None):
+    """The header of a new recording"""
+    cast = {'version': VERSION, 'width': width, 'height': height,
+            'timestamp': int(time.time() if timestamp is None else timestamp)}
+    if title:
+        cast['title'] = title
+    if env:
+        cast['env'] = env
+    if idle_time_limit:
+        cast['idle_time_limit'] = idle_time_limit
+    return cast
+
+
+def encode(offset, kind, data):
+    return json.dumps([round(offset, 6), kind, data]) + '\n'
+
+
+def read(path):
+    """Return (header, events) of a recording. events yields (time, type,
+    data) as the file is read"""
+    handle = open(path)
+    try:
+        cast = json.loads(handle.readline())
+    except ValueError:
+        handle.close()
+        raise
+    if cast.get('version') != VERSION:
+        handle.close()
+        raise ValueError('not an asciicast v2 file: %s' % path)
+
+    def events():
+        with handle:
+            for line in handle:
+                try:
+                    offset, kind, data = json.loads(line)
+                except ValueError:
+                    # A recording cut short ends with a partial line
+                    continue
+                yield (offset, kind, data)
+    return (cast, events())
+
+
+class CastWriter(object):
+    """Write events to a recording from a background thread"""
+
+    def __init__(self, path, cast, clock=None):
+        self.path = path
+        self.cast = cast
+        self.clock = clock or time.monotonic
+        self.queue = queue.SimpleQueue()
+        self.started = None
+        self.thread = None
+        self.events = 0
+
+    def start(self):
+        self.started = self.clock()
+        handle = open(self.path, 'w')
+        handle.write(json.dumps(self.cast) + '\n')
+        self.thread = threading.Thread(target=self._run, args=(handle,),
+                                       name='terminator-asciicast',
+                                       daemon=True)
+        self.thread.start()
+
+    def write(self, kind, data):
+        """Queue an event, timed now"""
+        if data:
+            self.queue.put((self.clock() - self.started, kind, data))
+
+    def _run(self, handle):
+        with handle:
+            while True:
+                event = self.queue.get()
+                lines = []
+                # Write whatever has queued up meanwhile in one go
+                while event is not None:
+                    lines.append(encode(*event))
+                    try:
+                        event = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                handle.write(''.join(lines))
+                handle.flush()
+                self.events += len(lines)
+                if event is None:
+                    return
+
+    def close(self):
+        """Write what is queued and wait for the writer to finish"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+def _text(vte, start, end):
+    """Text a Vte.Terminal shows from the (column, row) cursor position
+    start up to end"""
+    (scol, srow), (ecol, erow) = start, end
+    newline = False
+    if ecol == 0:
+        if erow <= srow:
+            return ''
+        erow -= 1
+        ecol = vte.get_column_count()
+        newline = True
+    text = _range_text(vte, srow, erow, ecol - 1, start=scol)
+    if newline and not text.endswith('\n'):
+        text += '\n'
+    return text.replace('\n', '\r\n')
+
+
+class TerminalRecorder(object):
+    """Record what a terminal prints to an asciicast file"""
+
+    def __init__(self, terminal, path, record_input=False):
+        from .plugin import ContentsWatch
+        vte = terminal.get_vte() if hasattr(terminal, 'get_vte') else terminal
+        self.vte = vte
+        self.path = path
+        self.size = (vte.get_column_count(), vte.get_row_count())
+        env = dict([(k, os.environ[k]) for k in ('SHELL', 'TERM')
+                    if k in os.environ])
+        self.writer = CastWriter(path, header(self.size[0], self.size[1],
+                                              title=vte.get_window_title(),
+                                              env=env))
+        self.writer.start()
+        self.position = vte.get_cursor_position()
+        self.watch = ContentsWatch().watch(None, terminal, self._on_contents)
+        self.commit_id = None
+        if record_input:
+            self.commit_id = vte.connect('commit', self._on_commit)
+
+    def _on_contents(self, change):
+        vte = self.vte
+        size = (vte.get_column_count(), vte.get_row_count())
+        if size != self.size:
+            self.size = size
+            self.writer.write('r', '%dx%d' % size)
+        cursor = change.cursor
+        if tuple(reversed(cursor)) >= tuple(reversed(self.position)):
+            self.writer.write('o', _text(vte, self.position, cursor))
+        else:
+            # Moved back: cleared, or redrawn by a full screen program
+            adj = vte.get_vadjustment()
+            top = int(adj.get_upper() - adj.get_page_size())
+            self.writer.write('o', '\x1b[H\x1b[2J' + _text(vte, (0, top), cursor))
+        self.position = cursor
+
+    def _on_commit(self, _vte, text, _size):
+        self.writer.write('i', text)
+
+    def stop(self):
+        """Stop recording and finish writing the file"""
+        self.watch.cancel()
+        if self.commit_id is not None:
+            self.vte.disconnect(self.commit_id)
+            self.commit_id = None
+        self.writer.close()
+
+
+class Player(object):
+    """Feed the output events of a recording to terminals"""
+
+    def __init__(self, events, terminals, speed=1.0, idle_time_limit=None,
+                 resize=False, on_done=None, schedule=None):
+        """speed None replays as fast as the terminals take it. Delays are
+        cut to idle_time_limit seconds. schedule(delay_ms, func) must run
+        func on the main loop, again while it returns True"""
+        self.events = iter(events)
+        self.terminals = [t.get_vte() if hasattr(t, 'get_vte') else t
+                          for t in terminals]
+        self.speed = speed
+        self.idle_time_limit = idle_time_limit
+        self.resize = resize
+        self.on_done = on_done
+        self.schedule = schedule
+        self.offset = 0.0
+        self.pending = None
+        self.bytes = 0
+        self.done = False
+        self.stopped = False
+
+    def start(self):
+        if self.schedule is None:
+            from gi.repository import GLib
+
+            def schedule(delay_ms, func):
+                if delay_ms <= 0:
+                    return GLib.idle_add(func)
+                return GLib.timeout_add(delay_ms, func)
+            self.schedule = schedule
+        self._next()
+
+    def stop(self):
+        self.stopped = True
+
+    def _feed(self, kind, data):
+        if kind == 'o':
+            raw = data.encode('utf-8')
+            self.bytes += len(raw)
+            for terminal in self.terminals:
+                terminal.feed(raw)
+        elif kind == 'r' and self.resize:
+            columns, _x, rows = data.partition('x')
+            for terminal in self.terminals:
+                terminal.set_size(int(columns), int(rows))
+
+    def _next(self):
+        """Schedule the next event, or finish"""
+        self.pending = next(self.events, None)
+        if self.pending is None or self.stopped:
+            self.done = True
+            if self.on_done is not None:
+                self.on_done(self)
+            return
+        if self.speed is None:
+            self.schedule(0, self._run_fast)
+            return
+        delay = self.pending[0] - self.offset
+        if self.idle_time_limit is not None:
+            delay = min(delay, self.idle_time_limit)
+        self.schedule(max(0, int(delay * 1000 / self.speed)), self._run)
+
+    def _run(self):
+        self.offset, kind, data = self.pending
+        self._feed(kind, data)
+        self._next()
+        return False
+
+    def _run_fast(self):
+        fed = 0
+        while self.pending is not None and fed < CHUNK and not self.stopped:
+            _offset, kind, data = self.pending
+            self._feed(kind, data)
+            fed += len(data)
+            self.pending = next(self.events, None)
+        if self.pending is not None and not self.stopped:
+            return True
+        self.done = True
+        if self.on_done is not None:
+            self.on_done(self)
+        return False
+
+
+def replay(path, terminals, speed=1.0, on_done=None):
+    """Replay the recording at path into terminals. Returns the Player"""
+    cast, events = read(path)
+    player = Player(events, terminals, speed=speed,
+                    idle_time_limit=cast.get('idle_time_limit'),
+                    on_done=on_done)
+    player.start()
+    return player
@@ -66,6 +66,19 @@ KeyError: 'ConfigBase::get_item: unknown key algo'
 >>> config.options_set({})
 >>> config.options_get()
 {}
+>>> snapshot = config.snapshot()
+>>> snapshot.focus
+'click'
+>>> snapshot is config.snapshot()
+True
+>>> changes = []
+>>> watch = config.subscribe(['focus'], lambda snap, keys: changes.append(snap.focus))
+>>> config['focus'] = 'sloppy'
+>>> config['focus'] = 'sloppy'
+>>> changes, snapshot.focus, config.snapshot().generation > snapshot.generation
+(['sloppy'], 'click', True)
+>>> watch.cancel()
+>>> config['focus'] = 'click'
 >>> 
 
 """
@@ -76,6 +89,8 @@ from copy import copy
 from configobj import ConfigObj, flatten_errors
 from validate import Validator
 from .borg import Borg
+from . import util
+from .configsnapshot import ConfigSnapshot, Subscribers, changed_keys
 from .util import dbg, err, DEBUG, get_system_config_dir, get_config_dir, dict_diff, update_config_to_cell_height
 
 from gi.repository import Gio
@@ -105,6 +120,9 @@ DEFAULTS = {
             'enabled_plugins'       : ['LaunchpadBugURLHandler',
                                        'LaunchpadCodeURLHandler',
                                        'APTURLHandler'],
+            'plugin_cpu_budget'     : 0,
+            'contents_changed_interval': 16,
+            'scrollback_budget'     : 0,
             'ask_before_closing'    : 'multiple_terminals',
             'always_split_with_profile': False,
             'putty_paste_style'     : False,
@@ -244,6 +262,7 @@ DEFAULTS = {
                 'scroll_on_output'      : False,
                 'scrollback_lines'      : 500,
                 'scrollback_infinite'   : False,
+                'scrollback_archive'    : False,
                 'disable_mousewheel_zoom': False,
                 'exit_action'           : 'close',
                 'palette'               : '#2e3436:#cc0000:#4e9a06:#c4a000:\
@@ -319,6 +338,15 @@ class Config(object):
         """Get our profile"""
         return(self.profile)
 
+    def snapshot(self):
+        """Return the current ConfigSnapshot"""
+        return(self.base.snapshot())
+
+    def subscribe(self, keys, callback, *args):
+        """Call callback(snapshot, changed keys, *args) when any of keys
+        change. Returns a Subscription to cancel"""
+        return(self.base.subscribe(keys, callback, *args))
+
     def get_profile_by_name(self, profile):
         """Get the profile with the specified name"""
         return(self.base.profiles[profile])
@@ -348,6 +376,7 @@ class Config(object):
             self.set_profile('default')
         if profile in self.base.profiles:
             del(self.base.profiles[profile])
+            self.base.changed()
         options = self.options_get()
         if options and options.profile == profile:
             options.profile = None
@@ -358,6 +387,7 @@ class Config(object):
         if profile in self.base.profiles:
             self.base.profiles[newname] = self.base.profiles[profile]
             del(self.base.profiles[profile])
+            self.base.changed()
             if profile == self.profile:
                 self.profile = newname
 
@@ -450,7 +480,7 @@ class Config(object):
         # Need to trigger a reconfigure to change active terminals immediately
         if "Terminator" not in globals():
             from .terminator import Terminator
-        Terminator().reconfigure()
+        Terminator().reconfigure(force=True)
 
     def save(self):
         """Cause ConfigBase to save our config to file"""
@@ -545,6 +575,9 @@ class ConfigBase(Borg):
     layouts = None
     command_line_options = None
     config_file_updated_to_cell_height = False
+    generation = None
+    subscribers = None
+    _snapshot = None
 
     def __init__(self):
         """Class initialiser"""
@@ -578,6 +611,9 @@ class ConfigBase(Borg):
             self.layouts = {}
             for layout in DEFAULTS['layouts']:
                 self.layouts[layout] = copy(DEFAULTS['layouts'][layout])
+        if self.generation is None:
+            self.generation = 0
+            self.subscribers = Subscribers()
 
     def defaults_to_configspec(self):
         """Convert our tree of default values into a ConfigObj validation
@@ -734,6 +770,7 @@ class ConfigBase(Borg):
                     dbg('skipping missing section %s' % section_name)
 
         self.loaded = True
+        self.changed()
 
     def get_config_filename(self):
         filename = ''
@@ -878,19 +915,24 @@ class ConfigBase(Borg):
             # Hitting this generally implies a bug
             profile = 'default'
 
+        # Only build debug messages when they will be printed, this is
+        # called on every lookup
         if key in self.global_config:
-            dbg('%s found in globals: %s' %
-                    (key, self.global_config[key]))
+            if util.DEBUG:
+                dbg('%s found in globals: %s' %
+                        (key, self.global_config[key]))
             return(self.global_config[key])
         elif key in self.profiles[profile]:
-            dbg('%s found in profile %s: %s' % (
-                    key, profile, self.profiles[profile][key]))
+            if util.DEBUG:
+                dbg('%s found in profile %s: %s' % (
+                        key, profile, self.profiles[profile][key]))
             return(self.profiles[profile][key])
         elif key == 'keybindings':
             return(self.keybindings)
         elif plugin and plugin in self.plugins and key in self.plugins[plugin]:
-            dbg('%s found in plugin %s: %s' % (
-                    key, plugin, self.plugins[plugin][key]))
+            if util.DEBUG:
+                dbg('%s found in plugin %s: %s' % (
+                        key, plugin, self.plugins[plugin][key]))
             return(self.plugins[plugin][key])
         elif default:
             return default
@@ -903,11 +945,16 @@ class ConfigBase(Borg):
                 (key, value, profile, plugin))
 
         if key in self.global_config:
-            self.global_config[key] = value
+            if self.global_config[key] != value:
+                self.global_config[key] = value
+                self.changed([key])
         elif key in self.profiles[profile]:
-            self.profiles[profile][key] = value
+            if self.profiles[profile][key] != value:
+                self.profiles[profile][key] = value
+                self.changed([key])
         elif key == 'keybindings':
             self.keybindings = value
+            self.changed([key])
         elif plugin is not None:
             if plugin not in self.plugins:
                 self.plugins[plugin] = {}
@@ -917,6 +964,34 @@ class ConfigBase(Borg):
 
         return(True)
 
+    def snapshot(self):
+        """Return a ConfigSnapshot of the current generation"""
+        if self._snapshot is None or self._snapshot.generation != self.generation:
+            self._snapshot = ConfigSnapshot(self.global_config, self.profiles,
+                                            self.keybindings, self.generation)
+        return(self._snapshot)
+
+    def subscribe(self, keys, callback, *args):
+        """Call callback(snapshot, changed keys, *args) when any of keys
+        change, or any key when keys is None"""
+        return(self.subscribers.subscribe(keys, callback, *args))
+
+    def changed(self, keys=None):
+        """Start a new generation of the config and notify subscribers.
+        Without keys, the keys that changed are found by comparing with the
+        last snapshot, which catches edits made to the sections directly"""
+        if keys is None:
+            if self._snapshot is None:
+                self.generation += 1
+                return
+            old = self._snapshot
+            self.generation += 1
+            keys = changed_keys(old, self.snapshot())
+        else:
+            self.generation += 1
+        if keys:
+            self.subscribers.notify(set(keys), self.snapshot)
+
     def get_plugin(self, plugin):
         """Return a whole tree for a plugin"""
         if plugin in self.plugins:
@@ -940,6 +1015,7 @@ class ConfigBase(Borg):
         else:
             newprofile = copy(DEFAULTS['profiles']['default'])
         self.profiles[profile] = newprofile
+        self.changed(['profiles'])
         return(True)
 
     def add_layout(self, name, layout):
@@ -158,8 +158,10 @@ class ConfigJson(object):
         return layoutjson
 
     def extend_config(self, jsonfile):
-        configjson = self.read_config(jsonfile)
-       
+        return self.extend_config_from_data(self.read_config(jsonfile))
+
+    def extend_config_from_data(self, configjson):
+        """Apply an already parsed config json document"""
         if not configjson:
             return None
         
@@ -0,0 +1,227 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""configsnapshot.py - Read-only views of the config, and change subscriptions
+
+A ConfigSnapshot is a frozen copy of the global options, profiles and
+keybindings, read by attribute. ConfigBase hands out one snapshot per
+generation of the config, so reading a snapshot in a hot handler costs an
+attribute lookup rather than a Config() and a string lookup.
+
+>>> snap = ConfigSnapshot({'invert_search': False, 'enabled_plugins': ['A']},
+...                       {'default': {'font': 'Mono 10'}}, {'copy': '<Ctrl>c'}, 3)
+>>> snap.invert_search, snap.enabled_plugins, snap.generation
+(False, ('A',), 3)
+>>> snap.profile('default').font
+'Mono 10'
+>>> snap.profile('missing').font
+'Mono 10'
+>>> snap.invert_search = True
+Traceback (most recent call last):
+  ...
+AttributeError: config snapshots are read-only
+
+changed_keys() tells which keys differ between two snapshots, in the global
+options or in any profile:
+
+>>> later = ConfigSnapshot({'invert_search': True, 'enabled_plugins': ['A']},
+...                        {'default': {'font': 'Mono 12'}}, {'copy': '<Ctrl>c'}, 4)
+>>> sorted(changed_keys(snap, later))
+['font', 'invert_search']
+
+A ConfigDiff says where they changed, so that only what is affected needs
+updating. Without an old snapshot, everything counts as changed:
+
+>>> diff = ConfigDiff(snap, later)
+>>> sorted(diff.globals), diff.profiles, diff.keybindings
+(['invert_search'], {'default': {'font'}}, False)
+>>> diff.touches('invert_search', 'focus'), diff.touches('focus')
+(True, False)
+>>> diff.profile_changed('default'), diff.profile_changed('other')
+(True, False)
+>>> sorted(ConfigDiff(None, later).globals)
+['enabled_plugins', 'invert_search']
+
+Subscribers name the keys they use, and only hear about changes to those:
+
+>>> subs = Subscribers()
+>>> heard = []
+>>> sub = subs.subscribe(['font'], lambda s, keys: heard.append(sorted(keys)))
+>>> subs.notify({'invert_search'}, lambda: later)
+>>> subs.notify({'font', 'invert_search'}, lambda: later)
+>>> heard
+[['font']]
+>>> sub.cancel()
+>>> subs.notify({'font'}, lambda: later)
+>>> heard
+[['font']]
+"""
+
+import weakref
+from types import MappingProxyType
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict):
+        return MappingProxyType(dict(value))
+    return value
+
+
+class Section(object):
+    """Read-only, attribute access to one section of the config"""
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        object.__setattr__(self, '_values',
+                           dict([(k, _freeze(v)) for k, v in values.items()]))
+
+    def __getattr__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('config snapshots are read-only')
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def keys(self):
+        return self._values.keys()
+
+
+class ConfigSnapshot(Section):
+    """The global options of one generation of the config, with its
+    profiles and keybindings"""
+    __slots__ = ('generation', 'profiles', 'keybindings')
+
+    def __init__(self, global_config, profiles, keybindings, generation=0):
+        Section.__init__(self, global_config)
+        object.__setattr__(self, 'generation', generation)
+        object.__setattr__(self, 'profiles', MappingProxyType(
+            dict([(name, Section(p)) for name, p in profiles.items()])))
+        object.__setattr__(self, 'keybindings', _freeze(keybindings))
+
+    def profile(self, name):
+        """The named profile, or the default one if there is no such
+        profile"""
+        return self.profiles.get(name) or self.profiles['default']
+
+
+def _diff(old, new):
+    return set([k for k in set(old.keys()) | set(new.keys())
+                if old.get(k) != new.get(k)])
+
+
+class ConfigDiff(object):
+    """What changed between two snapshots: global keys, keys of each
+    profile, and whether the keybindings did. old may be None"""
+
+    def __init__(self, old, new):
+        empty = Section({})
+        if old is None:
+            old = ConfigSnapshot({}, {}, {}, -1)
+            self.keybindings = True
+        else:
+            self.keybindings = old.keybindings != new.keybindings
+        self.globals = _diff(old, new)
+        self.profiles = {}
+        for name in set(old.profiles) | set(new.profiles):
+            keys = _diff(old.profiles.get(name, empty),
+                         new.profiles.get(name, empty))
+            if keys:
+                self.profiles[name] = keys
+        self.profiles_added = set(new.profiles) - set(old.profiles)
+        self.profiles_removed = set(old.profiles) - set(new.profiles)
+
+    def __bool__(self):
+        return bool(self.globals or self.profiles or self.keybindings)
+
+    def keys(self):
+        """Every changed key, wherever it changed"""
+        keys = set(self.globals)
+        for changed in self.profiles.values():
+            keys |= changed
+        if self.keybindings:
+            keys.add('keybindings')
+        if self.profiles_added or self.profiles_removed:
+            keys.add('profiles')
+        return keys
+
+    def touches(self, *keys):
+        """Whether any of keys changed, globally or in any profile"""
+        keys = set(keys)
+        if keys & self.globals:
+            return True
+        for changed in self.profiles.values():
+            if keys & changed:
+                return True
+        return 'keybindings' in keys and self.keybindings
+
+    def profile_changed(self, name):
+        return name in self.profiles
+
+
+def changed_keys(old, new):
+    """Return the set of keys whose value differs between two snapshots"""
+    return ConfigDiff(old, new).keys()
+
+
+class Subscription(object):
+    """Interest in some config keys. Bound methods are held weakly, so
+    a subscription ends with the object it belongs to"""
+
+    def __init__(self, owner, keys, callback, args):
+        self.owner = owner
+        self.keys = None if keys is None else frozenset(keys)
+        if hasattr(callback, '__self__'):
+            self.callback = weakref.WeakMethod(callback)
+        else:
+            self.callback = lambda: callback
+        self.args = args
+
+    def cancel(self):
+        if self in self.owner.subscriptions:
+            self.owner.subscriptions.remove(self)
+
+
+class Subscribers(object):
+    """Callbacks interested in changes to some config keys"""
+
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, keys, callback, *args):
+        """Call callback(snapshot, changed keys, *args) whenever one of keys
+        changes, or any key when keys is None. Returns a Subscription"""
+        subscription = Subscription(self, keys, callback, args)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def notify(self, keys, snapshot):
+        """Tell subscribers about keys. snapshot() returns the current
+        snapshot, and is only called if someone is interested"""
+        current = None
+        for subscription in list(self.subscriptions):
+            relevant = keys if subscription.keys is None else keys & subscription.keys
+            if not relevant:
+                continue
+            callback = subscription.callback()
+            if callback is None:
+                subscription.cancel()
+                continue
+            if current is None:
+                current = snapshot()
+            try:
+                callback(current, relevant, *subscription.args)
+            except Exception as ex:
+                from .util import err
+                err('config subscriber %s failed: %s' % (callback, ex))
@@ -13,6 +13,9 @@ gi.require_version('Gtk', '4.0')
 gi.require_version('Vte', '3.91')
 from gi.repository import Gtk, GLib, Gio
 from .config import Config
+from .util import err
+from . import metrics
+from . import scrollback
 
 from .gtk4window import TerminatorGtk4Window
 
@@ -21,6 +24,25 @@ class TerminatorGtk4App(Gtk.Application):
     def __init__(self):
         # Gtk.Application inherits from Gio.Application; use Gio.ApplicationFlags
         super().__init__(application_id='io.github.gnome.Terminator.Gtk4', flags=Gio.ApplicationFlags.FLAGS_NONE)
+        self._watchdog = None
+        self._dbus = None
+
+    def do_startup(self, *args):  # type: ignore[override]
+        Gtk.Application.do_startup(self)
+        # Serve remotinator's calls, when the config allows it
+        try:
+            from .gtk4ipc import Gtk4DBusService
+            self._dbus = Gtk4DBusService(self)
+            self._dbus.start()
+        except Exception as ex:
+            err('Unable to start the DBus service: %s' % ex)
+            self._dbus = None
+
+    def do_shutdown(self, *args):  # type: ignore[override]
+        if self._dbus is not None:
+            self._dbus.stop()
+            self._dbus = None
+        Gtk.Application.do_shutdown(self)
 
     def do_activate(self, *args):  # type: ignore[override]
         # Create a single window with one terminal for now
@@ -34,6 +56,15 @@ class TerminatorGtk4App(Gtk.Application):
             opts = None
 
         if opts:
+            # Stall watchdog, started once for the application
+            if getattr(opts, 'watchdog', None) and self._watchdog is None:
+                try:
+                    from .watchdog import StallWatchdog
+                    self._watchdog = StallWatchdog(threshold_ms=opts.watchdog)
+                    self._watchdog.start()
+                except Exception:
+                    pass
+
             # Geometry
             if opts.geometry:
                 # rudimentary WxH+X+Y handling
@@ -67,18 +98,34 @@ class TerminatorGtk4App(Gtk.Application):
                         cwd = opts.working_directory
                     else:
                         cwd = None
-                    if opts.execute:
-                        argv = opts.execute if isinstance(opts.execute, list) else [opts.execute]
-                        term.spawn_command(argv, cwd)
-                    elif opts.command:
-                        argv = [opts.command]
-                        term.spawn_command(argv, cwd)
-                    else:
-                        term.spawn_login_shell(cwd)
+                    replaying = False
+                    if getattr(opts, 'replay', None):
+                        from . import asciicast
+                        try:
+                            asciicast.replay(opts.replay, [term],
+                                             speed=opts.replay_speed or None)
+                            replaying = True
+                        except (IOError, OSError, ValueError) as ex:
+                            err('Unable to replay %s: %s' % (opts.replay, ex))
+                    # A recording that cannot be replayed leaves a shell
+                    if not replaying:
+                        if opts.execute:
+                            argv = opts.execute if isinstance(opts.execute, list) else [opts.execute]
+                            term.spawn_command(argv, cwd)
+                        elif opts.command:
+                            argv = [opts.command]
+                            term.spawn_command(argv, cwd)
+                        else:
+                            term.spawn_login_shell(cwd)
+                    if getattr(opts, 'record', None):
+                        term.start_recording(opts.record)
             except Exception:
                 pass
 
         win.present()
+        # Only starts a probe when metrics collection is enabled
+        metrics.watch_main_loop()
+        scrollback.watch()
 
     def run(self, argv: Optional[List[str]] = None) -> int:
         # Match Gtk.Application.run signature expecting a list of strings
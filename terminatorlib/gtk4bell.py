@@ -0,0 +1,153 @@
+"""GTK4 bell handling for terminal units.
+
+Bells are coalesced per terminal: a bell arriving within the coalescing
+window of the previous one only extends the effects already on screen and
+is counted as suppressed. Each effect (icon, visual flash, urgency hint)
+owns at most one pending GLib timer per terminal; further bells move the
+deadline instead of adding timers, so a runaway `yes $'\\a'` costs a dict
+update per bell rather than a timeout source.
+"""
+
+import time
+
+import gi
+gi.require_version('Gtk', '4.0')
+from gi.repository import GLib
+
+from . import metrics
+
+# Bells closer together than this are folded into the previous one
+BELL_COALESCE_MS = 100
+# How long each effect stays visible after the last bell
+ICON_BELL_MS = 1000
+VISIBLE_BELL_MS = 150
+URGENT_BELL_MS = 1500
+
+# Cached bell flags per profile name: (icon_bell, visible_bell, urgent_bell)
+_profile_flags = {}
+
+
+def invalidate_bell_flags(profile=None):
+    """Forget cached bell flags for one profile, or all of them"""
+    if profile is None:
+        _profile_flags.clear()
+    else:
+        _profile_flags.pop(profile, None)
+
+
+def bell_flags_for(term):
+    """Return (icon_bell, visible_bell, urgent_bell) for a terminal's profile"""
+    try:
+        name = term.config.get_profile()
+    except Exception:
+        name = None
+    flags = _profile_flags.get(name)
+    if flags is not None:
+        return flags
+    try:
+        prof = term.config.get_profile_by_name(name) if name is not None else {}
+    except Exception:
+        prof = {}
+    flags = (bool(prof.get('icon_bell', True)),
+             bool(prof.get('visible_bell', False)),
+             bool(prof.get('urgent_bell', False)))
+    if name is not None:
+        _profile_flags[name] = flags
+    return flags
+
+
+class Gtk4BellManager:
+    """Per-window bell dispatcher with one pooled timer per effect"""
+
+    def __init__(self, window, coalesce_ms=BELL_COALESCE_MS):
+        self._window = window
+        self._coalesce = coalesce_ms / 1000.0
+        # term -> monotonic time of the last bell that was acted upon
+        self._last = {}
+        # (term, effect) -> [timer id, deadline]
+        self._timers = {}
+        self.handled = 0
+        self.suppressed = 0
+
+    def notify(self, term, titlebar):
+        now = time.monotonic()
+        icon_bell, visible_bell, urgent_bell = bell_flags_for(term)
+        last = self._last.get(term)
+        if last is not None and now - last < self._coalesce:
+            self.suppressed += 1
+            metrics.inc('bell.suppressed')
+            # Keep the indicators up while the storm lasts, without new timers
+            if icon_bell:
+                self._extend(term, 'icon', now + ICON_BELL_MS / 1000.0)
+            if urgent_bell:
+                self._extend(term, 'urgent', now + URGENT_BELL_MS / 1000.0)
+            return
+        self._last[term] = now
+        self.handled += 1
+        metrics.inc('bell.handled')
+        if icon_bell and hasattr(titlebar, 'show_bell'):
+            try:
+                titlebar.show_bell()
+                self._arm(term, 'icon', ICON_BELL_MS, titlebar.hide_bell)
+            except Exception:
+                pass
+        if visible_bell and hasattr(titlebar, 'add_css_class'):
+            try:
+                titlebar.add_css_class('bell')
+                self._arm(term, 'visual', VISIBLE_BELL_MS,
+                          lambda: titlebar.remove_css_class('bell'))
+            except Exception:
+                pass
+        win = self._window
+        if urgent_bell and hasattr(win, 'set_urgency_hint'):
+            try:
+                win.set_urgency_hint(True)
+                self._arm(term, 'urgent', URGENT_BELL_MS,
+                          lambda: win.set_urgency_hint(False))
+            except Exception:
+                pass
+
+    def _extend(self, term, effect, deadline):
+        entry = self._timers.get((term, effect))
+        if entry is not None and deadline > entry[1]:
+            entry[1] = deadline
+
+    def _arm(self, term, effect, ms, clear):
+        key = (term, effect)
+        deadline = time.monotonic() + ms / 1000.0
+        entry = self._timers.get(key)
+        if entry is not None:
+            # Reuse the pending timer; it re-arms itself for the remainder
+            if deadline > entry[1]:
+                entry[1] = deadline
+            return
+
+        def _fire():
+            entry = self._timers.get(key)
+            if entry is None:
+                return False
+            remaining = entry[1] - time.monotonic()
+            if remaining > 0.001:
+                entry[0] = GLib.timeout_add(max(1, int(remaining * 1000)), _fire)
+                return False
+            del self._timers[key]
+            try:
+                clear()
+            except Exception:
+                pass
+            return False
+
+        self._timers[key] = [GLib.timeout_add(ms, _fire), deadline]
+
+    def forget(self, term):
+        """Drop state and pending timers for a terminal that went away"""
+        self._last.pop(term, None)
+        for key in [k for k in self._timers if k[0] is term]:
+            entry = self._timers.pop(key)
+            try:
+                GLib.source_remove(entry[0])
+            except Exception:
+                pass
+
+    def pending_timers(self):
+        return len(self._timers)
@@ -0,0 +1,108 @@
+"""Lazy clipboard content for GTK4 terminal selections.
+
+SelectionContentProvider offers text/html and text/plain, each with and
+without an explicit charset. Nothing is rendered up front: the selection
+is kept as one UTF-8 buffer that all plain-text variants write from. HTML
+is only produced when a client asks for it. VTE's formatted HTML is used
+if the selection has not changed since the copy; otherwise the plain text
+is escaped into a <pre> block while it is being written.
+"""
+
+import gi
+gi.require_version('Gtk', '4.0')
+gi.require_version('Vte', '3.91')
+from gi.repository import Gdk, Gio, GLib, GObject, Vte
+
+HTML_TYPES = ('text/html', 'text/html;charset=utf-8')
+TEXT_TYPES = ('text/plain;charset=utf-8', 'text/plain', 'UTF8_STRING')
+WRITE_CHUNK = 65536
+
+
+def _escape_html(data):
+    return (data.replace(b'&', b'&amp;')
+                .replace(b'<', b'&lt;')
+                .replace(b'>', b'&gt;'))
+
+
+class SelectionContentProvider(Gdk.ContentProvider):
+    __gtype_name__ = 'TerminatorSelectionContentProvider'
+
+    def __init__(self, terminal, text):
+        super().__init__()
+        self._terminal = terminal
+        # Single shared UTF-8 buffer for every variant
+        self._utf8 = text.encode('utf-8')
+        self._html = None
+        # Selection serial at copy time; VTE HTML is only valid while it holds
+        self._serial = getattr(terminal, '_selection_serial', 0)
+
+    def do_ref_formats(self):
+        builder = Gdk.ContentFormatsBuilder.new()
+        for mime in HTML_TYPES + TEXT_TYPES:
+            builder.add_mime_type(mime)
+        builder.add_gtype(GObject.TYPE_STRING)
+        return builder.to_formats()
+
+    def do_get_value(self, value):
+        if value.g_type == GObject.TYPE_STRING:
+            value.set_string(self._utf8.decode('utf-8'))
+            return True
+        return Gdk.ContentProvider.do_get_value(self, value)
+
+    def _vte_html(self):
+        term = self._terminal
+        if getattr(term, '_selection_serial', 0) != self._serial:
+            return None
+        try:
+            result = term.get_text_selected_format(Vte.Format.HTML)
+            if isinstance(result, (list, tuple)):
+                result = result[0] if result else None
+            return result.encode('utf-8') if result else None
+        except Exception:
+            return None
+
+    def _chunks(self, mime_type):
+        """Yield the payload for mime_type as a series of byte chunks"""
+        data = self._utf8
+        if mime_type in TEXT_TYPES:
+            for i in range(0, len(data), WRITE_CHUNK):
+                yield data[i:i + WRITE_CHUNK]
+            return
+        if self._html is None:
+            self._html = self._vte_html() or b''
+        if self._html:
+            yield self._html
+            return
+        # &, < and > are single bytes in UTF-8, so escaping per chunk is safe
+        yield b'<pre class="vte-copy">'
+        for i in range(0, len(data), WRITE_CHUNK):
+            yield _escape_html(data[i:i + WRITE_CHUNK])
+        yield b'</pre>'
+
+    def do_write_mime_type_async(self, mime_type, stream, io_priority,
+                                 cancellable, callback, user_data=None):
+        task = Gio.Task.new(self, cancellable, callback, user_data)
+        if mime_type not in HTML_TYPES + TEXT_TYPES:
+            task.return_error(GLib.Error.new_literal(
+                Gio.io_error_quark(), 'Cannot provide %s' % mime_type,
+                int(Gio.IOErrorEnum.NOT_SUPPORTED)))
+            return
+        chunks = self._chunks(mime_type)
+
+        def write_next(*args):
+            if args:
+                try:
+                    stream.write_all_finish(args[1])
+                except GLib.Error as e:
+                    task.return_error(e)
+                    return
+            chunk = next(chunks, None)
+            if chunk is None:
+                task.return_boolean(True)
+                return
+            stream.write_all_async(chunk, io_priority, cancellable, write_next)
+
+        write_next()
+
+    def do_write_mime_type_finish(self, result):
+        return result.propagate_boolean()
@@ -0,0 +1,318 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""gtk4ipc.py - DBus service of the GTK4 application
+
+The GTK4 application exports remotinator's calls with Gio, under the bus
+name, object path and interface name the GTK3 service in ipc.py uses, so
+the same clients work with either. Terminals are named by 'urn:uuid:'
+followed by their uuid, and are found by their plain uuid as well.
+
+Layouts given to create_layout_tree are window trees, as
+TerminatorGtk4Window.describe_layout() returns them and as the GTK4
+application keeps them in the config.
+"""
+
+import os
+import json
+
+from gi.repository import Gio, GLib, Gdk
+
+from .config import Config
+from .terminator import Terminator
+from .util import dbg, err
+from . import metrics
+from .remote_client import BUS_BASE, BUS_PATH, BUS_NAME_ENV, bus_name
+
+# DBus error for calls that cannot be carried out
+ERROR = 'org.freedesktop.DBus.Error.Failed'
+
+INTERFACE = '''<node>
+  <interface name="%s">
+    <method name="new_window"><arg type="s" direction="out"/></method>
+    <method name="new_tab">
+      <arg type="s" direction="in"/><arg type="s" direction="out"/>
+    </method>
+    <method name="hsplit">
+      <arg type="s" direction="in"/><arg type="a{ss}" direction="in"/>
+      <arg type="s" direction="out"/>
+    </method>
+    <method name="vsplit">
+      <arg type="s" direction="in"/><arg type="a{ss}" direction="in"/>
+      <arg type="s" direction="out"/>
+    </method>
+    <method name="get_terminals"><arg type="as" direction="out"/></method>
+    <method name="get_focused_terminal"><arg type="s" direction="out"/></method>
+    <method name="describe_terminals">
+      <arg type="aa{ss}" direction="out"/>
+    </method>
+    <method name="create_layout_tree">
+      <arg type="s" direction="in"/><arg type="as" direction="out"/>
+    </method>
+    <method name="run_commands">
+      <arg type="as" direction="in"/><arg type="s" direction="in"/>
+      <arg type="as" direction="out"/>
+    </method>
+    <method name="get_metrics"><arg type="s" direction="out"/></method>
+    <method name="set_metrics_enabled"><arg type="b" direction="in"/></method>
+    <signal name="terminal_created"><arg type="s"/></signal>
+    <signal name="terminal_closed"><arg type="s"/></signal>
+    <signal name="terminal_title_changed">
+      <arg type="s"/><arg type="s"/>
+    </signal>
+    <signal name="terminal_child_exited">
+      <arg type="s"/><arg type="i"/>
+    </signal>
+  </interface>
+</node>'''
+
+# Reply signatures of the methods
+REPLIES = {'new_window': '(s)', 'new_tab': '(s)', 'hsplit': '(s)',
+           'vsplit': '(s)', 'get_terminals': '(as)',
+           'get_focused_terminal': '(s)', 'describe_terminals': '(aa{ss})',
+           'create_layout_tree': '(as)', 'run_commands': '(as)',
+           'get_metrics': '(s)'}
+
+
+class CallError(Exception):
+    """A DBus call cannot be carried out"""
+    pass
+
+
+def urn(terminal):
+    return 'urn:uuid:%s' % terminal.uuid
+
+
+class Gtk4DBusService(object):
+    """Serves remotinator's calls for a TerminatorGtk4App"""
+
+    def __init__(self, app):
+        self.app = app
+        self.terminator = Terminator()
+        try:
+            display = Gdk.Display.get_default()
+            self.name = bus_name(display.get_name() if display else None)
+        except Exception:
+            self.name = BUS_BASE
+        self.connection = None
+        self.owner_id = None
+        self.registration = None
+        # terminal -> signal ids, for terminals we relay signals from
+        self.watched = {}
+
+    def start(self):
+        """Ask for the bus name. Calls are served once it is ours"""
+        if not Config()['dbus']:
+            dbg('dbus disabled')
+            return
+        # Inherited by the shells of our terminals, for remotinator
+        os.environ[BUS_NAME_ENV] = self.name
+        os.environ['TERMINATOR_DBUS_PATH'] = BUS_PATH
+        self.owner_id = Gio.bus_own_name(
+            Gio.BusType.SESSION, self.name, Gio.BusNameOwnerFlags.NONE,
+            self._on_bus_acquired, None, self._on_name_lost)
+
+    def stop(self):
+        if self.owner_id is not None:
+            Gio.bus_unown_name(self.owner_id)
+            self.owner_id = None
+        if self.registration is not None:
+            self.connection.unregister_object(self.registration)
+            self.registration = None
+        self.terminator.disconnect_terminal_event('terminal-added',
+                                                  self.on_terminal_added)
+        self.terminator.disconnect_terminal_event('terminal-removed',
+                                                  self.on_terminal_removed)
+        for terminal in list(self.watched):
+            self.unwatch_terminal(terminal)
+
+    def _on_bus_acquired(self, connection, name):
+        self.connection = connection
+        info = Gio.DBusNodeInfo.new_for_xml(INTERFACE % self.name)
+        try:
+            self.registration = connection.register_object(
+                BUS_PATH, info.interfaces[0], self._on_call, None, None)
+        except GLib.Error as ex:
+            err('Unable to export the DBus interface: %s' % ex)
+            return
+        self.terminator.connect_terminal_event('terminal-added',
+                                               self.on_terminal_added)
+        self.terminator.connect_terminal_event('terminal-removed',
+                                               self.on_terminal_removed)
+        for terminal in self.terminator.terminals:
+            self.watch_terminal(terminal)
+        dbg('DBus service exported as %s' % name)
+
+    def _on_name_lost(self, _connection, name):
+        dbg('bus name unavailable: %s' % name)
+        if os.environ.get(BUS_NAME_ENV) == name:
+            del os.environ[BUS_NAME_ENV]
+
+    def _on_call(self, _connection, _sender, _path, _interface, method,
+                 parameters, invocation):
+        try:
+            result = getattr(self, method)(*parameters.unpack())
+        except CallError as ex:
+            invocation.return_dbus_error(ERROR, str(ex))
+            return
+        except Exception as ex:
+            err('DBus call %s failed: %s' % (method, ex))
+            invocation.return_dbus_error(ERROR, str(ex))
+            return
+        signature = REPLIES.get(method)
+        if signature is None:
+            invocation.return_value(None)
+        else:
+            invocation.return_value(GLib.Variant(signature, (result,)))
+
+    def emit(self, signal, signature, *args):
+        if self.connection is None:
+            return
+        try:
+            self.connection.emit_signal(None, BUS_PATH, self.name, signal,
+                                        GLib.Variant(signature, args))
+        except GLib.Error as ex:
+            dbg('emitting %s failed: %s' % (signal, ex))
+
+    # Terminal events
+
+    def watch_terminal(self, terminal):
+        """Relay title changes and child exits of a terminal as signals"""
+        if terminal in self.watched:
+            return
+        name = urn(terminal)
+        self.watched[terminal] = [
+            terminal.connect('window-title-changed', lambda t:
+                self.emit('terminal_title_changed', '(ss)', name,
+                          t.get_window_title() or '')),
+            terminal.connect('child-exited', lambda _t, status:
+                self.emit('terminal_child_exited', '(si)', name, status))]
+
+    def unwatch_terminal(self, terminal):
+        for sigid in self.watched.pop(terminal, []):
+            try:
+                terminal.disconnect(sigid)
+            except Exception:
+                pass
+
+    def on_terminal_added(self, terminal):
+        self.watch_terminal(terminal)
+        self.emit('terminal_created', '(s)', urn(terminal))
+
+    def on_terminal_removed(self, terminal):
+        self.unwatch_terminal(terminal)
+        self.emit('terminal_closed', '(s)', urn(terminal))
+
+    # Helpers
+
+    def find_terminal(self, uuid):
+        uuid = str(uuid)
+        if uuid.startswith('urn:uuid:'):
+            uuid = uuid[len('urn:uuid:'):]
+        for terminal in self.terminator.terminals:
+            if str(terminal.uuid) == uuid:
+                return terminal
+        raise CallError('Terminal with supplied UUID not found')
+
+    def added_since(self, before):
+        """The urn of the one terminal not in before"""
+        added = [x for x in self.get_terminals() if x not in before]
+        if len(added) != 1:
+            raise CallError('Cannot determine the UUID of the added terminal')
+        return added[0]
+
+    def describe_terminal(self, terminal):
+        """Return a dict of the interesting properties of a terminal"""
+        window = terminal.get_root()
+        return {'uuid': urn(terminal),
+                'window': str(getattr(window, 'uuid', '') or ''),
+                'title': terminal.get_window_title() or '',
+                'cwd': terminal.get_cwd() or '',
+                'pid': str(getattr(terminal, 'pid', None) or ''),
+                'group': getattr(terminal, '_group', None) or '',
+                'profile': terminal.get_profile() or ''}
+
+    def _split(self, uuid, options, orientation):
+        terminal = self.find_terminal(uuid)
+        before = set(self.get_terminals())
+        terminal.get_root().split_terminal(terminal, orientation)
+        name = self.added_since(before)
+        sibling = self.find_terminal(name)
+        if options.get('title') and sibling._titlebar is not None:
+            sibling._titlebar.set_title(options['title'])
+        if options.get('execute'):
+            sibling.feed_child((options['execute'] + '\n').encode())
+        return name
+
+    # Methods
+
+    def new_window(self):
+        from .gtk4window import TerminatorGtk4Window
+        before = set(self.get_terminals())
+        TerminatorGtk4Window(application=self.app).present()
+        return self.added_since(before)
+
+    def new_tab(self, uuid):
+        terminal = self.find_terminal(uuid)
+        before = set(self.get_terminals())
+        terminal.get_root().open_new_tab()
+        return self.added_since(before)
+
+    def hsplit(self, uuid, options):
+        from gi.repository import Gtk
+        return self._split(uuid, options, Gtk.Orientation.HORIZONTAL)
+
+    def vsplit(self, uuid, options):
+        from gi.repository import Gtk
+        return self._split(uuid, options, Gtk.Orientation.VERTICAL)
+
+    def get_terminals(self):
+        return [urn(x) for x in self.terminator.terminals]
+
+    def get_focused_terminal(self):
+        window = self.app.get_active_window()
+        terminal = None
+        if window is not None and hasattr(window, '_get_focused_terminal'):
+            terminal = window._get_focused_terminal()
+        return urn(terminal) if terminal is not None else ''
+
+    def describe_terminals(self):
+        return [self.describe_terminal(x) for x in self.terminator.terminals]
+
+    def create_layout_tree(self, layoutjson):
+        """Open a window with a layout given as json, either a window tree
+        or a document with one under 'layout'"""
+        from .gtk4window import TerminatorGtk4Window
+        try:
+            layout = json.loads(layoutjson)
+        except ValueError as ex:
+            raise CallError('Invalid layout json: %s' % ex)
+        if isinstance(layout, dict) and 'children' not in layout:
+            layout = layout.get('layout')
+        if not isinstance(layout, dict) or not layout.get('children'):
+            raise CallError('Layout json did not describe a layout')
+        before = set(self.get_terminals())
+        window = TerminatorGtk4Window(application=self.app)
+        window._apply_layout(layout)
+        window.present()
+        return [x for x in self.get_terminals() if x not in before]
+
+    def run_commands(self, uuids, command):
+        """Run command in every listed terminal. Returns the uuids that
+        could not be found"""
+        missing = []
+        if not command.endswith('\n'):
+            command += '\n'
+        for uuid in uuids:
+            try:
+                terminal = self.find_terminal(uuid)
+            except CallError:
+                missing.append(uuid)
+                continue
+            terminal.feed_child(command.encode())
+        return missing
+
+    def get_metrics(self):
+        return json.dumps(metrics.snapshot(), sort_keys=True)
+
+    def set_metrics_enabled(self, enabled):
+        metrics.enable(enabled)
@@ -0,0 +1,159 @@
+"""Chunked, paced paste for GTK4 terminals.
+
+Clipboard contents are read asynchronously. Large pastes are then handed
+to VTE in chunks via Vte.Terminal.paste_text, which applies bracketed
+paste and control-character filtering just like a native paste. The next
+chunk is only written once the PTY reports itself writable again, and the
+writes are scheduled at idle priority so the UI stays responsive. Progress
+is shown on the terminal's titlebar, where the paste can also be
+cancelled.
+"""
+
+import gi
+gi.require_version('Gtk', '4.0')
+from gi.repository import GLib
+
+from .util import dbg
+
+# Pastes up to this many characters go to VTE in one piece
+SMALL_PASTE = 65536
+CHUNK_CHARS = 16384
+
+
+class Gtk4PasteJob:
+    """Feed text into one terminal chunk by chunk"""
+
+    def __init__(self, terminal, text, on_done=None):
+        self.terminal = terminal
+        self.text = text
+        self.offset = 0
+        self.cancelled = False
+        self.finished = False
+        self._on_done = on_done
+        self._source = None
+
+    @property
+    def progress(self):
+        if not self.text:
+            return 1.0
+        return min(1.0, self.offset / float(len(self.text)))
+
+    def extend(self, text):
+        """Queue more text behind what is still pending"""
+        self.text = self.text[self.offset:] + text
+        self.offset = 0
+
+    def start(self):
+        self._show_progress()
+        self._wait()
+
+    def cancel(self):
+        if self.finished:
+            return
+        self.cancelled = True
+        dbg('paste cancelled after %d of %d chars' % (self.offset, len(self.text)))
+        if self._source is not None:
+            try:
+                GLib.source_remove(self._source)
+            except Exception:
+                pass
+            self._source = None
+        self._finish()
+
+    def _pty_fd(self):
+        try:
+            pty = self.terminal.get_pty()
+            return pty.get_fd() if pty is not None else -1
+        except Exception:
+            return -1
+
+    def _wait(self):
+        # Pace on PTY writability; fall back to plain idle callbacks
+        fd = self._pty_fd()
+        if fd >= 0:
+            try:
+                self._source = GLib.io_add_watch(fd, GLib.PRIORITY_DEFAULT_IDLE,
+                                                 GLib.IOCondition.OUT, self._step)
+                return
+            except Exception:
+                pass
+        self._source = GLib.idle_add(self._step)
+
+    def _step(self, *args):
+        self._source = None
+        if self.cancelled:
+            return False
+        chunk = self.text[self.offset:self.offset + CHUNK_CHARS]
+        try:
+            self.terminal.paste_text(chunk)
+        except Exception:
+            self.cancel()
+            return False
+        self.offset += len(chunk)
+        if self.offset >= len(self.text):
+            self._finish()
+        else:
+            self._show_progress()
+            self._wait()
+        return False
+
+    def _show_progress(self):
+        tb = getattr(self.terminal, '_titlebar', None)
+        if tb is not None and hasattr(tb, 'set_paste_progress'):
+            try:
+                tb.set_paste_progress(self.progress)
+            except Exception:
+                pass
+
+    def _finish(self):
+        self.finished = True
+        tb = getattr(self.terminal, '_titlebar', None)
+        if tb is not None and hasattr(tb, 'set_paste_progress'):
+            try:
+                tb.set_paste_progress(None)
+            except Exception:
+                pass
+        if self._on_done is not None:
+            try:
+                self._on_done(self)
+            except Exception:
+                pass
+
+
+def paste_from_clipboard(terminal, clipboard, fallback):
+    """Read clipboard text asynchronously and paste it into terminal.
+    fallback() performs VTE's native paste when chunking is not possible."""
+    if not hasattr(terminal, 'paste_text') or clipboard is None:
+        fallback()
+        return
+
+    def on_text(cb, result):
+        try:
+            text = cb.read_text_finish(result)
+        except Exception:
+            text = None
+        if not text:
+            return
+        job = getattr(terminal, '_paste_job', None)
+        if job is not None and not job.finished:
+            job.extend(text)
+            return
+        if len(text) <= SMALL_PASTE:
+            try:
+                terminal.paste_text(text)
+            except Exception:
+                pass
+            return
+
+        def on_done(done):
+            if getattr(terminal, '_paste_job', None) is done:
+                terminal._paste_job = None
+        dbg('chunked paste of %d chars' % len(text))
+        job = Gtk4PasteJob(terminal, text, on_done)
+        terminal._paste_job = job
+        job.start()
+
+    try:
+        clipboard.read_text_async(None, on_text)
+    except Exception:
+        fallback()
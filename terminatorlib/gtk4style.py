@@ -0,0 +1,137 @@
+"""Display-wide CSS for GTK4 terminal titlebars.
+
+All windows share one Gtk.CssProvider. Its stylesheet carries the titlebar
+colours and font for every profile, keyed by a
+`terminator-profile-<name>-<hash>` class on each titlebar, and is only
+regenerated when the inputs it was built from change. Restyling after a preferences change is therefore one
+provider reload, however many panes are open.
+"""
+
+import hashlib
+import gi
+gi.require_version('Gtk', '4.0')
+from gi.repository import Gtk, Gdk
+
+from .borg import Borg
+from .util import dbg
+
+TITLE_KEYS = ('title_transmit_fg_color', 'title_transmit_bg_color',
+              'title_receive_fg_color', 'title_receive_bg_color',
+              'title_inactive_fg_color', 'title_inactive_bg_color',
+              'title_use_system_font', 'title_font')
+
+
+def profile_css_class(profile):
+    """Return the CSS class that selects titlebars of a profile. Names that
+    differ only in punctuation get different classes
+
+    >>> profile_css_class('a b') == profile_css_class('a-b')
+    False
+    >>> profile_css_class('a b').startswith('terminator-profile-a-b-')
+    True
+    """
+    name = str(profile)
+    digest = hashlib.md5(name.encode('utf-8')).hexdigest()[:8]
+    return 'terminator-profile-%s-%s' % (''.join(
+        [c if c.isalnum() else '-' for c in name]), digest)
+
+
+def scale_hex(col, factor):
+    """Scale an #rrggbb colour by factor, clamping each channel
+
+    >>> scale_hex('#c80003', 0.5)
+    '#640001'
+    >>> scale_hex('red', 0.5)
+    'red'
+    """
+    h = str(col).lstrip('#')
+    if len(h) != 6:
+        return col
+    try:
+        rgb = [int(h[i:i + 2], 16) for i in (0, 2, 4)]
+    except ValueError:
+        return col
+    return '#' + ''.join(['%02x' % max(0, min(255, int(c * factor))) for c in rgb])
+
+
+def titlebar_rules(selector, prof, off_fg, off_bg):
+    """Return the CSS rules for one profile's titlebars"""
+    def pick(key, fallback):
+        value = str(prof.get(key) or '').strip()
+        return value or fallback
+
+    tx_fg = pick('title_transmit_fg_color', '#ffffff')
+    tx_bg = pick('title_transmit_bg_color', '#c80003')
+    rx_fg = pick('title_receive_fg_color', '#ffffff')
+    rx_bg = pick('title_receive_bg_color', '#0076c9')
+    # Derive inactive colors if not set, using global offsets
+    in_fg = pick('title_inactive_fg_color', '') or scale_hex(tx_fg, off_fg)
+    in_bg = pick('title_inactive_bg_color', '') or scale_hex(tx_bg, off_bg)
+    rules = ['%s.tx { background-color: %s; color: %s; }' % (selector, tx_bg, tx_fg),
+             '%s.rx { background-color: %s; color: %s; }' % (selector, rx_bg, rx_fg),
+             '%s.inactive { background-color: %s; color: %s; }' % (selector, in_bg, in_fg)]
+    font = pick('title_font', 'Sans 9')
+    if not bool(prof.get('title_use_system_font', True)) and font:
+        # Apply font to the titlebar area; labels inherit
+        rules.append('%s { font: %s; }' % (selector, font))
+    return rules
+
+
+class TitlebarStyle(Borg):
+    """Shared titlebar stylesheet, installed once per display"""
+    provider = None
+    displays = None
+    key = None
+    generation = None
+
+    def __init__(self):
+        Borg.__init__(self, self.__class__.__name__)
+        self.prepare_attributes()
+
+    def prepare_attributes(self):
+        if not self.provider:
+            self.provider = Gtk.CssProvider()
+        if not self.displays:
+            self.displays = []
+        if not self.generation:
+            self.generation = 0
+
+    def attach(self, display=None):
+        """Make sure the shared provider is installed on a display"""
+        if display is None:
+            display = Gdk.Display.get_default()
+        if display is None or display in self.displays:
+            return
+        Gtk.StyleContext.add_provider_for_display(
+            display, self.provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+        self.displays.append(display)
+
+    def refresh(self, config=None):
+        """Regenerate the stylesheet if its inputs changed. Returns True if
+        the provider was reloaded."""
+        if config is None:
+            from .config import Config
+            config = Config()
+        try:
+            off_fg = float(config['inactive_color_offset']) or 0.8
+            off_bg = float(config['inactive_bg_color_offset']) or 1.0
+        except Exception:
+            off_fg, off_bg = 0.8, 1.0
+        profiles = config.base.profiles
+        current = config.get_profile()
+        key = (current, off_fg, off_bg,
+               tuple([(name, tuple([profiles[name].get(k) for k in TITLE_KEYS]))
+                      for name in sorted(profiles)]))
+        if key == self.key:
+            return False
+        # Bare .term-titlebar follows the current profile, matching the
+        # single-profile behaviour titlebars had before per-profile classes
+        css = titlebar_rules('.term-titlebar', profiles.get(current, {}), off_fg, off_bg)
+        for name in sorted(profiles):
+            css.extend(titlebar_rules('.term-titlebar.%s' % profile_css_class(name),
+                                      profiles[name], off_fg, off_bg))
+        self.provider.load_from_data('\n'.join(css).encode('utf-8'))
+        self.key = key
+        self.generation += 1
+        dbg('titlebar stylesheet regenerated (generation %d)' % self.generation)
+        return True
@@ -1,6 +1,7 @@
 """Minimal GTK4 Vte terminal wrapper."""
 
 import os
+import time
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Vte', '3.91')
@@ -9,6 +10,12 @@ from .translation import _
 from gi.repository import Pango
 from gi.repository import Pango
 from .config import Config
+from .resize_coalescer import ResizeCoalescer
+from .util import dbg
+from . import metrics
+from . import scrollback
+
+metrics.add_source('resize.suppressed', lambda: ResizeCoalescer.suppressed_total)
 
 
 def _find_user_shell() -> str:
@@ -27,27 +34,50 @@ def _find_user_shell() -> str:
 
 
 class Gtk4Terminal(Vte.Terminal):
-    def __init__(self):
+    def __init__(self, uuid: str | None = None):
         super().__init__()
-        # Assign a uuid for layout serialization and grouping
-        try:
-            import uuid as _uuid
-            self.uuid = str(_uuid.uuid4())
-        except Exception:
-            self.uuid = None
+        # Assign a uuid for layout serialization and grouping. Terminals
+        # restored from a layout keep the uuid they were saved with
+        if uuid:
+            self.uuid = str(uuid)
+        else:
+            try:
+                import uuid as _uuid
+                self.uuid = str(_uuid.uuid4())
+            except Exception:
+                self.uuid = None
         # Map of plugin handler names to VTE match tag ids
         self._plugin_match_tags = {}
         # Reverse map from tag id to handler instance for transformation
         self._plugin_tag_handlers = {}
         # Per-terminal config (shares base via Borg, but profile is per-instance)
         self.config = Config()
+        # Options read by event handlers, kept current by a subscription
+        self._config_watch = self.config.subscribe(
+            ('focus', 'disable_mouse_paste', 'invert_search',
+             'use_custom_url_handler', 'custom_url_handler'),
+            self._on_config_changed)
+        self._on_config_changed(self.config.snapshot())
+        # Scrollback is set by apply_profile(), within the global budget
+        scrollback.governor().add(self, self.uuid, -1)
+        # Streams scrollback to disk when the profile asks for an archive
+        self._archiver = None
+        # Records output to an asciicast file while set
+        self._recorder = None
         self.set_scroll_on_output(False)
         self.set_scroll_on_keystroke(True)
         # Reasonable defaults; broader settings migration will come later
         self.set_allow_hyperlink(True)
         self.set_mouse_autohide(True)
         self._scroller = None
+        self._titlebar = None
+        # Process id of the child, once it has been spawned
+        self.pid = None
+        self._paste_job = None
         self._font_scale = 1.0
+        # Rate limits grid (and so PTY) resizes during drags and window resizes
+        self._resize = ResizeCoalescer(schedule=self._schedule_resize_commit)
+        self._allocated = None
         self._install_context_menu()
         self._install_url_handling()
         self._copy_on_sel_handler = None
@@ -56,6 +86,21 @@ class Gtk4Terminal(Vte.Terminal):
             self.connect('window-title-changed', self._on_window_title_changed)
         except Exception:
             pass
+        try:
+            self.connect('bell', self._on_bell)
+        except Exception:
+            pass
+        # Bumped on every selection change so lazy clipboard content can tell
+        # whether the selection it was copied from is still current
+        self._selection_serial = 0
+        try:
+            self.connect('selection-changed', self._on_selection_serial)
+        except Exception:
+            pass
+        # Output accounting is only wired up while metrics are being collected
+        self._metrics_watch = None
+        metrics.listen(self._set_metrics)
+        self._set_metrics(metrics.ENABLED)
 
     # Compatibility hook for GTK3-era plugins that call terminal.emit('insert-term-name')
     def emit(self, detailed_signal, *args):  # type: ignore[override]
@@ -77,10 +122,6 @@ class Gtk4Terminal(Vte.Terminal):
             self.connect('icon-title-changed', self._on_window_title_changed)
         except Exception:
             pass
-        try:
-            self.connect('bell', self._on_bell)
-        except Exception:
-            pass
         # Search state
         self._search_last_kind = None  # 'vte' | 'glib'
         self._search_is_regex = False
@@ -265,11 +306,7 @@ class Gtk4Terminal(Vte.Terminal):
             except Exception:
                 pass
             if not sloppy:
-                try:
-                    if self.config['focus'] in ['sloppy', 'mouse']:
-                        sloppy = True
-                except Exception:
-                    pass
+                sloppy = self._focus in ['sloppy', 'mouse']
             if sloppy:
                 self.grab_focus()
         except Exception:
@@ -284,16 +321,11 @@ class Gtk4Terminal(Vte.Terminal):
             except Exception:
                 pass
             def on_mid_pressed(gesture, n_press, x, y):
-                try:
-                    from .config import Config as _Cfg
-                    if bool(_Cfg()['disable_mouse_paste']):
-                        try:
-                            gesture.set_state(Gtk.EventSequenceState.CLAIMED)
-                        except Exception:
-                            pass
-                        return
-                except Exception:
-                    pass
+                if self._disable_mouse_paste:
+                    try:
+                        gesture.set_state(Gtk.EventSequenceState.CLAIMED)
+                    except Exception:
+                        pass
             mid.connect('pressed', on_mid_pressed)
             self.add_controller(mid)
         except Exception:
@@ -330,8 +362,9 @@ class Gtk4Terminal(Vte.Terminal):
                     # If this match came from a plugin handler, transform using its callback
                     if tag is not None and tag in getattr(self, '_plugin_tag_handlers', {}):
                         try:
+                            from .plugin import PluginRegistry
                             handler = self._plugin_tag_handlers.get(tag)
-                            final = handler.callback(s)
+                            final = PluginRegistry().call(handler, handler.callback, s)
                             if isinstance(final, str) and final:
                                 return final
                         except Exception:
@@ -436,9 +469,12 @@ class Gtk4Terminal(Vte.Terminal):
                 env['PWD'] = cwd
         except Exception:
             pass
+        env['TERMINATOR_UUID'] = 'urn:uuid:%s' % self.uuid
         envv = [f"{k}={v}" for k, v in env.items()]
+        started = metrics.start()
 
         def _on_spawned(*cb_args):
+            metrics.finish('terminal.spawn', started)
             try:
                 # New VTE GTK4 callback typically provides (term, pid, error, user_data)
                 if len(cb_args) >= 3:
@@ -449,6 +485,7 @@ class Gtk4Terminal(Vte.Terminal):
                         print(f"Failed to spawn shell: {err}")
                         return
                 # If no error, consider spawn successful
+                self._set_child_pid(cb_args)
             except Exception as ex:
                 print(f"Failed to spawn shell: {ex}")
 
@@ -481,15 +518,16 @@ class Gtk4Terminal(Vte.Terminal):
         except Exception:
             return ''
 
+    def _on_config_changed(self, snapshot, _keys=None):
+        self._focus = snapshot.focus
+        self._disable_mouse_paste = bool(snapshot.disable_mouse_paste)
+        self._invert_search = bool(snapshot.invert_search)
+        self._use_custom_url_handler = bool(snapshot.use_custom_url_handler)
+        self._custom_url_handler = str(snapshot.custom_url_handler or '').strip()
+
     def open_url(self, url: str):
-        try:
-            from .config import Config as _Cfg
-            cfg = _Cfg()
-            use_custom = bool(cfg['use_custom_url_handler'])
-            cmd = str(cfg['custom_url_handler'] or '').strip()
-        except Exception:
-            use_custom = False
-            cmd = ''
+        use_custom = self._use_custom_url_handler
+        cmd = self._custom_url_handler
         if use_custom and cmd:
             try:
                 # Support %s placeholder; else append url
@@ -618,15 +656,20 @@ class Gtk4Terminal(Vte.Terminal):
         if not argv or not isinstance(argv, (list, tuple)):
             return self.spawn_login_shell(cwd)
         pty_flags = Vte.PtyFlags.DEFAULT
-        envv = [f"{k}={v}" for k, v in (env or os.environ).items()]
+        env = dict(env or os.environ)
+        env['TERMINATOR_UUID'] = 'urn:uuid:%s' % self.uuid
+        envv = [f"{k}={v}" for k, v in env.items()]
+        started = metrics.start()
 
         def _on_spawned(*cb_args):
+            metrics.finish('terminal.spawn', started)
             try:
                 if len(cb_args) >= 3:
                     err = cb_args[2]
                     if err:
                         print(f"Failed to spawn command: {err}")
                         return
+                self._set_child_pid(cb_args)
             except Exception as ex:
                 print(f"Failed to spawn command: {ex}")
 
@@ -644,9 +687,70 @@ class Gtk4Terminal(Vte.Terminal):
             None,
         )
 
+    def _set_child_pid(self, cb_args):
+        # spawn_async callbacks get (terminal, pid, error, ...)
+        if len(cb_args) >= 2 and isinstance(cb_args[1], int) and cb_args[1] > 0:
+            self.pid = cb_args[1]
+
     def set_scroller(self, scroller: Gtk.ScrolledWindow):
         self._scroller = scroller
 
+    # Pastes are read asynchronously and fed in paced chunks (see gtk4paste)
+    def paste_clipboard(self):  # type: ignore[override]
+        from .gtk4paste import paste_from_clipboard
+        paste_from_clipboard(self, self.get_clipboard(),
+                             lambda: Vte.Terminal.paste_clipboard(self))
+
+    def paste_primary(self):  # type: ignore[override]
+        from .gtk4paste import paste_from_clipboard
+        paste_from_clipboard(self, self.get_primary_clipboard(),
+                             lambda: Vte.Terminal.paste_primary(self))
+
+    def cancel_paste(self):
+        if self._paste_job is not None:
+            self._paste_job.cancel()
+
+    def release(self):
+        """Let go of what the terminal holds outside itself, once it is
+        closed. Each step runs even if another fails"""
+        for step in (self.cancel_paste, self._release_scrollback,
+                     self.close_archive, self.stop_recording,
+                     self._release_metrics):
+            try:
+                step()
+            except Exception as ex:
+                dbg('releasing %s: %s failed: %s' % (self.uuid, step.__name__, ex))
+
+    def _release_scrollback(self):
+        scrollback.governor().remove(self)
+
+    def do_size_allocate(self, width, height, baseline):  # type: ignore[override]
+        # Keep the grid at its last committed size while the allocation is
+        # changing quickly, so the child is not sent a SIGWINCH per pixel
+        try:
+            if (width, height) != self._allocated:
+                self._allocated = (width, height)
+                # Pane geometry changed; directional navigation must re-read it
+                root = self.get_root()
+                if hasattr(root, '_invalidate_pane_graph'):
+                    root._invalidate_pane_graph()
+            cell = (self.get_char_width(), self.get_char_height())
+            width, height = self._resize.filter(width, height, cell)
+        except Exception:
+            pass
+        Vte.Terminal.do_size_allocate(self, width, height, baseline)
+
+    def _schedule_resize_commit(self, delay_ms):
+        def _commit():
+            try:
+                dbg('committing resize after %d suppressed' % self._resize.suppressed)
+                self._resize.fired()
+                self.queue_allocate()
+            except Exception:
+                pass
+            return False
+        GLib.timeout_add(delay_ms, _commit)
+
     # Context menu (right-click) using GtkPopoverMenu
     def _install_context_menu(self):
         from gi.repository import Gdk
@@ -786,7 +890,8 @@ class Gtk4Terminal(Vte.Terminal):
                 self._rclick_xy = (float(x), float(y))
             except Exception:
                 self._rclick_xy = (0.0, 0.0)
-            self._build_menu_model()
+            with metrics.timed('menu.build'):
+                self._build_menu_model()
             # Position popover at click point
             rect = Gdk.Rectangle()
             rect.x = int(x)
@@ -925,6 +1030,22 @@ class Gtk4Terminal(Vte.Terminal):
         add_simple('groupsend_off', lambda *a: win_call('_set_groupsend') and win_call('_set_groupsend')('off'))
         add_simple('groupsend_group', lambda *a: win_call('_set_groupsend') and win_call('_set_groupsend')('group'))
         add_simple('groupsend_all', lambda *a: win_call('_set_groupsend') and win_call('_set_groupsend')('all'))
+        # Scrollback archive actions
+        add_simple('archive_export', lambda *a: self._export_archive())
+        a_pin = self._action_group.lookup_action('archive_pin')
+        if a_pin is None:
+            a_pin = Gio.SimpleAction.new_stateful('archive_pin', None, GLib.Variant('b', False))
+            a_pin.connect('change-state', self._on_archive_pin)
+            self._action_group.add_action(a_pin)
+        if self._archiver is not None:
+            a_pin.set_state(GLib.Variant('b', self._archiver.archive.pinned))
+        # Recording action
+        a_rec = self._action_group.lookup_action('record')
+        if a_rec is None:
+            a_rec = Gio.SimpleAction.new_stateful('record', None, GLib.Variant('b', False))
+            a_rec.connect('change-state', self._on_record)
+            self._action_group.add_action(a_rec)
+        a_rec.set_state(GLib.Variant('b', self._recorder is not None))
         # profile/layout actions
         if self._action_group.lookup_action('profile') is None:
             # Stateful string action so menu shows radio items for profiles
@@ -1127,7 +1248,7 @@ class Gtk4Terminal(Vte.Terminal):
             from .plugin import PluginRegistry
             import re as _re
             reg = PluginRegistry()
-            reg.load_plugins(force=True, capabilities_filter={'url_handler'})
+            reg.load_plugins(capabilities_filter={'url_handler'})
             handlers = reg.get_plugins_by_capability('url_handler')
         except Exception:
             handlers = []
@@ -1141,7 +1262,7 @@ class Gtk4Terminal(Vte.Terminal):
                     continue
                 matched = m.group(0)
                 try:
-                    final = h.callback(matched)
+                    final = reg.call(h, h.callback, matched)
                 except Exception:
                     final = matched
                 open_label = getattr(h, 'nameopen', 'Open Link')
@@ -1156,7 +1277,7 @@ class Gtk4Terminal(Vte.Terminal):
         try:
             from .plugin import PluginRegistry
             reg = PluginRegistry()
-            reg.load_plugins(force=True, capabilities_filter={'url_handler'})
+            reg.load_plugins(capabilities_filter={'url_handler'})
             handlers = reg.get_plugins_by_capability('url_handler')
         except Exception:
             handlers = []
@@ -1287,6 +1408,7 @@ class Gtk4Terminal(Vte.Terminal):
 
     def _on_window_title_changed(self, *args):
         # Propagate updated title to window/tab label and titlebar
+        metrics.inc('terminal.title_updates')
         title = None
         try:
             title = self.get_window_title()
@@ -1301,6 +1423,30 @@ class Gtk4Terminal(Vte.Terminal):
             except Exception:
                 pass
 
+    def _on_selection_serial(self, *args):
+        self._selection_serial += 1
+
+    def _set_metrics(self, enabled):
+        if enabled and self._metrics_watch is None:
+            from .plugin import ContentsWatch
+            self._metrics_watch = ContentsWatch().watch(
+                None, self, self._on_contents_metrics)
+        elif not enabled and self._metrics_watch is not None:
+            self._metrics_watch.cancel()
+            self._metrics_watch = None
+
+    def _release_metrics(self):
+        metrics.unlisten(self._set_metrics)
+        self._set_metrics(False)
+
+    def _on_contents_metrics(self, change):
+        # VTE does not report bytes read from the PTY, so count output
+        # batches and how far the cursor moved down (lines received)
+        metrics.inc('terminal.output_batches', change.signals, label=self.uuid)
+        if change.new_rows:
+            metrics.inc('terminal.lines_received', change.new_rows,
+                        label=self.uuid)
+
     def _on_bell(self, *args):
         win = self.get_root()
         if hasattr(win, '_notify_bell_for_terminal'):
@@ -1432,12 +1578,8 @@ class Gtk4Terminal(Vte.Terminal):
             if keyval == Gdk.KEY_Return:
                 # Shift+Enter searches backwards; allow invert_search preference to flip default
                 backward = bool(state & Gdk.ModifierType.SHIFT_MASK)
-                try:
-                    from .config import Config as _Cfg
-                    if bool(_Cfg()['invert_search']):
-                        backward = not backward
-                except Exception:
-                    pass
+                if self._invert_search:
+                    backward = not backward
                 find_next(not backward)
                 return True
             if keyval == Gdk.KEY_Escape:
@@ -1484,9 +1626,98 @@ class Gtk4Terminal(Vte.Terminal):
         pop.popup()
         entry.grab_focus()
 
+    # Scrollback archive
+    def _set_archiving(self, on):
+        if on and self._archiver is None:
+            from .scrollback_archive import TerminalArchiver
+            try:
+                self._archiver = TerminalArchiver(self, self.uuid or str(id(self)))
+            except (IOError, OSError) as ex:
+                dbg('unable to start scrollback archive: %s' % ex)
+        elif not on and self._archiver is not None:
+            self._archiver.close()
+            self._archiver = None
+
+    def close_archive(self):
+        """Stop archiving scrollback. The archive is deleted unless kept"""
+        self._set_archiving(False)
+
+    def _on_archive_pin(self, action, value):
+        action.set_state(value)
+        if self._archiver is not None:
+            self._archiver.archive.pinned = value.get_boolean()
+
+    def _export_archive(self):
+        if self._archiver is None:
+            return
+        dialog = Gtk.FileDialog(title=_('Export Scrollback'))
+
+        def on_done(dlg, res):
+            try:
+                gfile = dlg.save_finish(res)
+            except GLib.Error:
+                return
+            if gfile is None or self._archiver is None:
+                return
+            try:
+                self._archiver.export(gfile.get_path())
+            except (IOError, OSError) as ex:
+                dbg('unable to export scrollback: %s' % ex)
+        dialog.save(self.get_root(), None, on_done)
+
+    # Recording
+    def start_recording(self, path):
+        """Record output to the asciicast file at path"""
+        from .asciicast import TerminalRecorder
+        self.stop_recording()
+        try:
+            self._recorder = TerminalRecorder(self, path)
+        except (IOError, OSError) as ex:
+            dbg('unable to record to %s: %s' % (path, ex))
+
+    def stop_recording(self):
+        if self._recorder is not None:
+            self._recorder.stop()
+            self._recorder = None
+
+    def _on_record(self, action, value):
+        if not value.get_boolean():
+            self.stop_recording()
+            action.set_state(value)
+            return
+        dialog = Gtk.FileDialog(title=_('Record Terminal'))
+        dialog.set_initial_name(time.strftime('terminator-%Y%m%d-%H%M%S.cast'))
+
+        def on_done(dlg, res):
+            try:
+                gfile = dlg.save_finish(res)
+            except GLib.Error:
+                return
+            if gfile is None:
+                return
+            self.start_recording(gfile.get_path())
+            action.set_state(GLib.Variant('b', self._recorder is not None))
+        dialog.save(self.get_root(), None, on_done)
+
     # Profile application (colors, font, scrollback, cursor)
     def apply_profile(self):
+        with metrics.timed('terminal.apply_profile'):
+            self._apply_profile()
+
+    def _apply_profile(self):
         cfg = self.config
+        # Profile contents may have changed; re-read bell flags on next bell
+        try:
+            from .gtk4bell import invalidate_bell_flags
+            invalidate_bell_flags(cfg.get_profile())
+        except Exception:
+            pass
+        # Titlebar picks its colors from the shared per-profile stylesheet
+        try:
+            if self._titlebar is not None:
+                self._titlebar.set_profile_class(cfg.get_profile())
+        except Exception:
+            pass
         try:
             prof = cfg.get_profile_by_name(cfg.get_profile())
         except Exception:
@@ -1547,10 +1778,18 @@ class Gtk4Terminal(Vte.Terminal):
 
         # Scrollback
         try:
-            if prof.get('scrollback_infinite', False):
-                self.set_scrollback_lines(-1)
+            infinite = bool(prof.get('scrollback_infinite', False))
+            archive = infinite and bool(prof.get('scrollback_archive', False))
+            if infinite and not archive:
+                lines = -1
             else:
-                self.set_scrollback_lines(int(prof.get('scrollback_lines', 500)))
+                # An archive keeps the history, VTE only the recent part
+                lines = int(prof.get('scrollback_lines', 500))
+                if archive:
+                    from .scrollback_archive import HEADROOM
+                    lines += HEADROOM
+            self.set_scrollback_lines(scrollback.governor().request(self, lines))
+            self._set_archiving(archive)
         except Exception:
             pass
 
@@ -1790,79 +2029,34 @@ class Gtk4Terminal(Vte.Terminal):
 
     # Copy selection as HTML to clipboard when available
     def copy_selection_as_html(self):
-        def _escape_html(s: str) -> str:
-            return (
-                s.replace('&', '&amp;')
-                 .replace('<', '&lt;')
-                 .replace('>', '&gt;')
-            )
-
-        try:
-            # Preferred: direct HTML from VTE if available
-            html = None
-            plain = None
-            if hasattr(self, 'get_text_selected_format'):
-                result = self.get_text_selected_format(Vte.Format.HTML)
-                if isinstance(result, (list, tuple)) and result and result[0]:
-                    html = result[0]
-            # Also capture plain text selection
+        try:
+            # Plain text selection, or the visible screen when nothing is selected
+            text = None
             if hasattr(self, 'get_text_selected'):
                 sel = self.get_text_selected()
                 if isinstance(sel, (list, tuple)) and sel and sel[0]:
-                    plain = sel[0]
-            # Fallback: build minimal HTML from selected text or visible screen
+                    text = sel[0]
             rows = int(getattr(self, 'get_row_count')()) if hasattr(self, 'get_row_count') else 0
             cols = int(getattr(self, 'get_column_count')()) if hasattr(self, 'get_column_count') else 0
-            text = plain
             if not text and hasattr(self, 'get_text_range') and rows > 0 and cols > 0:
                 rng = self.get_text_range(0, 0, rows - 1, cols - 1)
                 if isinstance(rng, (list, tuple)) and rng and rng[0]:
                     text = rng[0]
-            if text and not html:
-                html = '<pre class="vte-copy">' + _escape_html(text) + '</pre>'
-            if html is not None:
+            if text:
                 disp = self.get_display()
                 if disp is not None:
                     try:
-                        # Provide both text/html and text/plain to both clipboard and primary
-                        from gi.repository import Gdk, GLib
-                        providers = []
-                        # HTML variants
+                        # HTML and plain text variants are produced on demand
+                        # from one shared buffer; see gtk4clipboard
+                        from .gtk4clipboard import SelectionContentProvider
+                        provider = SelectionContentProvider(self, text)
+                        # Regular clipboard
+                        disp.get_clipboard().set_content(provider)
+                        # Primary selection, when supported
                         try:
-                            data = GLib.Bytes.new(html.encode('utf-8'))
-                            providers.append(Gdk.ContentProvider.new_for_bytes('text/html', data))
+                            disp.get_primary_clipboard().set_content(provider)
                         except Exception:
                             pass
-                        try:
-                            data2 = GLib.Bytes.new(html.encode('utf-8'))
-                            providers.append(Gdk.ContentProvider.new_for_bytes('text/html;charset=utf-8', data2))
-                        except Exception:
-                            pass
-                        # Plain text variants
-                        if text:
-                            try:
-                                providers.append(Gdk.ContentProvider.new_for_bytes('text/plain', GLib.Bytes.new(text.encode('utf-8'))))
-                            except Exception:
-                                pass
-                            try:
-                                providers.append(Gdk.ContentProvider.new_for_bytes('text/plain;charset=utf-8', GLib.Bytes.new(text.encode('utf-8'))))
-                            except Exception:
-                                pass
-                        if providers:
-                            union = providers[0] if len(providers) == 1 else Gdk.ContentProvider.new_union(providers)
-                            # Regular clipboard
-                            cb = disp.get_clipboard()
-                            cb.set_content(union)
-                            # Primary selection, when supported
-                            try:
-                                prim = disp.get_primary_clipboard()
-                                prim.set_content(union)
-                            except Exception:
-                                pass
-                            return
-                        # Fallback: set HTML as text
-                        cb = disp.get_clipboard()
-                        cb.set_text(html)
                         return
                     except Exception:
                         pass
@@ -6,6 +6,8 @@ Provides minimal controls:
 - Bell icon placeholder (hidden by default).
 """
 
+import weakref
+
 import gi
 gi.require_version('Gtk', '4.0')
 from gi.repository import Gtk, GObject
@@ -20,11 +22,17 @@ class Gtk4Titlebar(Gtk.Box):
         'create-group': (GObject.SignalFlags.RUN_LAST, None, (GObject.TYPE_STRING,)),
     }
 
+    # Live titlebars, so windows can restyle them without walking widget trees
+    _instances = weakref.WeakSet()
+
     def __init__(self, window: Gtk.Window, unit_container: Gtk.Widget):
         super().__init__(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
         self.add_css_class('term-titlebar')
         self._window = window
         self._unit = unit_container
+        self._term = None
+        self._profile_class = None
+        Gtk4Titlebar._instances.add(self)
 
         # Left: broadcast state icon + group button + group name (visual only)
         self._broadcast = Gtk.Image.new_from_icon_name('radio-button-off-symbolic')
@@ -58,6 +66,20 @@ class Gtk4Titlebar(Gtk.Box):
         self._size.add_css_class('dim-label')
         self.append(self._size)
 
+        # Paste progress with a cancel button (hidden unless a long paste runs)
+        self._paste_bar = Gtk.ProgressBar()
+        self._paste_bar.set_valign(Gtk.Align.CENTER)
+        self._paste_bar.set_visible(False)
+        self.append(self._paste_bar)
+        self._paste_cancel = Gtk.Button()
+        self._paste_cancel.set_icon_name('process-stop-symbolic')
+        self._paste_cancel.add_css_class('flat')
+        self._paste_cancel.set_has_frame(False)
+        self._paste_cancel.set_tooltip_text(_('Cancel paste'))
+        self._paste_cancel.set_visible(False)
+        self._paste_cancel.connect('clicked', self._on_paste_cancel)
+        self.append(self._paste_cancel)
+
         # Bell icon (hidden by default)
         self._bell = Gtk.Image.new_from_icon_name('dialog-warning-symbolic')
         self._bell.set_visible(False)
@@ -87,6 +109,14 @@ class Gtk4Titlebar(Gtk.Box):
         else:
             self._size.set_visible(False)
 
+    def set_paste_progress(self, fraction: float | None):
+        """Show paste progress (0..1), or hide it when fraction is None"""
+        active = fraction is not None
+        if active:
+            self._paste_bar.set_fraction(fraction)
+        self._paste_bar.set_visible(active)
+        self._paste_cancel.set_visible(active)
+
     def show_bell(self):
         self._bell.set_visible(True)
 
@@ -126,6 +156,22 @@ class Gtk4Titlebar(Gtk.Box):
         if state in ('tx', 'rx', 'inactive'):
             self.add_css_class(state)
 
+    def set_profile_class(self, profile: str):
+        """Select the per-profile titlebar rules of the shared stylesheet"""
+        from .gtk4style import profile_css_class
+        cls = profile_css_class(profile)
+        if cls == self._profile_class:
+            return
+        if self._profile_class:
+            self.remove_css_class(self._profile_class)
+        self.add_css_class(cls)
+        self._profile_class = cls
+
+    @classmethod
+    def for_window(cls, window):
+        """Return the live titlebars currently inside window"""
+        return [tb for tb in list(cls._instances) if tb.get_root() is window]
+
     def set_held(self, held: bool):
         if held:
             from .translation import _
@@ -135,6 +181,10 @@ class Gtk4Titlebar(Gtk.Box):
             self._held.set_visible(False)
 
     # Internal callbacks
+    def _on_paste_cancel(self, _btn):
+        if self._term is not None and hasattr(self._term, 'cancel_paste'):
+            self._term.cancel_paste()
+
     def _on_pressed(self, gesture, n_press, x, y):
         if n_press == 2:
             # Request the window to rename the tab for our unit, anchored at the tab header
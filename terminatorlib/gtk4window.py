@@ -13,6 +13,9 @@ from .version import APP_NAME, APP_VERSION
 
 from .gtk4terminal import Gtk4Terminal
 from .gtk4titlebar import Gtk4Titlebar
+from .gtk4bell import Gtk4BellManager
+from . import metrics
+from . import session_scrollback
 
 
 class TerminatorGtk4Window(Gtk.ApplicationWindow):
@@ -20,12 +23,20 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         super().__init__(application=application)
         self.set_title("Terminator")
         self.set_default_size(1000, 700)
+        # Names the window in remotinator's describe_terminals
+        import uuid as _uuid
+        self.uuid = str(_uuid.uuid4())
         self.root = None
         self._group_counter = 0
         self._uuid_unit_map = {}
         self._install_shortcuts()
         self._force_close = False
         self._focused_uuid = None
+        # Cached pane adjacency for directional focus/resize (see panegraph)
+        self._pane_graph = None
+        self._pane_graph_root = None
+        # Coalesces bells and pools the timers that clear bell effects
+        self._bells = Gtk4BellManager(self)
         # Intercept close to optionally confirm
         try:
             self.connect('close-request', self._on_close_request)
@@ -56,10 +67,9 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
             disp = Gdk.Display.get_default()
             if disp is not None:
                 Gtk.StyleContext.add_provider_for_display(disp, prov, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-            # Keep a provider for dynamic titlebar color/font overrides from Config
-            self._title_css_provider = Gtk.CssProvider()
-            if disp is not None:
-                Gtk.StyleContext.add_provider_for_display(disp, self._title_css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+            # Titlebar color/font overrides from Config share one provider per display
+            from .gtk4style import TitlebarStyle
+            TitlebarStyle().attach(disp)
             # Provider to control paned handle size (from Config handle_size)
             self._handle_css_provider = Gtk.CssProvider()
             if disp is not None:
@@ -183,14 +193,7 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
                 return self._count_terminals_in(self.get_child()) > 0
             except Exception:
                 return False
-        # Unregister from global registry for plugin compatibility
-        try:
-            from .terminator import Terminator as _Term
-            t = _Term()
-            if term in t.terminals:
-                t.terminals.remove(term)
-        except Exception:
-            pass
+        self._release_terminal(term)
         if isinstance(parent, Gtk.Paned):
             # Identify the sibling to keep
             if parent.get_end_child() is unit:
@@ -274,10 +277,37 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
             except Exception:
                 pass
 
-    def _new_terminal_container(self, spawn_cwd: str | None = None, auto_spawn: bool = True):
+    def _release_terminal(self, term):
+        """Forget a terminal that is being closed"""
+        # Unregister from global registry for plugin compatibility
+        try:
+            from .terminator import Terminator as _Term
+            t = _Term()
+            if term in t.terminals:
+                t.terminals.remove(term)
+                t.emit_terminal_event('terminal-removed', term)
+        except Exception:
+            pass
+        try:
+            self._bells.forget(term)
+        except Exception:
+            pass
+        term.release()
+
+    def _release_terminals_in(self, container):
+        """Forget every terminal inside a tab or window being closed"""
+        if container is None:
+            return
+        for unit in list(self._iter_units_in_container(container)):
+            term = self._find_terminal_in_container(unit)
+            if term is not None:
+                self._release_terminal(term)
+
+    def _new_terminal_container(self, spawn_cwd: str | None = None, auto_spawn: bool = True,
+                                uuid: str | None = None):
         from .config import Config
         cfg = Config()
-        term = Gtk4Terminal()
+        term = Gtk4Terminal(uuid=uuid)
         # Register terminal globally for plugin compatibility (Remote, URL handlers, etc.)
         try:
             from .terminator import Terminator as _Term
@@ -338,6 +368,12 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
             titlebar.hide()
         # Now titlebar can know its unit container
         titlebar._unit = unit
+        titlebar._term = term
+        term._titlebar = titlebar
+        try:
+            titlebar.set_profile_class(term.get_profile())
+        except Exception:
+            pass
         # Position titlebar per preference
         try:
             if bool(cfg['title_at_bottom']):
@@ -357,6 +393,13 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         except Exception:
             pass
 
+        # Announce the terminal once it is spawned and wrapped in its unit
+        try:
+            from .terminator import Terminator as _Term
+            _Term().emit_terminal_event('terminal-added', term)
+        except Exception:
+            pass
+
         return term, unit
 
     # Find the tab label widget for the notebook page that contains the given unit
@@ -845,78 +888,28 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         self._install_shortcuts()
 
     def refresh_titlebars(self, visible: bool):
-        # Walk all terminal unit containers in the window and show/hide their titlebars
-        def process_container(container):
-            if isinstance(container, Gtk.Box):
-                # If this is a vertical unit: first child is titlebar, second is scroller
-                first = container.get_first_child()
-                if isinstance(first, Gtk.Box) and 'term-titlebar' in first.get_css_classes():
-                    if visible:
-                        first.show()
-                    else:
-                        first.hide()
-                # Recurse into children
-                child = container.get_first_child()
-                while child is not None:
-                    process_container(child)
-                    child = child.get_next_sibling()
-            elif isinstance(container, Gtk.Paned):
-                if container.get_start_child() is not None:
-                    process_container(container.get_start_child())
-                if container.get_end_child() is not None:
-                    process_container(container.get_end_child())
-            elif isinstance(container, Gtk.Notebook):
-                for i in range(container.get_n_pages()):
-                    page = container.get_nth_page(i)
-                    process_container(page)
-
-        root_child = self.get_child()
-        if root_child is not None:
-            process_container(root_child)
+        # Show/hide the titlebars of this window's terminal units
+        for tb in Gtk4Titlebar.for_window(self):
+            try:
+                if tb.get_visible() != bool(visible):
+                    tb.set_visible(bool(visible))
+            except Exception:
+                pass
 
     def refresh_title_sizes(self):
-        # Iterate all terminals and refresh their size label visibility and value
-        def visit(container):
-            from .gtk4terminal import Gtk4Terminal
-            if isinstance(container, Gtk.Box):
-                # Titlebar + scroller unit
-                first = container.get_first_child()
-                if isinstance(first, Gtk.Box) and 'term-titlebar' in first.get_css_classes():
-                    # Find terminal under this unit
-                    scroller = first.get_next_sibling()
-                    term = None
-                    try:
-                        if isinstance(scroller, Gtk.ScrolledWindow):
-                            v = scroller.get_child()
-                            if isinstance(v, Gtk4Terminal):
-                                term = v
-                    except Exception:
-                        term = None
-                    if term is not None and hasattr(first, 'set_size'):
-                        try:
-                            cols = getattr(term, 'get_column_count')()
-                            rows = getattr(term, 'get_row_count')()
-                            prof = term.config.get_profile_by_name(term.config.get_profile()) if hasattr(term, 'config') else {}
-                            show_size = not bool(prof.get('title_hide_sizetext', False))
-                            first.set_size(int(cols), int(rows), show=show_size)
-                        except Exception:
-                            pass
-                # Recurse
-                c = container.get_first_child()
-                while c is not None:
-                    visit(c)
-                    c = c.get_next_sibling()
-            elif isinstance(container, Gtk.Paned):
-                if container.get_start_child() is not None:
-                    visit(container.get_start_child())
-                if container.get_end_child() is not None:
-                    visit(container.get_end_child())
-            elif isinstance(container, Gtk.Notebook):
-                for i in range(container.get_n_pages()):
-                    visit(container.get_nth_page(i))
-        root = self.get_child()
-        if root is not None:
-            visit(root)
+        # Refresh size label visibility and value for every titlebar
+        for tb in Gtk4Titlebar.for_window(self):
+            term = getattr(tb, '_term', None)
+            if term is None or not hasattr(tb, 'set_size'):
+                continue
+            try:
+                cols = getattr(term, 'get_column_count')()
+                rows = getattr(term, 'get_row_count')()
+                prof = term.config.get_profile_by_name(term.config.get_profile()) if hasattr(term, 'config') else {}
+                show_size = not bool(prof.get('title_hide_sizetext', False))
+                tb.set_size(int(cols), int(rows), show=show_size)
+            except Exception:
+                pass
 
     def refresh_window_hints(self, always_on_top: bool, hide_from_taskbar: bool):
         try:
@@ -948,133 +941,31 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
             pass
 
     def refresh_titlebar_style(self):
-        # Build CSS for titlebar colors/fonts from profile settings
+        # Titlebar colors/fonts come from the display-wide stylesheet, which
+        # only reloads when the profile settings it was built from change
         try:
-            from .config import Config
-            cfg = Config()
-            prof = cfg.get_profile_by_name(cfg.get_profile())
-        except Exception:
-            prof = {}
-        def parsec(hexstr, fallback):
-            try:
-                s = str(hexstr or '').strip()
-                if s:
-                    return s
-            except Exception:
-                pass
-            return fallback
-        def hex_to_rgb(h):
-            try:
-                h = h.lstrip('#')
-                if len(h) == 6:
-                    return int(h[0:2],16), int(h[2:4],16), int(h[4:6],16)
-            except Exception:
-                return None
-        def rgb_to_hex(r,g,b):
-            return f"#{max(0,min(255,r)):02x}{max(0,min(255,g)):02x}{max(0,min(255,b)):02x}"
-        def scale_hex(col, factor):
-            rgb = hex_to_rgb(col)
-            if not rgb:
-                return col
-            r,g,b = rgb
-            return rgb_to_hex(int(r*factor), int(g*factor), int(b*factor))
-
-        tx_fg = parsec(prof.get('title_transmit_fg_color'), '#ffffff')
-        tx_bg = parsec(prof.get('title_transmit_bg_color'), '#c80003')
-        rx_fg = parsec(prof.get('title_receive_fg_color'), '#ffffff')
-        rx_bg = parsec(prof.get('title_receive_bg_color'), '#0076c9')
-        in_fg = parsec(prof.get('title_inactive_fg_color'), '')
-        in_bg = parsec(prof.get('title_inactive_bg_color'), '')
-        # Derive inactive colors if not set, using global offsets
-        if not in_fg or not in_bg:
-            try:
-                off_fg = float(cfg['inactive_color_offset']) or 0.8
-                off_bg = float(cfg['inactive_bg_color_offset']) or 1.0
-            except Exception:
-                off_fg, off_bg = 0.8, 1.0
-            if not in_fg:
-                in_fg = scale_hex(tx_fg, off_fg)
-            if not in_bg:
-                in_bg = scale_hex(tx_bg, off_bg)
-        use_sys_font = bool(prof.get('title_use_system_font', True))
-        font_str = parsec(prof.get('title_font'), 'Sans 9')
-        css_parts = []
-        css_parts.append(f".term-titlebar.tx {{ background-color: {tx_bg}; color: {tx_fg}; }}")
-        css_parts.append(f".term-titlebar.rx {{ background-color: {rx_bg}; color: {rx_fg}; }}")
-        css_parts.append(f".term-titlebar.inactive {{ background-color: {in_bg}; color: {in_fg}; }}")
-        if not use_sys_font and font_str:
-            # Apply font to the titlebar area; labels inherit
-            css_parts.append(f".term-titlebar {{ font: {font_str}; }}")
-        try:
-            data = ('\n'.join(css_parts)).encode('utf-8')
-            self._title_css_provider.load_from_data(data)
+            from .gtk4style import TitlebarStyle
+            style = TitlebarStyle()
+            style.attach(self.get_display())
+            style.refresh()
         except Exception:
             pass
 
     def refresh_titlebar_position(self, bottom: bool):
         # Move titlebars to top/bottom within each unit
-        def process_container(container):
-            if isinstance(container, Gtk.Box):
-                first = container.get_first_child()
-                # Identify unit by first child class
-                if isinstance(first, Gtk.Box) and 'term-titlebar' in first.get_css_classes():
-                    # Children expected: titlebar and scroller
-                    titlebar = first
-                    scroller = first.get_next_sibling()
-                    if bottom:
-                        # Want order: scroller, then titlebar
-                        # If titlebar is first, reorder
-                        try:
-                            container.remove(titlebar)
-                            if scroller is not None:
-                                container.remove(scroller)
-                                container.append(scroller)
-                            container.append(titlebar)
-                        except Exception:
-                            pass
-                    else:
-                        # Want order: titlebar, then scroller
-                        # If titlebar is not first, move it
-                        try:
-                            # Re-evaluate children
-                            child0 = container.get_first_child()
-                            if child0 is not titlebar:
-                                # Remove both and re-add
-                                # Find actual titlebar and scroller
-                                # Iterate to find the titlebar again
-                                tbar = None
-                                scr = None
-                                c = container.get_first_child()
-                                while c is not None:
-                                    if isinstance(c, Gtk.Box) and 'term-titlebar' in c.get_css_classes():
-                                        tbar = c
-                                    else:
-                                        scr = c
-                                    c = c.get_next_sibling()
-                                if tbar is not None and scr is not None:
-                                    container.remove(tbar)
-                                    container.remove(scr)
-                                    container.append(tbar)
-                                    container.append(scr)
-                        except Exception:
-                            pass
-                # Recurse
-                child = container.get_first_child()
-                while child is not None:
-                    process_container(child)
-                    child = child.get_next_sibling()
-            elif isinstance(container, Gtk.Paned):
-                if container.get_start_child() is not None:
-                    process_container(container.get_start_child())
-                if container.get_end_child() is not None:
-                    process_container(container.get_end_child())
-            elif isinstance(container, Gtk.Notebook):
-                for i in range(container.get_n_pages()):
-                    page = container.get_nth_page(i)
-                    process_container(page)
-        root = self.get_child()
-        if root is not None:
-            process_container(root)
+        for tb in Gtk4Titlebar.for_window(self):
+            unit = getattr(tb, '_unit', None)
+            if not isinstance(unit, Gtk.Box):
+                continue
+            try:
+                if bottom:
+                    last = unit.get_last_child()
+                    if last is not tb:
+                        unit.reorder_child_after(tb, last)
+                elif unit.get_first_child() is not tb:
+                    unit.reorder_child_after(tb, None)
+            except Exception:
+                pass
 
     def refresh_handle_size(self, size: int):
         # Apply CSS to adjust Gtk.Paned separator size if size >= 0
@@ -1135,38 +1026,65 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         term = self._get_focused_terminal()
         if term is None:
             return True
-        scroller = term.get_parent()
-        unit = scroller.get_parent()
-        # Choose orientation and which sibling to focus based on direction
-        if direction in ('left', 'right'):
-            orientation = Gtk.Orientation.HORIZONTAL
-        else:
-            orientation = Gtk.Orientation.VERTICAL
-        paned, child_is_start = self._find_parent_paned(unit, orientation)
-        if paned is None:
-            return True
-        target = None
-        if orientation == Gtk.Orientation.HORIZONTAL:
-            if direction == 'left':
-                target = paned.get_start_child()
-            else:
-                target = paned.get_end_child()
-        else:
-            if direction == 'up':
-                target = paned.get_start_child()
-            else:
-                target = paned.get_end_child()
-        # Avoid focusing the same unit
-        if target is unit:
-            target = None
-        if target is None:
-            return True
-        # Find a terminal inside target and focus it
-        t = self._find_terminal_in_container(target)
-        if t is not None:
-            t.grab_focus()
+        graph = self._get_pane_graph(term)
+        target = graph.neighbour(term, direction) if graph is not None else None
+        if target is not None:
+            target.grab_focus()
         return True
 
+    def _pane_root_for(self, widget):
+        # Topmost ancestor below the window or the notebook page it sits in
+        w = widget
+        while w is not None:
+            parent = w.get_parent()
+            if parent is None or parent is self or isinstance(parent, Gtk.Notebook):
+                return w
+            w = parent
+        return None
+
+    def _invalidate_pane_graph(self):
+        self._pane_graph = None
+
+    def _get_pane_graph(self, term):
+        # Geometry of the panes around term, rebuilt after allocation changes
+        root = self._pane_root_for(term)
+        if root is None:
+            return None
+        if getattr(self, '_pane_graph', None) is not None and self._pane_graph_root is root:
+            return self._pane_graph
+        from .panegraph import PaneGraph
+        graph = PaneGraph()
+        for unit in self._iter_units_in_container(root):
+            t = self._find_terminal_in_container(unit)
+            if t is None:
+                continue
+            try:
+                ok, rect = unit.compute_bounds(root)
+                if not ok:
+                    continue
+            except Exception:
+                continue
+            # Nearest paned handle on each edge, for directional resize
+            targets = {}
+            w = unit
+            while w is not root:
+                parent = w.get_parent()
+                if parent is None:
+                    break
+                if isinstance(parent, Gtk.Paned):
+                    is_start = parent.get_start_child() is w
+                    if parent.get_orientation() == Gtk.Orientation.HORIZONTAL:
+                        direction = 'right' if is_start else 'left'
+                    else:
+                        direction = 'down' if is_start else 'up'
+                    targets.setdefault(direction, (parent, is_start))
+                w = parent
+            graph.add(t, rect.get_x(), rect.get_y(), rect.get_width(), rect.get_height(), **targets)
+        graph.build()
+        self._pane_graph = graph
+        self._pane_graph_root = root
+        return graph
+
     def _on_split_auto(self, *args):
         term = self._get_focused_terminal()
         if term is None:
@@ -1185,6 +1103,7 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
     def _on_close_request(self, *args):
         # Respect ask_before_closing preference
         if getattr(self, '_force_close', False):
+            self._release_terminals_in(self.get_child())
             return False
         from .config import Config
         cfg = Config()
@@ -1201,6 +1120,7 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         elif mode == 'multiple_terminals' and count > 1:
             need_confirm = True
         if not need_confirm:
+            self._release_terminals_in(self.get_child())
             return False
         # Show confirmation dialog
         dlg = Gtk.MessageDialog(transient_for=self, modal=True,
@@ -1614,6 +1534,7 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         nb, idx = self._find_notebook_page_for_widget(page_widget)
         if nb is None or idx < 0:
             return
+        self._release_terminals_in(page_widget)
         nb.remove_page(idx)
         n = nb.get_n_pages()
         if n > 0:
@@ -1837,7 +1758,16 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         else:
             orientation = Gtk.Orientation.VERTICAL
 
-        paned, child_is_start = self._find_parent_paned(scroller, orientation)
+        # Prefer the handle on the edge we are growing towards, else the
+        # one on the opposite edge
+        opposite = {'left': 'right', 'right': 'left', 'up': 'down', 'down': 'up'}[direction]
+        graph = self._get_pane_graph(term)
+        found = None
+        if graph is not None:
+            found = graph.target(term, direction) or graph.target(term, opposite)
+        if found is None:
+            found = self._find_parent_paned(scroller, orientation)
+        paned, child_is_start = found
         if paned is None:
             return True
 
@@ -2418,7 +2348,8 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         app = self.get_application()
         win = TerminatorGtk4Window(application=app)
         try:
-            win._apply_layout(layout)
+            with metrics.timed('layout.build'):
+                win._apply_layout(layout)
         except Exception:
             pass
         win.present()
@@ -2662,7 +2593,16 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
     def _build_node(self, node: dict):
         t = (node.get('type') or '').lower()
         if t == 'terminal':
-            term, unit = self._new_terminal_container()
+            # Keep the saved uuid, unless a live terminal already has it
+            # (the same layout opened twice)
+            uuid = node.get('uuid')
+            try:
+                from .terminator import Terminator
+                if uuid and any(str(x.uuid) == str(uuid) for x in Terminator().terminals):
+                    uuid = None
+            except Exception:
+                pass
+            term, unit = self._new_terminal_container(uuid=uuid)
             # Apply terminal properties
             try:
                 prof = node.get('profile')
@@ -2686,9 +2626,10 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
             except Exception:
                 pass
             try:
-                uuid = node.get('uuid')
+                if node.get('uuid'):
+                    self._uuid_unit_map[str(node.get('uuid'))] = unit
                 if uuid:
-                    self._uuid_unit_map[str(uuid)] = unit
+                    session_scrollback.restore(term)
             except Exception:
                 pass
             return unit
@@ -2940,47 +2881,8 @@ class TerminatorGtk4Window(Gtk.ApplicationWindow):
         tb = unit.get_first_child() if isinstance(unit, Gtk.Box) else None
         if tb is None:
             return
+        # Coalescing, pooled timers and profile flag caching live in the manager
         try:
-            # Profile-controlled bell behavior
-            prof = term.config.get_profile_by_name(term.config.get_profile()) if hasattr(term, 'config') else {}
-        except Exception:
-            prof = {}
-        icon_bell = bool(prof.get('icon_bell', True))
-        visible_bell = bool(prof.get('visible_bell', False))
-        urgent_bell = bool(prof.get('urgent_bell', False))
-        # Icon bell: show briefly
-        try:
-            if icon_bell and hasattr(tb, 'show_bell'):
-                tb.show_bell()
-                GLib.timeout_add(1000, lambda: (tb.hide_bell(), False)[1])
-        except Exception:
-            pass
-        # Visible bell: brief flash class on titlebar
-        try:
-            if visible_bell and hasattr(tb, 'add_css_class'):
-                tb.add_css_class('bell')
-                def _clear():
-                    try:
-                        if hasattr(tb, 'remove_css_class'):
-                            tb.remove_css_class('bell')
-                    except Exception:
-                        pass
-                    return False
-                GLib.timeout_add(150, _clear)
-        except Exception:
-            pass
-        # Urgent bell: request attention if supported
-        try:
-            if urgent_bell and hasattr(self, 'set_urgency_hint'):
-                self.set_urgency_hint(True)
-                # Clear on focus
-                def _clear_urgency():
-                    try:
-                        self.set_urgency_hint(False)
-                    except Exception:
-                        pass
-                    return False
-                # Clear soon after to avoid sticky hint
-                GLib.timeout_add(1500, _clear_urgency)
+            self._bells.notify(term, tb)
         except Exception:
             pass
@@ -0,0 +1,156 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""hosted_plugin.py - Plugins that run in a separate process
+
+A plugin class that derives from HostedPlugin is not instantiated inside
+Terminator. PluginRegistry hands it to the PluginHost (see plugin_host.py),
+which starts one helper process running this module and loads every such
+plugin there. This module must not import GTK or the rest of terminatorlib.
+Hosted plugins never touch GTK or the main loop. They receive terminal
+events and answer with actions, as JSON lines over the helper's stdin and
+stdout:
+
+  events in:   terminal-added {uuid, cwd, pid, title, profile}
+               terminal-removed {uuid}
+               title {uuid, title}
+               text {uuid, text}       (new output, coalesced per frame)
+  actions out: feed {uuid, text}, set_profile {uuid, profile},
+               notify {summary, body}
+
+A hosted plugin implements on_<event> for the events it wants, with dashes
+turned into underscores. Events no loaded plugin handles are never sent.
+
+>>> class Echo(HostedPlugin):
+...     def on_text(self, uuid, text):
+...         self.feed(uuid, text.upper())
+>>> sent = []
+>>> child = HostChild(write=sent.append)
+>>> child.add(Echo)
+>>> child.subscriptions()
+['text']
+>>> child.handle({'op': 'event', 'event': 'text', 'uuid': 'u1', 'text': 'ls'})
+>>> sent
+[{'op': 'feed', 'uuid': 'u1', 'text': 'LS'}]
+"""
+
+import os
+import sys
+import json
+import threading
+import importlib.util
+
+EVENTS = ('terminal-added', 'terminal-removed', 'title', 'text')
+
+
+class HostedPlugin(object):
+    """Base class for plugins that run in the plugin host process"""
+    capabilities = ['out_of_process']
+    out_of_process = True
+
+    def __init__(self, host):
+        self.host = host
+
+    def unload(self):
+        """Prepare to be unloaded"""
+        pass
+
+    def feed(self, uuid, text):
+        """Type text into a terminal"""
+        self.host.send({'op': 'feed', 'uuid': uuid, 'text': text})
+
+    def set_profile(self, uuid, profile):
+        """Switch a terminal to another profile"""
+        self.host.send({'op': 'set_profile', 'uuid': uuid, 'profile': profile})
+
+    def notify(self, summary, body=''):
+        """Show a desktop notification"""
+        self.host.send({'op': 'notify', 'summary': summary, 'body': body})
+
+
+class HostChild(object):
+    """The helper process side: owns the hosted plugin instances"""
+
+    def __init__(self, write):
+        self.plugins = {}
+        self.lock = threading.Lock()
+        self.write = write
+
+    def send(self, message):
+        # Plugins may act from their own threads
+        with self.lock:
+            self.write(message)
+
+    def add(self, cls):
+        self.plugins[cls.__name__] = cls(self)
+
+    def load(self, name, path):
+        spec = importlib.util.spec_from_file_location(
+            os.path.splitext(os.path.basename(path))[0], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.add(getattr(module, name))
+
+    def subscriptions(self):
+        return [e for e in EVENTS
+                if any([hasattr(p, 'on_' + e.replace('-', '_'))
+                        for p in self.plugins.values()])]
+
+    def handle(self, message):
+        op = message.get('op')
+        if op == 'load':
+            try:
+                self.load(message['name'], message['path'])
+            except Exception as ex:
+                self.send({'op': 'log', 'message': 'loading %s failed: %s' %
+                           (message.get('name'), ex)})
+            self.send({'op': 'subscribe', 'events': self.subscriptions()})
+        elif op == 'unload':
+            plugin = self.plugins.pop(message.get('name'), None)
+            if plugin is not None:
+                plugin.unload()
+            self.send({'op': 'subscribe', 'events': self.subscriptions()})
+        elif op == 'event':
+            args = dict([(k, v) for k, v in message.items()
+                         if k not in ('op', 'event')])
+            method = 'on_' + message['event'].replace('-', '_')
+            for name, plugin in list(self.plugins.items()):
+                handler = getattr(plugin, method, None)
+                if handler is None:
+                    continue
+                try:
+                    handler(**args)
+                except Exception as ex:
+                    self.send({'op': 'log', 'message': '%s.%s failed: %s' %
+                               (name, method, ex)})
+
+    def run(self, stream=None):
+        for line in stream or sys.stdin:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get('op') == 'quit':
+                break
+            self.handle(message)
+        for plugin in self.plugins.values():
+            try:
+                plugin.unload()
+            except Exception:
+                pass
+
+
+def main():
+    """Entry point of the helper process"""
+    # Keep the real stdout for the protocol; anything plugins print goes to
+    # stderr instead of corrupting it
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def write(message):
+        protocol.write(json.dumps(message) + '\n')
+        protocol.flush()
+    HostChild(write=write).run()
+
+
+if __name__ == '__main__':
+    main()
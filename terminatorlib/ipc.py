@@ -3,8 +3,8 @@
 """ipc.py - DBus server and API calls"""
 
 import sys
-import hashlib
-from gi.repository import Gdk
+import json
+from gi.repository import Gdk, GLib
 import dbus.service
 from dbus.exceptions import DBusException
 import dbus.glib
@@ -16,6 +16,8 @@ from .util import dbg, err, enumerate_descendants
 from .terminal import Terminal
 from .container import Container
 from .configjson import ConfigJson
+from . import metrics
+from .remote_client import BUS_BASE, BUS_PATH, bus_name
 from gi.repository import Gtk as gtk
 from gi.repository import GObject as gobject
 
@@ -25,22 +27,19 @@ if not CONFIG['dbus']:
     dbg('dbus disabled')
     raise ImportError
 
-BUS_BASE = 'net.tenshu.Terminator2'
-BUS_PATH = '/net/tenshu/Terminator2'
 try:
     # Try and include the X11 display name in the dbus bus name
-    DISPLAY = Gdk.get_display().partition('.')[0]
-    # In Python 3, hash() uses a different seed on each run, so use hashlib
-    DISPLAY = hashlib.md5(DISPLAY.encode('utf-8')).hexdigest()
-    BUS_NAME = '%s%s' % (BUS_BASE, DISPLAY)
+    BUS_NAME = bus_name(Gdk.get_display())
 except:
     BUS_NAME = BUS_BASE
 
 class DBusService(Borg, dbus.service.Object):
-    """DBus Server class. This is implemented as a Borg"""
+    """DBus Server class. This is implemented as a Borg. It serves the GTK3
+    Terminator; the GTK4 launcher does not start it"""
     bus_name = None
     bus_path = None
     terminator = None
+    watched = None
 
     def __init__(self):
         """Class initialiser"""
@@ -70,6 +69,75 @@ class DBusService(Borg, dbus.service.Object):
             self.bus_path = BUS_PATH
         if not self.terminator:
             self.terminator = Terminator()
+        if self.watched is None:
+            # terminal -> signal ids, for terminals we relay signals from
+            self.watched = {}
+            self.terminator.connect_terminal_event('terminal-added',
+                                                   self.on_terminal_added)
+            self.terminator.connect_terminal_event('terminal-removed',
+                                                   self.on_terminal_removed)
+            for terminal in self.terminator.terminals:
+                self.watch_terminal(terminal)
+
+    def watch_terminal(self, terminal):
+        """Relay title changes and child exits of a terminal as signals"""
+        if terminal in self.watched:
+            return
+        urn = terminal.uuid.urn
+        ids = [(terminal, terminal.connect('title-change',
+                lambda _t, title: self.terminal_title_changed(urn, title or ''))),
+               (terminal.vte, terminal.vte.connect('child-exited',
+                lambda _v, status: self.terminal_child_exited(urn, status)))]
+        self.watched[terminal] = ids
+
+    def on_terminal_added(self, terminal):
+        """A terminal was registered. Terminal registers itself before it
+        has a vte, and Factory gives it a uuid after that, so wait until
+        it is built"""
+        GLib.idle_add(self.announce_terminal, terminal)
+
+    def announce_terminal(self, terminal):
+        """Watch a newly built terminal and tell clients about it"""
+        if terminal not in self.terminator.terminals:
+            return False
+        if not hasattr(terminal, 'vte') or not hasattr(terminal, 'uuid'):
+            dbg('terminal %s never finished building' % terminal)
+            return False
+        self.watch_terminal(terminal)
+        self.terminal_created(terminal.uuid.urn)
+        return False
+
+    def on_terminal_removed(self, terminal):
+        """A terminal was deregistered"""
+        if terminal not in self.watched:
+            # Removed before it was announced
+            return
+        for widget, sigid in self.watched.pop(terminal):
+            try:
+                widget.disconnect(sigid)
+            except Exception:
+                pass
+        self.terminal_closed(terminal.uuid.urn)
+
+    @dbus.service.signal(BUS_NAME, signature='s')
+    def terminal_created(self, uuid):
+        """Emitted when a terminal is created"""
+        pass
+
+    @dbus.service.signal(BUS_NAME, signature='s')
+    def terminal_closed(self, uuid):
+        """Emitted when a terminal is closed"""
+        pass
+
+    @dbus.service.signal(BUS_NAME, signature='ss')
+    def terminal_title_changed(self, uuid, title):
+        """Emitted when a terminal changes its title"""
+        pass
+
+    @dbus.service.signal(BUS_NAME, signature='si')
+    def terminal_child_exited(self, uuid, status):
+        """Emitted when the process in a terminal exits"""
+        pass
 
     @dbus.service.method(BUS_NAME, in_signature='a{ss}')
     def new_window_cmdline(self, options=dbus.Dictionary()):
@@ -242,6 +310,69 @@ class DBusService(Borg, dbus.service.Object):
         """Return a list of all the terminals"""
         return [x.uuid.urn for x in self.terminator.terminals]
 
+    def describe_terminal(self, terminal):
+        """Return a dict of the interesting properties of a terminal"""
+        window = terminal.get_toplevel()
+        title = terminal.titlebar.get_custom_string() or \
+                terminal.get_window_title() or ''
+        return {'uuid': terminal.uuid.urn,
+                'window': getattr(getattr(window, 'uuid', None), 'urn', ''),
+                'title': title,
+                'cwd': terminal.get_cwd() or '',
+                'pid': str(terminal.pid or ''),
+                'group': terminal.group or '',
+                'profile': terminal.get_profile() or ''}
+
+    @dbus.service.method(BUS_NAME, out_signature='aa{ss}')
+    def describe_terminals(self):
+        """Return uuid, window, title, cwd, pid, group and profile of every
+        terminal in one call"""
+        return [self.describe_terminal(x) for x in self.terminator.terminals]
+
+    @dbus.service.method(BUS_NAME, in_signature='s', out_signature='as')
+    def create_layout_tree(self, layoutjson):
+        """Open a window with a whole layout, given as a config json document
+        (or just its 'layout' section). Returns the uuids of the new
+        terminals"""
+        try:
+            document = json.loads(layoutjson)
+        except ValueError as ex:
+            raise DBusException('Invalid layout json: %s' % ex)
+        if 'layout' not in document:
+            document = {'layout': document}
+        layoutname = ConfigJson().extend_config_from_data(document)
+        if not layoutname:
+            raise DBusException('Layout json did not describe a layout')
+        terminals_before = set(self.get_terminals())
+        self.terminator.create_layout(layoutname)
+        self.terminator.layout_done()
+        return [x for x in self.get_terminals() if x not in terminals_before]
+
+    @dbus.service.method(BUS_NAME, in_signature='ass', out_signature='as')
+    def run_commands(self, uuids, command):
+        """Run command in every listed terminal. Returns the uuids that could
+        not be found"""
+        missing = []
+        if not command.endswith('\n'):
+            command += '\n'
+        for uuid in uuids:
+            terminal = self.terminator.find_terminal_by_uuid(uuid)
+            if terminal:
+                terminal.vte.feed_child(command.encode())
+            else:
+                missing.append(uuid)
+        return missing
+
+    @dbus.service.method(BUS_NAME, out_signature='s')
+    def get_metrics(self):
+        """Return the collected performance metrics as a JSON document"""
+        return json.dumps(metrics.snapshot(), sort_keys=True)
+
+    @dbus.service.method(BUS_NAME, in_signature='b')
+    def set_metrics_enabled(self, enabled):
+        """Start or stop collecting performance metrics"""
+        metrics.enable(enabled)
+
     @dbus.service.method(BUS_NAME)
     def get_focused_terminal(self):
         """Returns the uuid of the currently focused terminal"""
@@ -393,6 +524,26 @@ def get_terminals(session, options):
     """Call the dbus method to return a list of all terminals"""
     print('\n'.join(session.get_terminals()))
 
+@with_proxy
+def describe_terminals(session, options):
+    """Call the dbus method to describe all terminals"""
+    for terminal in session.describe_terminals():
+        print('\t'.join(['%s=%s' % (k, terminal[k]) for k in sorted(terminal)]))
+
+@with_proxy
+def create_layout_tree(session, options):
+    """Call the dbus method to open a layout read from a json file"""
+    with open(options['file']) as layout_file:
+        print('\n'.join(session.create_layout_tree(layout_file.read())))
+
+@with_proxy
+def run_commands(session, uuid, options):
+    """Call the dbus method to run a command in a comma separated list of
+    terminals"""
+    missing = session.run_commands(uuid.split(','), options['execute'])
+    if missing:
+        err('terminals not found: %s' % ', '.join(missing))
+
 @with_proxy
 def get_focused_terminal(session, options):
     """Call the dbus method to return the currently focused terminal"""
@@ -0,0 +1,295 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""metrics.py - Counters, gauges and latency histograms for hot paths
+
+Collection is off unless enabled with --metrics-dump or over DBus. While it
+is off, every recording function returns after a single flag test, and
+timed() hands out one shared no-op context manager. Call sites can therefore
+stay in place permanently.
+
+>>> reset(); enable()
+>>> inc('title_updates')
+>>> inc('lines_received', 3, label='term-1')
+>>> set_gauge('terminals', 2)
+>>> for ms in (0.2, 3, 3, 40):
+...     observe('spawn', ms)
+>>> snap = snapshot()
+>>> snap['counters']
+{'title_updates': 1, 'lines_received': {'term-1': 3}}
+>>> snap['gauges']
+{'terminals': 2}
+>>> spawn = snap['histograms']['spawn']
+>>> spawn['count'], spawn['max'], spawn['p50'], spawn['p99']
+(4, 40, 5, 50)
+
+Nothing is recorded while disabled:
+
+>>> enable(False)
+>>> inc('title_updates')
+>>> with timed('apply_profile'):
+...     pass
+>>> snapshot()['counters']['title_updates']
+1
+>>> reset()
+
+Code that records only while collection is on can listen for it being
+turned on and off:
+
+>>> heard = []
+>>> listen(heard.append)
+>>> enable(); enable(); enable(False)
+>>> heard
+[True, False]
+>>> unlisten(heard.append)
+"""
+
+import json
+import sys
+import time
+import types
+import weakref
+
+# Upper bounds, in milliseconds, of the histogram buckets
+BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+ENABLED = False
+
+_counters = {}
+_gauges = {}
+_histograms = {}
+_sources = {}
+# References to callbacks told when collection is turned on or off
+_listeners = []
+# Main loop probe: requested interval and running GLib source id
+_loop = {'interval': None, 'source': None}
+
+
+class Histogram(object):
+    """Bucketed latency distribution in milliseconds"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        index = 0
+        while index < len(BUCKETS_MS) and ms > BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction
+        of observations"""
+        if not self.count:
+            return 0
+        wanted = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= wanted:
+                if index < len(BUCKETS_MS):
+                    return BUCKETS_MS[index]
+                break
+        return self.max
+
+    def summary(self):
+        return {'count': self.count,
+                'mean': self.total / self.count if self.count else 0,
+                'max': self.max,
+                'p50': self.percentile(0.5),
+                'p90': self.percentile(0.9),
+                'p99': self.percentile(0.99)}
+
+
+class _NullTimer(object):
+    """Context manager handed out while collection is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer(object):
+    """Context manager that observes the time spent inside it"""
+
+    def __init__(self, name, label):
+        self.name = name
+        self.label = label
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        observe(self.name, (time.perf_counter() - self.started) * 1000.0,
+                self.label)
+        return False
+
+
+def enable(on=True):
+    """Turn collection on or off"""
+    global ENABLED
+    changed = ENABLED != bool(on)
+    ENABLED = bool(on)
+    if ENABLED and _loop['interval'] and _loop['source'] is None:
+        watch_main_loop(_loop['interval'])
+    if changed:
+        for ref in list(_listeners):
+            callback = ref()
+            if callback is None:
+                _listeners.remove(ref)
+            else:
+                callback(ENABLED)
+
+
+def _ref(callback):
+    if isinstance(callback, types.MethodType):
+        return weakref.WeakMethod(callback)
+    return lambda: callback
+
+
+def listen(callback):
+    """Call callback(enabled) whenever collection is turned on or off.
+    Bound methods are held weakly"""
+    _listeners.append(_ref(callback))
+
+
+def unlisten(callback):
+    """Stop calling callback"""
+    for ref in list(_listeners):
+        if ref() == callback:
+            _listeners.remove(ref)
+
+
+def reset():
+    """Forget everything recorded so far"""
+    _counters.clear()
+    _gauges.clear()
+    _histograms.clear()
+
+
+def _store(table, name, label):
+    if label is None:
+        return table, name
+    if name not in table:
+        table[name] = {}
+    return table[name], label
+
+
+def inc(name, amount=1, label=None):
+    """Add amount to a counter, optionally one per label"""
+    if not ENABLED:
+        return
+    table, key = _store(_counters, name, label)
+    table[key] = table.get(key, 0) + amount
+
+
+def set_gauge(name, value, label=None):
+    """Set a gauge to value"""
+    if not ENABLED:
+        return
+    table, key = _store(_gauges, name, label)
+    table[key] = value
+
+
+def observe(name, ms, label=None):
+    """Record one latency, in milliseconds, in a histogram"""
+    if not ENABLED:
+        return
+    table, key = _store(_histograms, name, label)
+    histogram = table.get(key)
+    if histogram is None:
+        histogram = table[key] = Histogram()
+    histogram.observe(ms)
+
+
+def timed(name, label=None):
+    """Return a context manager that records the time spent in its body"""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name, label)
+
+
+def start():
+    """Return a start time for finish(), or None while disabled. Used when
+    the end of an operation arrives in a callback"""
+    if not ENABLED:
+        return None
+    return time.perf_counter()
+
+
+def finish(name, started, label=None):
+    """Record the time since a start() call"""
+    if started is not None:
+        observe(name, (time.perf_counter() - started) * 1000.0, label)
+
+
+def add_source(name, func):
+    """Register func() to supply the value of gauge name at snapshot time.
+    Lets code keep cheap internal counters and publish them on demand"""
+    _sources[name] = func
+
+
+def snapshot():
+    """Return everything recorded as plain, JSON serialisable data"""
+    gauges = dict(_gauges)
+    if ENABLED:
+        for name, func in list(_sources.items()):
+            try:
+                gauges[name] = func()
+            except Exception:
+                pass
+
+    def summarise(value):
+        if isinstance(value, Histogram):
+            return value.summary()
+        return dict([(k, v.summary()) for k, v in value.items()])
+
+    return {'enabled': ENABLED,
+            'counters': dict(_counters),
+            'gauges': gauges,
+            'histograms': dict([(k, summarise(v))
+                                for k, v in _histograms.items()])}
+
+
+def dump(destination='-'):
+    """Write a snapshot as JSON to a path, or to stderr for '-'"""
+    text = json.dumps(snapshot(), indent=2, sort_keys=True)
+    if destination in (None, '', '-'):
+        sys.stderr.write(text + '\n')
+        return
+    with open(destination, 'w') as handle:
+        handle.write(text + '\n')
+
+
+def watch_main_loop(interval_ms=100):
+    """Observe how late a periodic main loop timeout fires, as a measure of
+    main loop iteration latency. The probe stops while collection is
+    disabled and restarts when it is enabled again"""
+    _loop['interval'] = interval_ms
+    if not ENABLED or _loop['source'] is not None:
+        return
+    from gi.repository import GLib
+    state = {'due': time.perf_counter() + interval_ms / 1000.0}
+
+    def tick():
+        if not ENABLED:
+            _loop['source'] = None
+            return False
+        now = time.perf_counter()
+        observe('mainloop.latency', max(0.0, (now - state['due']) * 1000.0))
+        state['due'] = now + interval_ms / 1000.0
+        return True
+
+    _loop['source'] = GLib.timeout_add(interval_ms, tick)
@@ -18,11 +18,13 @@
 import argparse
 import sys
 import os
+import atexit
 
 from .util import dbg, err
 from . import util
 from . import config
 from . import version
+from . import metrics
 from .translation import _
 
 options = None
@@ -106,6 +108,22 @@ icon for the window (by file or name)'))
             help=_('List all profiles'))
     parser.add_argument('--list-layouts', action='store_true', dest='list_layouts',
             help=_('List all layouts'))
+    parser.add_argument('--metrics-dump', nargs='?', const='-', metavar='FILE',
+            dest='metrics_dump', help=_('Collect performance metrics and \
+write them as JSON to FILE (default: standard error) on exit'))
+    parser.add_argument('--watchdog', nargs='?', type=int, const=500,
+            metavar='MS', dest='watchdog', help=_('Report the Python stack \
+to standard error whenever the user interface stops responding for MS \
+milliseconds (default: 500)'))
+    parser.add_argument('--record', metavar='FILE', dest='record',
+            help=_('Record the output of the first terminal to FILE, an \
+asciicast file'))
+    parser.add_argument('--replay', metavar='FILE', dest='replay',
+            help=_('Play the asciicast file FILE in the first terminal \
+instead of starting a shell'))
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+            metavar='SPEED', dest='replay_speed', help=_('Replay at SPEED \
+times the recorded speed, or as fast as possible with 0 (default: 1)'))
 
     for item in ['--sm-client-id', '--sm-config-prefix', '--screen', '-n',
                  '--no-gconf' ]:
@@ -145,6 +163,10 @@ icon for the window (by file or name)'))
             for item in methods:
                 util.DEBUGMETHODS.append(item.strip())
 
+    if options.metrics_dump:
+        metrics.enable()
+        atexit.register(metrics.dump, options.metrics_dump)
+
     if options.working_directory:
         if os.path.exists(os.path.expanduser(options.working_directory)):
             options.working_directory = os.path.expanduser(options.working_directory)
@@ -0,0 +1,160 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""panegraph.py - Geometric adjacency of terminal panes
+
+A PaneGraph is built from the on-screen rectangles of a window's panes and
+answers "which pane is to the left/right/above/below this one" with a dict
+lookup. It is meant to be rebuilt whenever an allocation changes and then
+queried many times, rather than scanning every allocation per keypress.
+
+>>> g = PaneGraph()
+>>> g.add('a', 0, 0, 100, 100)
+>>> g.add('b', 100, 0, 100, 50)
+>>> g.add('c', 100, 50, 100, 50, right='handle-c')
+>>> g.build()
+>>> g.neighbour('a', 'right')
+'b'
+>>> g.neighbour('c', 'left'), g.neighbour('b', 'down'), g.neighbour('c', 'up')
+('a', 'c', 'b')
+>>> g.neighbour('a', 'left') is None
+True
+
+When several panes border the edge, the one facing the centre of the
+source pane wins:
+
+>>> g = PaneGraph()
+>>> g.add('a', 0, 0, 100, 100)
+>>> g.add('b', 104, 0, 100, 30)
+>>> g.add('c', 104, 34, 100, 66)
+>>> g.build()
+>>> g.neighbour('a', 'right')
+'c'
+
+Arbitrary per-pane data, such as resize targets, rides along:
+
+>>> g = PaneGraph()
+>>> g.add('a', 0, 0, 10, 10, right='handle')
+>>> g.target('a', 'right'), g.target('a', 'left')
+('handle', None)
+"""
+
+from bisect import bisect_left
+
+DIRECTIONS = ('left', 'right', 'up', 'down')
+
+
+def _project(rect, direction):
+    """Map a rect so every direction becomes a search towards larger values.
+    Returns (near, far, lo, hi): the leading edge of a candidate, the edge a
+    source searches from, and the span on the perpendicular axis."""
+    x1, y1, x2, y2 = rect
+    if direction == 'right':
+        return (x1, x2, y1, y2)
+    if direction == 'left':
+        return (-x2, -x1, y1, y2)
+    if direction == 'down':
+        return (y1, y2, x1, x2)
+    if direction == 'up':
+        return (-y2, -y1, x1, x2)
+    raise ValueError('Unknown direction: %s' % direction)
+
+
+class PaneGraph(object):
+    """Directional neighbours of rectangular panes"""
+
+    def __init__(self):
+        self.rects = {}
+        self.targets = {}
+        self.links = {}
+
+    def __len__(self):
+        return len(self.rects)
+
+    def add(self, key, x, y, width, height, **targets):
+        """Add a pane. Keyword arguments named after a direction are stored
+        and returned by target()"""
+        self.rects[key] = (x, y, x + width, y + height)
+        if targets:
+            self.targets[key] = targets
+
+    def build(self):
+        """Precompute the neighbour of every pane in every direction"""
+        self.links = {}
+        keys = list(self.rects)
+        for direction in DIRECTIONS:
+            proj = [_project(self.rects[k], direction) for k in keys]
+            index = sorted([(p[0], i) for i, p in enumerate(proj)])
+            nears = [n for n, _i in index]
+            for i, key in enumerate(keys):
+                _near, far, lo, hi = proj[i]
+                centre = (lo + hi) / 2.0
+                best = None
+                best_edge = None
+                pos = bisect_left(nears, far)
+                while pos < len(index):
+                    edge, j = index[pos]
+                    pos += 1
+                    if best_edge is not None and edge > best_edge:
+                        break
+                    if j == i:
+                        continue
+                    clo, chi = proj[j][2], proj[j][3]
+                    overlap = min(hi, chi) - max(lo, clo)
+                    if overlap <= 0:
+                        continue
+                    rank = (clo <= centre <= chi, overlap, -clo)
+                    if best is None or rank > best[0]:
+                        best = (rank, keys[j])
+                        best_edge = edge
+                if best is not None:
+                    self.links[(key, direction)] = best[1]
+
+    def neighbour(self, key, direction):
+        """Return the pane adjacent to key in direction, or None"""
+        return self.links.get((key, direction))
+
+    def target(self, key, direction):
+        """Return the data stored for key under direction, or None"""
+        return self.targets.get(key, {}).get(direction)
+
+
+def benchmark(rows=10, cols=10, queries=100000):
+    """Compare graph lookups against a scan of every pane per query"""
+    import time
+
+    def scan(rects, key, direction):
+        _near, far, lo, hi = _project(rects[key], direction)
+        best = None
+        for other, rect in rects.items():
+            if other == key:
+                continue
+            near, _far, clo, chi = _project(rect, direction)
+            if near >= far and min(hi, chi) > max(lo, clo):
+                if best is None or near < best[0]:
+                    best = (near, other)
+        return best[1] if best else None
+
+    graph = PaneGraph()
+    for r in range(rows):
+        for c in range(cols):
+            graph.add((r, c), c * 84, r * 44, 80, 40)
+    start = time.perf_counter()
+    graph.build()
+    built = time.perf_counter() - start
+    keys = list(graph.rects)
+    start = time.perf_counter()
+    for n in range(queries):
+        graph.neighbour(keys[n % len(keys)], DIRECTIONS[n % 4])
+    looked = time.perf_counter() - start
+    start = time.perf_counter()
+    for n in range(queries):
+        scan(graph.rects, keys[n % len(keys)], DIRECTIONS[n % 4])
+    scanned = time.perf_counter() - start
+    return {'panes': len(graph), 'build_ms': built * 1000.0,
+            'lookup_us': looked / queries * 1e6,
+            'scan_us': scanned / queries * 1e6}
+
+
+if __name__ == '__main__':
+    for k, v in sorted(benchmark().items()):
+        print('%s: %s' % (k, v))
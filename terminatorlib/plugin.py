@@ -21,13 +21,27 @@ True
 >>> plugins[0].do_test()
 'TestPluginWin'
 
+Callbacks wrapped with timed() are accounted to their plugin:
+
+>>> callback = plugins[0].timed(plugins[0].do_test)
+>>> callback()
+'TestPluginWin'
+>>> registry.timings['TestPlugin'].calls
+1
+
 """
 
 import sys
 import os
+import json
+import math
+import time
 from . import borg
+from . import metrics
 from .config import Config
 from .util import dbg, err, get_config_dir
+from .plugin_host import PluginHost
+from .version import APP_VERSION
 # Avoid importing Terminator at module import time to prevent
 # GTK3/GTK4 GI version conflicts. Import lazily where needed.
 
@@ -43,12 +57,163 @@ class Plugin(object):
         """Prepare to be unloaded"""
         pass
 
+    def timed(self, callback):
+        """Wrap a callback this plugin hands to a signal or timer, so the
+        time spent in it is accounted to the plugin"""
+        return PluginRegistry().timed(self, callback)
+
+    def every(self, interval_ms, callback, *args, **kwargs):
+        """Run callback(*args) every interval_ms from the shared Scheduler,
+        until it returns a false value or this plugin is unloaded. Accepts
+        the terminal and pausable keywords of Scheduler.every()"""
+        return Scheduler().every(self, interval_ms, callback, *args, **kwargs)
+
+    def idle(self, callback, *args):
+        """Run callback(*args) once, the next time the main loop is idle"""
+        return Scheduler().idle(self, callback, *args)
+
+    def watch_contents(self, terminal, callback, *args):
+        """Call callback(change, *args) with a ContentsChange when the
+        contents of terminal change, at most once per
+        contents_changed_interval, until cancelled or this plugin is
+        unloaded"""
+        return ContentsWatch().watch(self, terminal, callback, *args)
+
+class PluginTiming(object):
+    """Time spent in one plugin's callbacks"""
+    # Length of the window plugin_cpu_budget applies to, in seconds
+    window = 60.0
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+        self.window_start = None
+        self.window_cpu = 0.0
+        self.disabled = False
+
+    def add(self, wall, cpu, now):
+        """Record one call. Returns the CPU seconds used in the current
+        budget window"""
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        if wall > self.max_wall:
+            self.max_wall = wall
+        if self.window_start is None or now - self.window_start > self.window:
+            self.window_start = now
+            self.window_cpu = 0.0
+        self.window_cpu += cpu
+        return self.window_cpu
+
+    def reset_window(self):
+        """Start a new budget window, as for a plugin enabled again"""
+        self.window_start = None
+        self.window_cpu = 0.0
+        self.disabled = False
+
+class PluginInfo(object):
+    """What the manifest knows about one plugin class, without importing it"""
+
+    def __init__(self, name, path, details):
+        self.name = name
+        self.path = path
+        self.capabilities = details.get('capabilities') or []
+        self.out_of_process = bool(details.get('out_of_process'))
+        # URL handler pattern, shown in the preferences
+        self.match = details.get('match')
+
+    def load(self):
+        """Import the plugin's module and return its class"""
+        plugindir, filename = os.path.split(self.path)
+        if plugindir not in sys.path:
+            sys.path.insert(0, plugindir)
+        module = __import__(filename[:-3], None, None, [''])
+        return getattr(module, self.name)
+
+class PluginManifest(object):
+    """Cache of the classes and capabilities each plugin file provides,
+    keyed by path and checked against the file's mtime and size"""
+    version = 1
+
+    def __init__(self, filename=None):
+        if filename is None:
+            cache = os.environ.get('XDG_CACHE_HOME',
+                                   os.path.join(os.path.expanduser('~'), '.cache'))
+            filename = os.path.join(cache, 'terminator', 'plugin-manifest.json')
+        self.filename = filename
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(filename) as manifest:
+                data = json.load(manifest)
+            if data.get('version') == self.version and \
+                    data.get('terminator') == APP_VERSION:
+                self.entries = data.get('plugins', {})
+        except (IOError, OSError, ValueError, AttributeError):
+            pass
+
+    def _stamp(self, path):
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def lookup(self, path):
+        """Return {class name: details} for path if the cached entry is
+        still current, otherwise None"""
+        entry = self.entries.get(path)
+        try:
+            if entry and entry['stamp'] == self._stamp(path):
+                return entry['classes']
+        except OSError:
+            pass
+        return None
+
+    def scan(self, path):
+        """Import a plugin file and record what it provides"""
+        plugindir, filename = os.path.split(path)
+        if plugindir not in sys.path:
+            sys.path.insert(0, plugindir)
+        module = __import__(filename[:-3], None, None, [''])
+        classes = {}
+        for item in getattr(module, 'AVAILABLE'):
+            func = getattr(module, item)
+            match = getattr(func, 'match', None)
+            classes[item] = {
+                'capabilities': list(getattr(func, 'capabilities', None) or []),
+                'out_of_process': bool(getattr(func, 'out_of_process', False)),
+                'match': match if isinstance(match, str) else None}
+        self.entries[path] = {'stamp': self._stamp(path), 'classes': classes}
+        self.changed = True
+        return classes
+
+    def save(self):
+        """Write the manifest back if anything was rescanned"""
+        if not self.changed:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            tmpname = '%s.%d' % (self.filename, os.getpid())
+            with open(tmpname, 'w') as manifest:
+                json.dump({'version': self.version, 'terminator': APP_VERSION,
+                           'plugins': self.entries}, manifest)
+            os.rename(tmpname, self.filename)
+            self.changed = False
+        except (IOError, OSError) as ex:
+            dbg('Unable to save plugin manifest: %s' % ex)
+
 class PluginRegistry(borg.Borg):
     """Definition of a class to store plugin instances"""
     available_plugins = None
     instances = None
     path = None
     done = None
+    loaded_capabilities = None
+    timings = None
+    manifest = None
+    menu_generations = None
+    cpu_budget = None
+    cpu_budget_watch = None
 
     def __init__(self):
         """Class initialiser"""
@@ -67,8 +232,25 @@ class PluginRegistry(borg.Borg):
             dbg('Plugin path: %s' % self.path)
         if not self.done:
             self.done = False
+        if self.loaded_capabilities is None:
+            self.loaded_capabilities = set()
         if not self.available_plugins:
             self.available_plugins = {}
+        if not self.timings:
+            self.timings = {}
+        if not self.manifest:
+            self.manifest = PluginManifest()
+        if self.menu_generations is None:
+            self.menu_generations = {}
+        if self.cpu_budget_watch is None:
+            # Checked after every plugin callback, so keep it at hand
+            config = Config()
+            self.cpu_budget_watch = config.subscribe(['plugin_cpu_budget'],
+                    lambda snapshot, _keys: self.set_cpu_budget(snapshot))
+            self.set_cpu_budget(config.snapshot())
+
+    def set_cpu_budget(self, snapshot):
+        self.cpu_budget = snapshot.plugin_cpu_budget
 
     def load_plugins(self, force=False, capabilities_filter=None):
         """Load all plugins present in the plugins/ directory in our module.
@@ -77,66 +259,93 @@ class PluginRegistry(borg.Borg):
         only instantiate plugins whose class 'capabilities' intersects with the
         filter. Plugins outside the filter remain discoverable via
         get_available_plugins but are not instantiated.
+
+        What each plugin file provides is read from a cached manifest, so
+        only the modules of enabled plugins that pass the filter are
+        imported. Files that are new or changed since the manifest was
+        written are imported once to refresh it.
+
+        Unless forced, plugins that are already loaded are kept, and a
+        filtered load returns early once its capabilities have been loaded.
         """
-        if self.done and (not force):
+        if not force and (self.done or (capabilities_filter and
+                set(capabilities_filter) <= self.loaded_capabilities)):
             dbg('Already loaded')
             return
 
         dbg('loading plugins, force:(%s)' % force)
 
         config = Config()
+        manifest = self.manifest
 
         for plugindir in self.path:
-            sys.path.insert(0, plugindir)
             try:
                 files = os.listdir(plugindir)
             except OSError:
-                sys.path.remove(plugindir)
                 continue
             for plugin in files:
                 if plugin == '__init__.py':
                     continue
                 pluginpath = os.path.join(plugindir, plugin)
-                if os.path.isfile(pluginpath) and plugin[-3:] == '.py':
-                    dbg('Importing plugin %s' % plugin)
+                if plugin[-3:] != '.py' or not os.path.isfile(pluginpath):
+                    continue
+                entry = manifest.lookup(pluginpath)
+                if entry is None:
+                    dbg('Scanning plugin %s' % plugin)
+                    try:
+                        entry = manifest.scan(pluginpath)
+                    except Exception as ex:
+                        err('PluginRegistry::load_plugins: Importing plugin %s \
+failed: %s' % (plugin, ex))
+                        continue
+                for item, details in entry.items():
+                    if item not in self.available_plugins:
+                        self.available_plugins[item] = PluginInfo(item,
+                                                        pluginpath, details)
+                    info = self.available_plugins[item]
+
+                    if item not in config['enabled_plugins']:
+                        dbg('plugin %s not enabled, skipping' % item)
+                        continue
+                    if info.out_of_process:
+                        # Runs in the plugin host, never in-process
+                        PluginHost().load(item, pluginpath)
+                        continue
+                    # Respect capability filter when instantiating
+                    if capabilities_filter and not \
+                            set(info.capabilities).intersection(set(capabilities_filter)):
+                        continue
                     try:
-                        module = __import__(plugin[:-3], None, None, [''])
-                        for item in getattr(module, 'AVAILABLE'):
-                            func = getattr(module, item)
-                            if item not in list(self.available_plugins.keys()):
-                                self.available_plugins[item] = func
-
-                            if item not in config['enabled_plugins']:
-                                dbg('plugin %s not enabled, skipping' % item)
-                                continue
-                            # Respect capability filter when instantiating
-                            try:
-                                caps = set(getattr(func, 'capabilities', []) or [])
-                            except Exception:
-                                caps = set()
-                            allowed = True
-                            if capabilities_filter:
-                                try:
-                                    allowed = bool(caps.intersection(set(capabilities_filter)))
-                                except Exception:
-                                    allowed = True
-                            if not allowed:
-                                continue
-                            if item not in self.instances:
-                                self.instances[item] = func()
-                            elif force:
-                                #instead of multiple copies of loaded
-                                #plugin objects, unload where plugins
-                                #can clean up and then re-init so there
-                                #is one plugin object
-                                self.instances[item].unload()
-                                self.instances.pop(item, None)
-                                self.instances[item] = func()
+                        if item not in self.instances:
+                            self.instances[item] = info.load()()
+                            # Menus built by an earlier instance are stale
+                            self.menu_changed(item)
+                        elif force:
+                            #instead of multiple copies of loaded
+                            #plugin objects, unload where plugins
+                            #can clean up and then re-init so there
+                            #is one plugin object
+                            self.instances[item].unload()
+                            Scheduler().cancel_plugin(item)
+                            ContentsWatch().cancel_plugin(item)
+                            self.instances.pop(item, None)
+                            self.instances[item] = info.load()()
+                            self.menu_changed(item)
                     except Exception as ex:
                         err('PluginRegistry::load_plugins: Importing plugin %s \
 failed: %s' % (plugin, ex))
 
-        self.done = True
+        manifest.save()
+
+        host = PluginHost()
+        for name in list(host.plugins):
+            if name not in config['enabled_plugins']:
+                host.unload(name)
+
+        if capabilities_filter:
+            self.loaded_capabilities.update(capabilities_filter)
+        else:
+            self.done = True
 
     def get_plugins_by_capability(self, capability):
         """Return a list of plugins with a particular capability"""
@@ -160,21 +369,409 @@ for %s' % (len(self.instances), capability))
     def is_enabled(self, plugin):
         """Return a boolean value indicating whether a plugin is enabled or
         not"""
-        return(plugin in self.instances)
+        return(plugin in self.instances or plugin in PluginHost().plugins)
 
     def enable(self, plugin):
         """Enable a plugin"""
         if plugin in self.instances:
             err("Cannot enable plugin %s, already enabled" % plugin)
         dbg("Enabling %s" % plugin)
-        self.instances[plugin] = self.available_plugins[plugin]()
+        if plugin in self.timings:
+            # Start a fresh budget window, or the CPU time that got it
+            # disabled would disable it again
+            self.timings[plugin].reset_window()
+        info = self.available_plugins[plugin]
+        if info.out_of_process:
+            PluginHost().load(plugin, info.path)
+            return
+        self.instances[plugin] = info.load()()
 
     def disable(self, plugin):
         """Disable a plugin"""
         dbg("Disabling %s" % plugin)
+        if plugin in PluginHost().plugins:
+            PluginHost().unload(plugin)
+            return
         self.instances[plugin].unload()
+        Scheduler().cancel_plugin(plugin)
+        ContentsWatch().cancel_plugin(plugin)
         del(self.instances[plugin])
 
+    def timed(self, plugin, callback):
+        """Return a wrapper around callback that accounts its run time to
+        plugin"""
+        name = plugin.__class__.__name__
+        def _timed(*args, **kwargs):
+            return self.call(name, callback, *args, **kwargs)
+        return _timed
+
+    def call(self, plugin, callback, *args, **kwargs):
+        """Run a plugin callback, accounting its wall and CPU time to
+        plugin, given as an instance or a class name"""
+        name = plugin if isinstance(plugin, str) else plugin.__class__.__name__
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = PluginTiming()
+        if timing.disabled:
+            if name not in self.instances:
+                # Auto-disabled plugins may still have handlers connected
+                return None
+            # Enabled again since
+            timing.reset_window()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            cpu = time.thread_time() - cpu
+            wall = time.perf_counter() - wall
+            used = timing.add(wall, cpu, time.monotonic())
+            metrics.observe('plugin.callback', wall * 1000.0, name)
+            budget = self.cpu_budget
+            if budget and used * 1000.0 > budget:
+                self.over_budget(name, used)
+
+    def over_budget(self, name, used):
+        """Disable a plugin that used more CPU than plugin_cpu_budget"""
+        timing = self.timings[name]
+        timing.disabled = True
+        err('Plugin %s used %dms of CPU in %ds, more than plugin_cpu_budget. \
+Disabling it.' % (name, used * 1000, timing.window))
+        config = Config()
+        if name in config['enabled_plugins']:
+            config['enabled_plugins'] = [x for x in config['enabled_plugins']
+                                         if x != name]
+        if name in self.instances:
+            try:
+                self.disable(name)
+            except Exception as ex:
+                err('PluginRegistry::over_budget: unloading %s failed: %s' %
+                    (name, ex))
+
+    def get_timings(self):
+        """Return {plugin name: PluginTiming} for every plugin that has had
+        a callback run"""
+        return dict(self.timings)
+
+    def menu_changed(self, plugin):
+        """Note that the context menu items of plugin, given as an instance
+        or a class name, must be built again. Called for every new instance
+        a load creates, too"""
+        name = plugin if isinstance(plugin, str) else plugin.__class__.__name__
+        self.menu_generations[name] = self.menu_generations.get(name, 0) + 1
+
+    def menu_generation(self, plugin):
+        """Return a number that changes whenever menu_changed() is called
+        for plugin"""
+        name = plugin if isinstance(plugin, str) else plugin.__class__.__name__
+        return self.menu_generations.get(name, 0)
+
+class Job(object):
+    """A periodic or one-off callback run by the Scheduler"""
+
+    def __init__(self, plugin, interval, callback, args, terminal=None,
+                 pausable=False):
+        self.plugin = plugin
+        # Seconds between runs, None for a one-off idle job
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.terminal = terminal
+        self.pausable = pausable
+        self.due = 0.0
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop running this job"""
+        Scheduler().cancel(self)
+
+class Scheduler(borg.Borg):
+    """Runs the periodic and idle work of all plugins from one main loop
+    source.
+
+    Periodic jobs are due on multiples of their interval, so jobs with the
+    same interval share wakeups, and every job due within SLACK of a wakeup
+    runs in it. Pausable jobs are skipped while no window has focus or while
+    their terminal is not shown. The registry cancels the jobs of a plugin
+    when it is unloaded."""
+    # Seconds a job may run early to share a wakeup with another
+    SLACK = 0.05
+    jobs = None
+    source = None
+    wakeup = None
+
+    def __init__(self):
+        """Class initialiser"""
+        borg.Borg.__init__(self, self.__class__.__name__)
+        self.prepare_attributes()
+
+    def prepare_attributes(self):
+        """Prepare our attributes"""
+        if self.jobs is None:
+            self.jobs = []
+
+    def every(self, plugin, interval_ms, callback, *args, terminal=None,
+              pausable=False):
+        """Run callback(*args) every interval_ms on behalf of plugin, given
+        as an instance or a class name, until it returns a false value.
+        A pausable job does not run while Terminator is unfocused or, when
+        terminal is given, while that terminal is not shown."""
+        interval = max(interval_ms, 1) / 1000.0
+        job = Job(_plugin_name(plugin), interval, callback, args, terminal,
+                  pausable)
+        job.due = _next_multiple(time.monotonic(), interval)
+        self.jobs.append(job)
+        self._schedule()
+        return job
+
+    def idle(self, plugin, callback, *args):
+        """Run callback(*args) once, on behalf of plugin, the next time the
+        main loop is idle"""
+        job = Job(_plugin_name(plugin), None, callback, args)
+        job.due = time.monotonic()
+        self.jobs.append(job)
+        self._schedule()
+        return job
+
+    def cancel(self, job):
+        """Stop running a job"""
+        job.cancelled = True
+        if job in self.jobs:
+            self.jobs.remove(job)
+        if not self.jobs:
+            self._unschedule()
+
+    def cancel_plugin(self, plugin):
+        """Cancel every job of plugin"""
+        name = _plugin_name(plugin)
+        for job in [x for x in self.jobs if x.plugin == name]:
+            self.cancel(job)
+
+    def _unschedule(self):
+        if self.source is not None:
+            from gi.repository import GLib
+            GLib.source_remove(self.source)
+            self.source = None
+            self.wakeup = None
+
+    def _schedule(self):
+        """Arrange to wake up when the earliest job is due"""
+        if not self.jobs:
+            self._unschedule()
+            return
+        due = min([job.due for job in self.jobs])
+        if self.source is not None and self.wakeup <= due:
+            return
+        from gi.repository import GLib
+        self._unschedule()
+        delay = int(max(0.0, due - time.monotonic()) * 1000)
+        self.wakeup = due
+        if delay == 0:
+            self.source = GLib.idle_add(self._run)
+        else:
+            self.source = GLib.timeout_add(delay, self._run)
+
+    def _paused(self, job):
+        if job.terminal is not None:
+            try:
+                if not job.terminal.get_mapped():
+                    return True
+            except Exception:
+                pass
+        return not _has_focus()
+
+    def _run(self):
+        self.source = None
+        self.wakeup = None
+        now = time.monotonic()
+        registry = PluginRegistry()
+        for job in list(self.jobs):
+            if job.cancelled or job.due > now + self.SLACK:
+                continue
+            if job.interval is None:
+                self.jobs.remove(job)
+            else:
+                job.due += job.interval
+                if job.due <= now:
+                    job.due = _next_multiple(now, job.interval)
+                if job.pausable and self._paused(job):
+                    continue
+            try:
+                keep = registry.call(job.plugin, job.callback, *job.args)
+            except Exception as ex:
+                err('Scheduler: job of plugin %s failed: %s' % (job.plugin, ex))
+                keep = False
+            if job.interval is not None and not keep:
+                self.cancel(job)
+        self._schedule()
+        return False
+
+class ContentsChange(object):
+    """What a terminal's contents-changed signals since the last dispatch
+    amount to, worked out once for all subscribers"""
+
+    def __init__(self, terminal, vte, previous, cursor, signals):
+        self.terminal = terminal
+        self.vte = vte
+        # Cursor (column, row) at the last dispatch and now
+        self.previous = previous
+        self.cursor = cursor
+        # Number of contents-changed emissions coalesced into this one
+        self.signals = signals
+
+    @property
+    def new_rows(self):
+        """Number of rows the cursor moved down"""
+        return max(0, self.cursor[1] - self.previous[1])
+
+class Subscription(object):
+    """A callback subscribed to a terminal's ContentsDispatcher"""
+
+    def __init__(self, plugin, dispatcher, callback, args):
+        self.plugin = plugin
+        self.dispatcher = dispatcher
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop calling this subscription"""
+        ContentsWatch().cancel(self)
+
+class ContentsDispatcher(object):
+    """The one contents-changed handler of a terminal. Output floods emit
+    the signal for every repaint, so emissions are coalesced to one
+    dispatch per contents_changed_interval"""
+
+    def __init__(self, terminal, interval):
+        self.terminal = terminal
+        self.vte = terminal.get_vte() if hasattr(terminal, 'get_vte') else terminal
+        self.interval = interval
+        self.subscribers = []
+        self.signals = 0
+        self.source = None
+        self.cursor = self.vte.get_cursor_position()
+        self.handler = self.vte.connect('contents-changed', self._on_changed)
+
+    def close(self):
+        from gi.repository import GLib
+        try:
+            self.vte.disconnect(self.handler)
+        except Exception:
+            pass
+        if self.source is not None:
+            GLib.source_remove(self.source)
+            self.source = None
+
+    def _on_changed(self, _vte):
+        self.signals += 1
+        if self.source is not None:
+            return
+        from gi.repository import GLib
+        if self.interval > 0:
+            self.source = GLib.timeout_add(self.interval, self._dispatch)
+        else:
+            self.source = GLib.idle_add(self._dispatch)
+
+    def _dispatch(self):
+        self.source = None
+        cursor = self.vte.get_cursor_position()
+        change = ContentsChange(self.terminal, self.vte, self.cursor, cursor,
+                                self.signals)
+        self.cursor = cursor
+        self.signals = 0
+        metrics.inc('contents.dispatches')
+        registry = PluginRegistry()
+        for sub in list(self.subscribers):
+            if sub.cancelled:
+                continue
+            try:
+                if sub.plugin is None:
+                    sub.callback(change, *sub.args)
+                else:
+                    registry.call(sub.plugin, sub.callback, change, *sub.args)
+            except Exception as ex:
+                err('ContentsDispatcher: %s failed: %s' %
+                    (sub.plugin or sub.callback, ex))
+        return False
+
+class ContentsWatch(borg.Borg):
+    """Keeps one ContentsDispatcher per watched terminal, keyed by its
+    Vte.Terminal"""
+    dispatchers = None
+    interval_watch = None
+
+    def __init__(self):
+        """Class initialiser"""
+        borg.Borg.__init__(self, self.__class__.__name__)
+        self.prepare_attributes()
+
+    def prepare_attributes(self):
+        """Prepare our attributes"""
+        if self.dispatchers is None:
+            self.dispatchers = {}
+        if self.interval_watch is None:
+            # Dispatchers already running pick up a new interval too
+            self.interval_watch = Config().subscribe(
+                    ['contents_changed_interval'],
+                    lambda snapshot, _keys: self.set_interval(snapshot))
+
+    def set_interval(self, snapshot):
+        for dispatcher in self.dispatchers.values():
+            dispatcher.interval = snapshot.contents_changed_interval
+
+    def watch(self, plugin, terminal, callback, *args):
+        """Subscribe callback(change, *args) to the contents changes of
+        terminal. plugin, an instance or a class name, is charged for the
+        time spent; None for Terminator's own subscribers"""
+        vte = terminal.get_vte() if hasattr(terminal, 'get_vte') else terminal
+        dispatcher = self.dispatchers.get(vte)
+        if dispatcher is None:
+            dispatcher = ContentsDispatcher(
+                terminal, Config()['contents_changed_interval'])
+            self.dispatchers[vte] = dispatcher
+        name = None if plugin is None else _plugin_name(plugin)
+        sub = Subscription(name, dispatcher, callback, args)
+        dispatcher.subscribers.append(sub)
+        return sub
+
+    def cancel(self, sub):
+        """Remove a subscription, and the dispatcher once it has none"""
+        sub.cancelled = True
+        dispatcher = sub.dispatcher
+        if sub in dispatcher.subscribers:
+            dispatcher.subscribers.remove(sub)
+        if not dispatcher.subscribers:
+            dispatcher.close()
+            self.dispatchers.pop(dispatcher.vte, None)
+
+    def cancel_plugin(self, plugin):
+        """Remove every subscription of plugin"""
+        name = _plugin_name(plugin)
+        for dispatcher in list(self.dispatchers.values()):
+            for sub in [x for x in dispatcher.subscribers if x.plugin == name]:
+                self.cancel(sub)
+
+def _plugin_name(plugin):
+    return plugin if isinstance(plugin, str) else plugin.__class__.__name__
+
+def _next_multiple(now, interval):
+    """The first multiple of interval after now"""
+    return (math.floor(now / interval) + 1) * interval
+
+def _has_focus():
+    """Whether a window of the application has focus. True when that cannot
+    be told"""
+    try:
+        from gi.repository import Gio
+        app = Gio.Application.get_default()
+        windows = app.get_windows() if app is not None else []
+    except Exception:
+        return True
+    if not windows:
+        return True
+    return any([window.is_active() for window in windows])
+
 # This is where we should define a base class for each type of plugin we
 # support
 
@@ -229,11 +826,18 @@ class URLHandler(Plugin):
 class MenuItem(Plugin):
     """Base class for menu items"""
     capabilities = ['terminal_menu']
+    # Set to True when callback() builds the same items every time until
+    # menu_changed() is called, so they can be reused across right-clicks
+    cache_menu = False
 
     def callback(self, menuitems, menu, terminal):
         """Callback to transform the enclosed URL"""
         raise NotImplementedError
 
+    def menu_changed(self):
+        """Have the menu items of this plugin built again next time"""
+        PluginRegistry().menu_changed(self)
+
 
 """
 -Basic plugin util for key-press handling, has all mapping to be used
@@ -4,6 +4,7 @@ from gi.repository import Gtk
 
 from .translation import _
 from .config import Config
+from .util import err
 
 
 def show_custom_commands_dialog(plugin, parent_widget=None):
@@ -440,6 +441,9 @@ def show_remote_prefs_dialog(plugin, parent_widget=None):
     chk_infer = Gtk.CheckButton(label=_('Infer working directory on clone'))
     chk_infer.set_active(bool(cur.get('infer_cwd', True)))
     grid.attach(chk_infer, 0, row, 2, 1); row += 1
+    chk_mux = Gtk.CheckButton(label=_('Share SSH connections between clones'))
+    chk_mux.set_active(bool(cur.get('ssh_multiplex', True)))
+    grid.attach(chk_mux, 0, row, 2, 1); row += 1
 
     grid.attach(Gtk.Label(label=_('Default SSH profile'), xalign=0), 0, row, 1, 1)
     combo_ssh = Gtk.ComboBoxText(); [combo_ssh.append_text(p) for p in profiles]
@@ -467,14 +471,18 @@ def show_remote_prefs_dialog(plugin, parent_widget=None):
                 user = {
                     'auto_clone': str(bool(chk_auto.get_active())),
                     'infer_cwd': str(bool(chk_infer.get_active())),
+                    'ssh_multiplex': str(bool(chk_mux.get_active())),
+                    'ssh_control_persist': str(cur.get('ssh_control_persist', 600)),
                     'ssh_default_profile': combo_ssh.get_active_text() or '',
                     'container_default_profile': combo_ctr.get_active_text() or '',
                 }
                 cfg.plugin_set_config(plugin.__class__.__name__, user)
                 cfg.save()
                 plugin.config = plugin.get_config()
-            except Exception:
-                pass
+                if hasattr(plugin, 'apply_multiplex'):
+                    plugin.apply_multiplex()
+            except Exception as ex:
+                err('Saving Remote preferences failed: %s' % ex)
         d.destroy()
     dlg.connect('response', on_resp)
     dlg.present()
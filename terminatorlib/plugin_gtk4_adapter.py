@@ -11,7 +11,7 @@ from __future__ import annotations
 from typing import Callable, List, Optional, Tuple, Any, Dict
 from gi.repository import Gio, GLib
 
-from .plugin import PluginRegistry
+from .plugin import PluginRegistry, Plugin
 
 
 class FakeMenu:
@@ -231,6 +231,10 @@ def _build_gio_menu_from_fake(menu: FakeMenu, terminal, action_prefix: str,
                 def make_cb(cbs):
                     def _runner(_action, _param):
                         for func, args in cbs:
+                            # Account activations to the plugin that owns them
+                            owner = getattr(func, '__self__', None)
+                            if isinstance(owner, Plugin):
+                                func = PluginRegistry().timed(owner, func)
                             try:
                                 func(None, *args)
                             except TypeError:
@@ -310,102 +314,167 @@ def _append_radio_group(section: Gio.Menu, items: List[FakeRadioMenuItem], actio
         section.append_item(mitem)
 
 
+def _patch_gtk() -> tuple:
+    """Overlay gi.repository.Gtk with the fake menu classes, so GTK3-era
+    plugins build Fake structures. Returns what _restore_gtk() needs."""
+    from gi.repository import Gtk as RealGtk
+
+    class Image:
+        def set_from_icon_name(self, *args, **kwargs):
+            pass
+
+    class IconTheme:
+        @staticmethod
+        def get_default():
+            return IconTheme()
+        def choose_icon(self, *args, **kwargs):
+            return None
+
+    class GtkShim:
+        Menu = FakeMenu
+        MenuItem = FakeMenuItem
+        ImageMenuItem = FakeMenuItem
+        SeparatorMenuItem = FakeSeparatorMenuItem
+        CheckMenuItem = FakeCheckMenuItem
+        RadioMenuItem = FakeRadioMenuItem
+        Image = Image
+        class IconSize:
+            MENU = 0
+        class IconLookupFlags:
+            USE_BUILTIN = 0
+
+    # Save originals to restore later
+    saved = {}
+    for name in ('Menu','MenuItem','ImageMenuItem','SeparatorMenuItem','CheckMenuItem','RadioMenuItem','Image','IconTheme','IconSize','IconLookupFlags'):
+        saved[name] = getattr(RealGtk, name, None)
+    # Apply
+    RealGtk.Menu = GtkShim.Menu
+    RealGtk.MenuItem = GtkShim.MenuItem
+    RealGtk.ImageMenuItem = GtkShim.ImageMenuItem
+    RealGtk.SeparatorMenuItem = GtkShim.SeparatorMenuItem
+    RealGtk.CheckMenuItem = GtkShim.CheckMenuItem
+    RealGtk.RadioMenuItem = GtkShim.RadioMenuItem
+    RealGtk.Image = GtkShim.Image
+    RealGtk.IconTheme = IconTheme
+    RealGtk.IconSize = GtkShim.IconSize
+    RealGtk.IconLookupFlags = GtkShim.IconLookupFlags
+    return RealGtk, saved
+
+
+def _restore_gtk(real_gtk, saved):
+    for name, val in saved.items():
+        try:
+            if val is None:
+                delattr(real_gtk, name)
+            else:
+                setattr(real_gtk, name, val)
+        except Exception:
+            pass
+
+
+def _menu_cache(terminal) -> Dict[str, Any]:
+    """Per-terminal cache of plugin menu items and of the last built model"""
+    cache = getattr(terminal, '_plugin_menu_cache', None)
+    if cache is None:
+        cache = {'plugins': {}, 'key': None, 'result': (None, [])}
+        try:
+            terminal._plugin_menu_cache = cache
+        except Exception:
+            pass
+    return cache
+
+
 def build_plugin_menu_for_terminal(terminal) -> Tuple[Optional[Gio.MenuModel], List[Tuple[str, Any]]]:
     """Collect plugin menu items and convert to Gio.MenuModel and action list.
 
     Returns (menu_model, actions). actions is a list of (action_name, callback)
     to be installed on the terminal's SimpleActionGroup as 'term.<action_name>'.
+
+    Items of plugins with cache_menu set are kept per terminal until the
+    plugin calls menu_changed() or is reloaded. When every plugin's items
+    are cached, the previous (menu_model, actions) is returned as is.
     """
+    registry = PluginRegistry()
     try:
-        registry = PluginRegistry()
-        # Load only terminal_menu plugins to avoid instantiating URL handlers
-        registry.load_plugins(force=True, capabilities_filter={'terminal_menu'})
+        # Load only terminal_menu plugins to avoid instantiating URL handlers.
+        # Plugins already loaded are reused, with their state.
+        registry.load_plugins(capabilities_filter={'terminal_menu'})
         plugins = registry.get_plugins_by_capability('terminal_menu')
     except Exception:
         plugins = []
 
-    collector = FakeMenu()
-    items: List[FakeMenuItem] = []
-
-    # Ask all plugins to populate using GTK shims to capture GTK3 MenuItems
-    # and CheckMenuItems into our Fake structures.
-    def _patch_gtk_for_callback() -> tuple:
-        # Build a small shim overlay on gi.repository.Gtk for menu APIs
-        import gi
-        from gi.repository import Gtk as RealGtk
-
-        class Image:
-            def set_from_icon_name(self, *args, **kwargs):
-                pass
-
-        class IconTheme:
-            @staticmethod
-            def get_default():
-                return IconTheme()
-            def choose_icon(self, *args, **kwargs):
-                return None
-
-        class GtkShim:
-            Menu = FakeMenu
-            MenuItem = FakeMenuItem
-            ImageMenuItem = FakeMenuItem
-            SeparatorMenuItem = FakeSeparatorMenuItem
-            CheckMenuItem = FakeCheckMenuItem
-            RadioMenuItem = FakeRadioMenuItem
-            Image = Image
-            class IconSize:
-                MENU = 0
-            class IconLookupFlags:
-                USE_BUILTIN = 0
-
-        # Save originals to restore later
-        saved = {}
-        for name in ('Menu','MenuItem','ImageMenuItem','SeparatorMenuItem','CheckMenuItem','RadioMenuItem','Image','IconTheme','IconSize','IconLookupFlags'):
-            saved[name] = getattr(RealGtk, name, None)
-        # Apply
-        RealGtk.Menu = GtkShim.Menu
-        RealGtk.MenuItem = GtkShim.MenuItem
-        RealGtk.ImageMenuItem = GtkShim.ImageMenuItem
-        RealGtk.SeparatorMenuItem = GtkShim.SeparatorMenuItem
-        RealGtk.CheckMenuItem = GtkShim.CheckMenuItem
-        RealGtk.RadioMenuItem = GtkShim.RadioMenuItem
-        RealGtk.Image = GtkShim.Image
-        RealGtk.IconTheme = IconTheme
-        RealGtk.IconSize = GtkShim.IconSize
-        RealGtk.IconLookupFlags = GtkShim.IconLookupFlags
-        return RealGtk, saved
-
-    def _restore_gtk(real_gtk, saved):
-        for name, val in saved.items():
-            try:
-                if val is None:
-                    delattr(real_gtk, name)
-                else:
-                    setattr(real_gtk, name, val)
-            except Exception:
-                pass
-
-    for plugin in plugins:
-        # Patch GTK types only around the callback
+    cache = _menu_cache(terminal)
+    cached = cache['plugins']
+    # The generation changes with the plugin's menu and with every load of
+    # the plugin, so a reloaded plugin never matches a stale entry
+    keys = [(plugin.__class__.__name__, registry.menu_generation(plugin))
+            for plugin in plugins]
+    stale = [i for i, plugin in enumerate(plugins)
+             if not getattr(plugin, 'cache_menu', False)
+             or cached.get(plugin.__class__.__name__, (None,))[0] != keys[i]]
+    if not stale and cache['key'] == keys:
+        return cache['result']
+
+    if stale:
+        # Ask plugins to populate using GTK shims to capture GTK3 MenuItems
+        # and CheckMenuItems into our Fake structures. Patch GTK types only
+        # around the callbacks.
+        RealGtk, saved = _patch_gtk()
         try:
-            RealGtk, saved = _patch_gtk_for_callback()
-            try:
-                plugin.callback(items, collector, terminal)
-            finally:
-                _restore_gtk(RealGtk, saved)
-        except Exception:
-            continue
-
-    # If plugins added directly to list, append them to the collector
-    for it in items:
-        if isinstance(it, FakeMenuItem):
-            collector.append(it)
-        elif getattr(it, '__class__', None).__name__ == 'SeparatorMenuItem':
-            collector.append(FakeSeparatorMenuItem())
+            for i in stale:
+                plugin = plugins[i]
+                menu = FakeMenu()
+                items: List[FakeMenuItem] = []
+                key = keys[i]
+                try:
+                    registry.call(plugin, plugin.callback, items, menu, terminal)
+                except Exception:
+                    # Keep what was added, but try again next time
+                    key = None
+                cached[plugin.__class__.__name__] = (key, menu.items, items)
+        finally:
+            _restore_gtk(RealGtk, saved)
+
+    names = [plugin.__class__.__name__ for plugin in plugins]
+    for name in list(cached):
+        if name not in names:
+            del cached[name]
+
+    # Items added to the menu come first, then those the plugins added to
+    # the list, as when all plugins shared one menu and one list
+    collector = FakeMenu()
+    for name in names:
+        collector.items.extend(cached[name][1])
+    for name in names:
+        for it in cached[name][2]:
+            if isinstance(it, FakeMenuItem):
+                collector.append(it)
+            elif getattr(it, '__class__', None).__name__ == 'SeparatorMenuItem':
+                collector.append(FakeSeparatorMenuItem())
 
     if not collector.items:
-        return None, []
-
-    actions: List[Tuple[str, Any]] = []
-    menu_model = _build_gio_menu_from_fake(collector, terminal, 'plugin', actions)
-    return menu_model, actions
+        result = (None, [])
+    else:
+        actions: List[Tuple[str, Any]] = []
+        menu_model = _build_gio_menu_from_fake(collector, terminal, 'plugin', actions)
+        result = (menu_model, actions)
+    cache['key'] = keys
+    cache['result'] = result
+    return result
+
+
+def benchmark(terminal, count=200):
+    """Time plugin menu builds for terminal, in milliseconds: the first,
+    uncached build, then the mean of count builds as on each right-click"""
+    import time
+    cache = _menu_cache(terminal)
+    cache['key'] = None
+    cache['plugins'].clear()
+    start = time.perf_counter()
+    build_plugin_menu_for_terminal(terminal)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _n in range(count):
+        build_plugin_menu_for_terminal(terminal)
+    warm = (time.perf_counter() - start) / count
+    return {'cold_ms': cold * 1000.0, 'warm_ms': warm * 1000.0}
@@ -0,0 +1,297 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""plugin_host.py - Bridge between Terminator and the plugin host process
+
+PluginHost starts the helper process from hosted_plugin.py the first time a
+HostedPlugin is loaded. It forwards the terminal events the hosted plugins
+subscribe to, reading terminal output through the shared contents
+dispatcher of terminatorlib.plugin, and carries out the
+actions they send back on the main loop. Pipes are non-blocking both ways.
+Output events are dropped rather than queued without bound when the helper
+falls behind.
+"""
+
+import os
+import sys
+import json
+
+from .borg import Borg
+
+# Outgoing bytes buffered for the helper before text events are dropped
+MAX_BACKLOG = 1 << 20
+
+
+class PluginHost(Borg):
+    """Terminator side of the bridge: starts the helper process, forwards
+    terminal events to it and carries out the actions it sends back"""
+    process = None
+    plugins = None
+    events = None
+    terminals = None
+    outbuf = None
+    inbuf = None
+    read_watch = None
+    write_watch = None
+
+    def __init__(self):
+        Borg.__init__(self, self.__class__.__name__)
+        self.prepare_attributes()
+
+    def prepare_attributes(self):
+        if self.plugins is None:
+            self.plugins = {}
+            self.events = set()
+            self.terminals = {}
+            self.outbuf = b''
+            self.inbuf = b''
+
+    def load(self, name, path):
+        """Load a HostedPlugin class from a plugin file into the helper"""
+        if name in self.plugins:
+            return
+        self.plugins[name] = path
+        self.start()
+        self.send({'op': 'load', 'name': name, 'path': path})
+
+    def unload(self, name):
+        if self.plugins.pop(name, None) is not None:
+            self.send({'op': 'unload', 'name': name})
+        if not self.plugins:
+            self.stop()
+
+    def start(self):
+        if self.process is not None:
+            return
+        import subprocess
+        import fcntl
+        from gi.repository import GLib
+        from .util import dbg
+        env = dict(os.environ)
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [package_root] + [p for p in [env.get('PYTHONPATH')] if p])
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'terminatorlib.hosted_plugin'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+            close_fds=True)
+        for stream in (self.process.stdin, self.process.stdout):
+            flags = fcntl.fcntl(stream.fileno(), fcntl.F_GETFL)
+            fcntl.fcntl(stream.fileno(), fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        # Reap the helper whenever it exits
+        GLib.child_watch_add(GLib.PRIORITY_DEFAULT, self.process.pid,
+                             lambda *args: None)
+        self.read_watch = GLib.io_add_watch(
+            self.process.stdout.fileno(), GLib.PRIORITY_DEFAULT,
+            GLib.IOCondition.IN | GLib.IOCondition.HUP, self._on_readable)
+        dbg('plugin host started, pid %d' % self.process.pid)
+        self._attach_existing()
+
+    def stop(self):
+        if self.process is None:
+            return
+        from gi.repository import GLib
+        for watch in (self.read_watch, self.write_watch):
+            if watch is not None:
+                GLib.source_remove(watch)
+        self.read_watch = self.write_watch = None
+        try:
+            self.process.stdin.write(b'{"op": "quit"}\n')
+            self.process.stdin.close()
+        except (IOError, OSError, ValueError):
+            pass
+        self.process = None
+        self.outbuf = b''
+        self.inbuf = b''
+        self.events = set()
+        self._detach_all()
+
+    def send(self, message, droppable=False):
+        """Queue a message for the helper. Droppable messages are discarded
+        while the helper is too far behind"""
+        if self.process is None:
+            return
+        if droppable and len(self.outbuf) > MAX_BACKLOG:
+            return
+        from gi.repository import GLib
+        pending = bool(self.outbuf)
+        self.outbuf += (json.dumps(message) + '\n').encode('utf-8')
+        if not pending:
+            self.write_watch = GLib.io_add_watch(
+                self.process.stdin.fileno(), GLib.PRIORITY_DEFAULT,
+                GLib.IOCondition.OUT, self._on_writable)
+
+    def _on_writable(self, fd, _condition):
+        try:
+            written = os.write(fd, self.outbuf)
+        except BlockingIOError:
+            return True
+        except OSError:
+            self.write_watch = None
+            self.stop()
+            return False
+        self.outbuf = self.outbuf[written:]
+        if self.outbuf:
+            return True
+        self.write_watch = None
+        return False
+
+    def _on_readable(self, fd, condition):
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        if not data:
+            from .util import err
+            err('plugin host exited')
+            self.read_watch = None
+            self.stop()
+            return False
+        self.inbuf += data
+        *lines, self.inbuf = self.inbuf.split(b'\n')
+        for line in lines:
+            try:
+                self._dispatch(json.loads(line))
+            except ValueError:
+                pass
+        return True
+
+    def _dispatch(self, action):
+        from .util import dbg, err
+        op = action.get('op')
+        if op == 'subscribe':
+            self.events = set(action.get('events', []))
+            for terminal in list(self.terminals):
+                self._detach(terminal)
+                self._attach(terminal, announce=False)
+            return
+        if op == 'log':
+            err('plugin host: %s' % action.get('message'))
+            return
+        if op == 'notify':
+            self._notify(action.get('summary', ''), action.get('body', ''))
+            return
+        terminal = self._find(action.get('uuid'))
+        if terminal is None:
+            dbg('plugin host: no terminal %s for %s' % (action.get('uuid'), op))
+            return
+        if op == 'feed':
+            _vte(terminal).feed_child(action.get('text', '').encode('utf-8'))
+        elif op == 'set_profile':
+            terminal.set_profile(None, action.get('profile'))
+
+    def _notify(self, summary, body):
+        from gi.repository import Gio
+        app = Gio.Application.get_default()
+        if app is None:
+            from .util import dbg
+            dbg('plugin host notification: %s: %s' % (summary, body))
+            return
+        notification = Gio.Notification.new(summary)
+        notification.set_body(body)
+        app.send_notification(None, notification)
+
+    # Terminal wiring
+
+    def _find(self, uuid):
+        for terminal in self.terminals:
+            if _uuid(terminal) == uuid:
+                return terminal
+        return None
+
+    def _attach_existing(self):
+        from .terminator import Terminator
+        terminator = Terminator()
+        terminator.connect_terminal_event('terminal-added', self._on_added)
+        terminator.connect_terminal_event('terminal-removed', self._on_removed)
+        for terminal in terminator.terminals:
+            self._attach(terminal)
+
+    def _detach_all(self):
+        from .terminator import Terminator
+        terminator = Terminator()
+        terminator.disconnect_terminal_event('terminal-added', self._on_added)
+        terminator.disconnect_terminal_event('terminal-removed', self._on_removed)
+        for terminal in list(self.terminals):
+            self._detach(terminal)
+
+    def _on_added(self, terminal):
+        self._attach(terminal)
+
+    def _on_removed(self, terminal):
+        if terminal in self.terminals:
+            self._detach(terminal)
+            self.send({'op': 'event', 'event': 'terminal-removed',
+                       'uuid': _uuid(terminal)})
+
+    def _attach(self, terminal, announce=True):
+        vte = _vte(terminal)
+        state = {'ids': [], 'row': None, 'contents': None}
+        self.terminals[terminal] = state
+        if announce:
+            self.send({'op': 'event', 'event': 'terminal-added',
+                       'uuid': _uuid(terminal), 'cwd': _call(terminal, 'get_cwd'),
+                       'pid': getattr(terminal, 'pid', None),
+                       'title': _call(terminal, 'get_window_title'),
+                       'profile': _call(terminal, 'get_profile')})
+        if 'title' in self.events:
+            state['ids'].append(vte.connect('window-title-changed',
+                                            self._on_title, terminal))
+        if 'text' in self.events:
+            from .plugin import ContentsWatch
+            state['row'] = vte.get_cursor_position()[1]
+            state['contents'] = ContentsWatch().watch(None, terminal,
+                                                      self._on_contents,
+                                                      terminal)
+
+    def _detach(self, terminal):
+        state = self.terminals.pop(terminal, None)
+        if state is None:
+            return
+        vte = _vte(terminal)
+        for sigid in state['ids']:
+            try:
+                vte.disconnect(sigid)
+            except Exception:
+                pass
+        if state['contents'] is not None:
+            state['contents'].cancel()
+
+    def _on_title(self, vte, terminal):
+        self.send({'op': 'event', 'event': 'title', 'uuid': _uuid(terminal),
+                   'title': vte.get_window_title() or ''})
+
+    def _on_contents(self, change, terminal):
+        state = self.terminals.get(terminal)
+        if state is None:
+            return
+        vte = change.vte
+        row = change.cursor[1]
+        if row > state['row']:
+            text = vte.get_text_range(state['row'], 0, row - 1,
+                                      vte.get_column_count() - 1)
+            if isinstance(text, (list, tuple)):
+                text = text[0]
+            state['row'] = row
+            if text:
+                self.send({'op': 'event', 'event': 'text',
+                           'uuid': _uuid(terminal), 'text': text},
+                          droppable=True)
+
+
+def _vte(terminal):
+    """The Vte.Terminal of a GTK3 Terminal or a GTK4 terminal"""
+    return terminal.get_vte() if hasattr(terminal, 'get_vte') else terminal
+
+
+def _uuid(terminal):
+    uuid = getattr(terminal, 'uuid', None)
+    return getattr(uuid, 'urn', uuid)
+
+
+def _call(terminal, method):
+    try:
+        return getattr(terminal, method)()
+    except Exception:
+        return None
@@ -5,7 +5,6 @@
 import time
 import gi
 from gi.repository import Gtk
-from gi.repository import GObject
 
 from terminatorlib.config import Config
 import terminatorlib.plugin as plugin
@@ -34,6 +33,7 @@ hush_period = float(config.plugin_get('ActivityWatch', 'hush_period',
 class ActivityWatch(plugin.MenuItem):
     """Add custom commands to the terminal menu"""
     capabilities = ['terminal_menu']
+    cache_menu = True
     watches = None
     last_notifies = None
     timers = None
@@ -49,6 +49,11 @@ class ActivityWatch(plugin.MenuItem):
 
         Notify.init(APP_NAME.capitalize())
 
+    def unload(self):
+        """Stop watching all terminals"""
+        for terminal in list(self.watches):
+            self.unwatch(None, terminal)
+
     def callback(self, menuitems, menu, terminal):
         """Add our menu item to the menu"""
         item = Gtk.CheckMenuItem.new_with_mnemonic(_('Watch for _activity'))
@@ -62,18 +67,18 @@ class ActivityWatch(plugin.MenuItem):
 
     def watch(self, _widget, terminal):
         """Watch a terminal"""
-        vte = terminal.get_vte()
-        self.watches[terminal] = vte.connect('contents-changed', 
-                                             self.notify, terminal)
+        self.watches[terminal] = self.watch_contents(terminal, self.notify)
+        self.menu_changed()
 
     def unwatch(self, _widget, terminal):
         """Stop watching a terminal"""
-        vte = terminal.get_vte()
-        vte.disconnect(self.watches[terminal])
+        self.watches[terminal].cancel()
         del(self.watches[terminal])
+        self.menu_changed()
 
-    def notify(self, _vte, terminal):
+    def notify(self, change):
         """Notify that a terminal did something"""
+        terminal = change.terminal
         show_notify = False
 
         # Don't notify if the user is already looking at this terminal.
@@ -100,6 +105,7 @@ class ActivityWatch(plugin.MenuItem):
 class InactivityWatch(plugin.MenuItem):
     """Add custom commands to notify when a terminal goes inactive"""
     capabilities = ['terminal_menu']
+    cache_menu = True
     watches = None
     last_activities = None
     timers = None
@@ -115,6 +121,11 @@ class InactivityWatch(plugin.MenuItem):
 
         Notify.init(APP_NAME.capitalize())
 
+    def unload(self):
+        """Stop watching all terminals"""
+        for terminal in list(self.watches):
+            self.unwatch(None, terminal)
+
     def callback(self, menuitems, menu, terminal):
         """Add our menu item to the menu"""
         item = Gtk.CheckMenuItem.new_with_mnemonic(_("Watch for _silence"))
@@ -128,23 +139,23 @@ class InactivityWatch(plugin.MenuItem):
 
     def watch(self, _widget, terminal):
         """Watch a terminal"""
-        vte = terminal.get_vte()
-        self.watches[terminal] = vte.connect('contents-changed',
-                                             self.reset_timer, terminal)
-        timeout_id = GObject.timeout_add(watch_interval, self.check_times, terminal)
-        self.timers[terminal] = timeout_id
-        dbg('timer %s added for %s' %(timeout_id, terminal))
+        self.watches[terminal] = self.watch_contents(terminal, self.reset_timer)
+        self.timers[terminal] = self.every(watch_interval, self.check_times,
+                                           terminal)
+        dbg('timer added for %s' % terminal)
+        self.menu_changed()
 
     def unwatch(self, _vte, terminal):
         """Unwatch a terminal"""
-        vte = terminal.get_vte()
-        vte.disconnect(self.watches[terminal])
+        self.watches[terminal].cancel()
         del(self.watches[terminal])
-        GObject.source_remove(self.timers[terminal])
+        self.timers[terminal].cancel()
         del(self.timers[terminal])
+        self.menu_changed()
 
-    def reset_timer(self, _vte, terminal):
+    def reset_timer(self, change):
         """Reset the last-changed time for a terminal"""
+        terminal = change.terminal
         time_now = time.mktime(time.gmtime())
         self.last_activities[terminal] = time_now
         dbg('reset activity time for %s' % terminal)
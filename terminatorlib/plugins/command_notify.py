@@ -53,10 +53,7 @@ class CommandNotify(plugin.Plugin):
         self.watched = new_watched
 
     def update_watched_delayed(self, term, event, arg1 = None):
-        def add_watch(self):
-            self.update_watched()
-            return False
-        GObject.idle_add(add_watch, self)
+        self.idle(self.update_watched)
         return True
 
     def notification_received(self, vte, summary, body, _terminator_term):
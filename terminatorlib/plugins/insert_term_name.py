@@ -6,6 +6,7 @@ AVAILABLE = ['InsertTermName']
 
 class InsertTermName(plugin.MenuItem):
    capabilities = ['terminal_menu']
+   cache_menu = True
    config = None
 
    def __init__(self):
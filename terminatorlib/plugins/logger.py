@@ -23,6 +23,7 @@ AVAILABLE = ['Logger']
 class Logger(plugin.MenuItem):
     """ Add custom command to the terminal menu"""
     capabilities = ['terminal_menu']
+    cache_menu = True
     loggers = None
     dialog_action = Gtk.FileChooserAction.SAVE
     dialog_buttons = (_("_Cancel"), Gtk.ResponseType.CANCEL,
@@ -61,11 +62,12 @@ class Logger(plugin.MenuItem):
         self.loggers[terminal]["col"] = col_end
         self.loggers[terminal]["row"] = row_end
 
-    def save(self, terminal):
-        """ 'contents-changed' callback """
+    def save(self, change):
+        """ contents change callback """
+        terminal = change.vte
         last_saved_col = self.loggers[terminal]["col"]
         last_saved_row = self.loggers[terminal]["row"]
-        (col, row) = terminal.get_cursor_position()
+        (col, row) = change.cursor
         # Save only when buffer is nearly full,
         # for the sake of efficiency
         if row - last_saved_row < terminal.get_row_count():
@@ -120,9 +122,10 @@ class Logger(plugin.MenuItem):
                 vte_terminal = Terminal.get_vte()
                 (col, row) = vte_terminal.get_cursor_position()
                 self.loggers[vte_terminal] = {"filepath":logfile,
-                                              "handler_id":0, "fd":fd,
+                                              "watch":None, "fd":fd,
                                               "col":col, "row":row}
-                self.loggers[vte_terminal]["handler_id"] = vte_terminal.connect('contents-changed', self.save)
+                self.loggers[vte_terminal]["watch"] = self.watch_contents(Terminal, self.save)
+                self.menu_changed()
             except Exception as e:
                 error = Gtk.MessageDialog(None, Gtk.DialogFlags.MODAL, Gtk.MessageType.ERROR,
                                           Gtk.ButtonsType.OK, str(e))
@@ -140,5 +143,6 @@ class Logger(plugin.MenuItem):
             self.write_content(vte_terminal, last_saved_row, last_saved_col, row, col)
         fd = self.loggers[vte_terminal]["fd"]
         fd.close()
-        vte_terminal.disconnect(self.loggers[vte_terminal]["handler_id"])
+        self.loggers[vte_terminal]["watch"].cancel()
         del(self.loggers[vte_terminal])
+        self.menu_changed()
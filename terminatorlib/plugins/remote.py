@@ -26,6 +26,10 @@ CONFIGURATION
       * infer_cwd: When a session is cloned, attempt to `cd` into working directory
       * ssh_default_profile: optional profile to apply to all SSH sessions
       * container_default_profile: optional profile to apply to all container sessions
+      * ssh_multiplex: share one SSH connection per host between a session and
+        its clones using OpenSSH ControlMaster sockets (default True)
+      * ssh_control_persist: seconds an idle master connection stays up
+        (default 600). 0 keeps it only as long as the session that opened it
 
     Host section:
       You can add host sections with a 'profile' key which will override the defaults
@@ -63,6 +67,8 @@ import re
 import psutil
 import asyncio
 import threading
+import shlex
+import subprocess
 
 from typing import Optional, List
 
@@ -145,6 +151,8 @@ class SSHSession(RemoteSession):
     def __init__(self, exe='ssh'):
         """ constructor """
         RemoteSession.__init__(self, exe)
+        # SSHControlMasters when connection sharing is enabled
+        self.control_masters = None
 
     def IsType(self, proc):
         """ check if this is an ssh session """
@@ -177,8 +185,95 @@ class SSHSession(RemoteSession):
         return None
 
     def Clone(self, proc):
-        """ ssh just needs to copy the cmdline """
-        return proc.cmdline()
+        """ ssh just needs to copy the cmdline, sharing the connection if we can """
+        cmd = proc.cmdline()
+        if self.control_masters is not None:
+            cmd = self.control_masters.Inject(cmd)
+        return cmd
+
+class SSHControlMasters(object):
+    """
+    OpenSSH connection multiplexing for cloned sessions.
+
+    Clones get ControlMaster=auto with a ControlPath under our runtime
+    directory, so the first clone of a host opens a master connection and
+    every later clone rides on it instead of doing a fresh TCP connect, key
+    exchange and authentication. Masters background themselves and exit
+    ControlPersist seconds after their last session closes, or with the
+    session that opened them when persist is 0 or less.
+    """
+    # stale sockets are swept once per process
+    swept = False
+
+    def __init__(self, persist=600):
+        """ constructor """
+        self.persist = persist
+        self.directory = os.path.join(
+            GLib.get_user_runtime_dir() or GLib.get_tmp_dir(),
+            APP_NAME, 'ssh'
+        )
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        except OSError as e:
+            err(f"cannot create control socket directory: {e}")
+            self.directory = None
+        if self.directory and not SSHControlMasters.swept:
+            SSHControlMasters.swept = True
+            threading.Thread(target=self.Sweep, daemon=True).start()
+
+    @staticmethod
+    def has_control_options(cmd):
+        """ check if the user already manages multiplexing for this command """
+        for i, arg in enumerate(cmd[1:], 1):
+            if arg in ('-M', '-S') or arg.startswith('-S'):
+                return True
+            if arg.startswith('-o'):
+                opt = arg[2:] or (cmd[i + 1] if i + 1 < len(cmd) else '')
+                if opt.lower().startswith(('controlmaster', 'controlpath')):
+                    return True
+        return False
+
+    def Inject(self, cmd):
+        """ return ssh cmdline with control master options added """
+        if not self.directory or not cmd or self.has_control_options(cmd):
+            return cmd
+        # %C hashes local host, remote host, port and user
+        path = os.path.join(self.directory, '%C')
+        # ControlPersist=0 would keep masters up forever
+        persist = self.persist if self.persist > 0 else 'no'
+        return [
+            cmd[0],
+            '-o', 'ControlMaster=auto',
+            '-o', f"ControlPath={shlex.quote(path)}",
+            '-o', f"ControlPersist={persist}",
+        ] + cmd[1:]
+
+    def Check(self, socket):
+        """ check if a master is listening on socket """
+        try:
+            res = subprocess.run(
+                ['ssh', '-o', f"ControlPath={socket}", '-O', 'check', 'terminator'],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
+            )
+            return res.returncode == 0
+        except Exception as e:
+            dbg(f"control socket check failed: {e}")
+            return False
+
+    def Sweep(self):
+        """ remove sockets left behind by masters that are gone """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            socket = os.path.join(self.directory, name)
+            if not self.Check(socket):
+                dbg(f"removing stale control socket {socket}")
+                try:
+                    os.unlink(socket)
+                except OSError:
+                    pass
 
 class ContainerSession(RemoteSession):
     """ container type sessions """
@@ -437,7 +532,8 @@ class Remote(MenuItem):
 
         # current terminal instance data
         # from context menu
-        self.peers = set()
+        self.pending_clone = False
+        self.last_added = None
         self.remote_proc = None
         self.remote_type = None
         self.remote_cwd = None
@@ -445,17 +541,61 @@ class Remote(MenuItem):
         # current terminals with a remote session found via polling
         self.currRemoteTerminals = dict() # terminal -> last profile
 
-        # timer callbacks
-        self.timeout_id = None
-        self.watch_id = GLib.timeout_add(
-            1.0 * 1000,
-            self._update_watches,
-            None
-        )
+        # new terminals are announced by Terminator, no polling needed
+        self.terminator.connect_terminal_event('terminal-added', self._on_terminal_added)
+        self.terminator.connect_terminal_event('terminal-removed', self._on_terminal_removed)
+
+        # timer callbacks, paused while Terminator is not focused
+        self.every(1000, self._update_watches, None, pausable=True)
 
         # Proc watch poller
         self.remote_proc_watch = RemoteProcWatch(self.remote_session_types)
 
+        self.apply_multiplex()
+
+    def apply_multiplex(self):
+        """ share ssh connections between a session and its clones, as
+        configured """
+        for session_type in self.remote_session_types:
+            if isinstance(session_type, SSHSession):
+                if not self.config['ssh_multiplex']:
+                    session_type.control_masters = None
+                elif session_type.control_masters is None:
+                    session_type.control_masters = SSHControlMasters(
+                        self.config['ssh_control_persist']
+                    )
+                else:
+                    session_type.control_masters.persist = \
+                        self.config['ssh_control_persist']
+
+    def unload(self):
+        """ stop watching terminals """
+        self.terminator.disconnect_terminal_event('terminal-added', self._on_terminal_added)
+        self.terminator.disconnect_terminal_event('terminal-removed', self._on_terminal_removed)
+        # the scheduler cancels our timers, stop the poll thread as well
+        self.remote_proc_watch.quit = True
+
+    def _on_terminal_added(self, terminal):
+        """ a terminal was created, clone into it if we asked for it """
+        self.last_added = terminal
+        if self.pending_clone:
+            self.pending_clone = False
+            dbg(f"cloning remote session into new terminal {terminal}")
+            # GTK3 registers terminals before their child is spawned, so
+            # feed the clone command once the split has completed
+            self.idle(self._clone_when_idle, terminal)
+
+    def _clone_when_idle(self, terminal):
+        """ idle callback for _on_terminal_added """
+        self._spawn_remote_session(terminal)
+        return False
+
+    def _on_terminal_removed(self, terminal):
+        """ forget terminals that have gone away """
+        self.currRemoteTerminals.pop(terminal, None)
+        if self.last_added is terminal:
+            self.last_added = None
+
     def _isNewlySpawned(self, pid):
         proc = psutil.Process(pid)
         return abs(time.time() - proc.create_time()) < 3
@@ -489,7 +629,9 @@ class Remote(MenuItem):
             'ssh_default_profile': "",
             'container_default_profile': "",
             'auto_clone': "False",
-            'infer_cwd': "True"
+            'infer_cwd': "True",
+            'ssh_multiplex': "True",
+            'ssh_control_persist': "600"
         }
         user_config = Config().plugin_get_config(cls.__name__)
         dbg(f"read user config: {user_config}")
@@ -505,6 +647,12 @@ class Remote(MenuItem):
 
         get_as_bool(config, 'auto_clone')
         get_as_bool(config, 'infer_cwd')
+        get_as_bool(config, 'ssh_multiplex')
+        try:
+            config['ssh_control_persist'] = int(config['ssh_control_persist'])
+        except Exception as e:
+            err(f"problem parsing ssh_control_persist as int: {e}")
+            config['ssh_control_persist'] = 600
         return config
 
     def _get_cwd_from_lines(self, terminal, N=3):
@@ -620,7 +768,7 @@ class Remote(MenuItem):
         except Exception:
             is_gtk4 = False
         if self.config['auto_clone'] and not is_gtk4:
-            self.peers = self._get_all_terminals()
+            self.last_added = None
             for child in menu.get_children():
                 if 'Split' in child.get_label():
                     dbg(f"handling split on menu item '{child.get_label()}'")
@@ -632,47 +780,6 @@ class Remote(MenuItem):
         """ handle check text box """
         self.config['auto_clone'] = widget.get_active()
 
-    def _poll_new_terminals(self, start_time):
-        """
-        Watch for new terminals
-        TODO: I'd rather have a signal for when the new terminal is spawned
-        """
-        currPeers = self._get_all_terminals()
-        if len(currPeers) != len(self.peers):
-            # parent container changed, get the added child
-            newPeers = [ x for x in currPeers if x not in self.peers ]
-            if not len(newPeers):
-                err("container removed children?!")
-                return False
-            dbg(f"Container has new children: {newPeers}")
-            if len(newPeers) != 1:
-                err("container has more than one child?!")
-            newTermUUID = newPeers[0]
-            newTerminal = self.terminator.find_terminal_by_uuid(newTermUUID.urn)
-            self._spawn_remote_session(newTerminal)
-            self.timeout_id = None
-            self.newPeers = None
-            return False
-
-        # check if we have been polling too long
-        if abs(time.time() - start_time) > 0.1:
-            err("timeout polling for terminals")
-            self.timeout_id = None
-            self.newPeers = None
-            return False
-
-        dbg("polling for new terminals...")
-        return True
-
-    def _get_all_terminals(self):
-        """ get all unique terminal instances """
-        peers = set()
-        try:
-            peers = { x.uuid for x in self.terminator.terminals }
-        except Exception as e:
-            err(f"caught exception getting terminals: {e}")
-        return peers
-
     def _spawn_remote_session(self, terminal):
         """ spawn user session into terminal """
         remote_cmd = self.remote_type.Clone(self.remote_proc)
@@ -738,23 +845,13 @@ class Remote(MenuItem):
         self._apply_host_settings(terminal)
 
         # original split command should have finished due to our
-        # connect_after. Try to find the new terminal since we
-        # last activated the context menu.
-        currPeers = self._get_all_terminals()
-        if len(currPeers) != len(self.peers):
-            # parent container changed, get the added child
-            newPeers = [ x for x in currPeers if x not in self.peers ]
-            if not len(newPeers):
-                err("container removed children?!")
-                return False
-            dbg(f"Container has new children: {newPeers}")
-            if len(newPeers) != 1:
-                err("container has more than one child?!")
-            newTermUUID = newPeers[0]
-            newTerminal = self.terminator.find_terminal_by_uuid(newTermUUID.urn)
-            self._spawn_remote_session(newTerminal)
-        else:
+        # connect_after, and announced the new terminal while doing so
+        newTerminal = self.last_added
+        self.last_added = None
+        if newTerminal is None or newTerminal is terminal:
             err("cant figure out the new terminal?")
+            return
+        self._spawn_remote_session(newTerminal)
 
     def _menu_item_activated(self, _, args):
         """
@@ -767,20 +864,18 @@ class Remote(MenuItem):
             err("lost remote session seen on context menu?")
             return
         child, remoteType = ret
-        if not self.timeout_id: # check if we are already waiting
-            self.remote_proc = child
-            self.remote_type = remoteType
-            if self.config['infer_cwd']:
-                self.remote_cwd = self._get_cwd_from_lines(terminal)
-            # get list of current terminals, we will watch for a new one
-            self.peers = self._get_all_terminals()
-            dbg("First peer list: {}".format(self.peers))
-            # launch idle callback to poll for new terminals
-            self.timeout_id = GLib.idle_add(
-                self._poll_new_terminals,
-                time.time()
-            )
-            self._apply_host_settings(terminal)
+        if self.pending_clone:
+            err("already waiting for a terminal?")
+            return
+        self.remote_proc = child
+        self.remote_type = remoteType
+        if self.config['infer_cwd']:
+            self.remote_cwd = self._get_cwd_from_lines(terminal)
+        self._apply_host_settings(terminal)
+        # the split below creates the new terminal synchronously, and our
+        # terminal-added handler clones into it
+        self.pending_clone = True
+        try:
             # launch new terminal (GTK4: call window split directly)
             try:
                 from gi.repository import Gtk as _Gtk
@@ -802,5 +897,7 @@ class Remote(MenuItem):
             else:
                 # GTK3 legacy: emit original signal on terminal
                 terminal.emit(signal, terminal.get_cwd())
-        else:
-            err("already waiting for a terminal?")
+        finally:
+            if self.pending_clone:
+                err("split did not create a terminal")
+                self.pending_clone = False
@@ -84,6 +84,7 @@ class MetaRCOM(type):
 class RunCmdOnMatchMenu(plugin.MenuItem):
     """Add custom match/commands preference setting to the terminal menu"""
     capabilities = ['terminal_menu']
+    cache_menu = True
     cmd_list = {}
     conf_file = os.path.join(get_config_dir(),"run_cmd_on_match")
 
@@ -157,6 +158,7 @@ class RunCmdOnMatchMenu(plugin.MenuItem):
             i = i + 1
         config.save()
         self._load_configured_handlers()
+        self.menu_changed()
 
 
     def _load_configured_handlers(self):
@@ -11,6 +11,7 @@ import terminatorlib.plugin as plugin
 from terminatorlib.util import get_config_dir, err, dbg, gerr
 from terminatorlib.terminator import Terminator
 from terminatorlib import util
+from terminatorlib import session_scrollback
 
 
 # AVAILABLE must contain a list of all the classes that you want exposed
@@ -44,6 +45,7 @@ class SaveLastSessionLayout(plugin.Plugin):
       if (not res):
         r = config.add_layout("SaveLastSessionLayout", current_layout)
       config.save()
+      session_scrollback.save(terminator.terminals)
       return True
 
     def signal_handler(self,signum, frame):
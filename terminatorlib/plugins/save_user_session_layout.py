@@ -13,6 +13,7 @@ from terminatorlib.translation import _
 from terminatorlib.util import get_config_dir, err, dbg, gerr
 from terminatorlib.terminator import Terminator
 from terminatorlib import util
+from terminatorlib import session_scrollback
 
 
 # AVAILABLE must contain a list of all the classes that you want exposed
@@ -20,6 +21,7 @@ AVAILABLE = ['SaveUserSessionLayout']
 
 class SaveUserSessionLayout(plugin.MenuItem):
     capabilities = ['terminal_menu', 'session']
+    cache_menu = True
 
     config = None
     conf_file = os.path.join(get_config_dir(),"save_last_session_cwd")
@@ -59,6 +61,7 @@ class SaveUserSessionLayout(plugin.MenuItem):
       if (not res):
         r = config.add_layout("SaveUserSessionLayout", current_layout)
       config.save()
+      session_scrollback.save(terminator.terminals)
       return True
     
    
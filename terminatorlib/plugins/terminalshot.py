@@ -17,6 +17,7 @@ AVAILABLE = ['TerminalShot']
 class TerminalShot(plugin.MenuItem):
     """Add custom commands to the terminal menu"""
     capabilities = ['terminal_menu']
+    cache_menu = True
     dialog_action = Gtk.FileChooserAction.SAVE
     dialog_buttons = (_("_Cancel"), Gtk.ResponseType.CANCEL,
                       _("_Save"), Gtk.ResponseType.OK)
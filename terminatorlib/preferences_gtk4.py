@@ -13,7 +13,10 @@ from gi.repository import Gtk, Gdk
 from .translation import _
 
 from .config import Config, DEFAULTS
+from .configsnapshot import ConfigDiff
 from .plugin import PluginRegistry
+from . import scrollback
+from .util import err
 
 
 class PreferencesWindow(Gtk.Dialog):
@@ -22,6 +25,8 @@ class PreferencesWindow(Gtk.Dialog):
         # Use a smaller default size and allow scrolling inside tabs
         self.set_default_size(640, 440)
         self.config = Config()
+        # Compared with the config on OK, to update only what changed
+        self._config_before = self.config.snapshot()
 
         area = self.get_content_area()
         area.set_spacing(12)
@@ -286,6 +291,47 @@ class PreferencesWindow(Gtk.Dialog):
             self.chk_close_btn.set_active(True)
         general_box.append(self.chk_close_btn)
 
+        # Estimated scrollback memory per terminal, and the budget above
+        # which the scrollback of idle terminals is trimmed
+        try:
+            frame = Gtk.Frame(label=_("Scrollback Memory"))
+            vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+            frame.set_child(vbox)
+            scrollback.sample()
+            gov = scrollback.governor()
+            grid = Gtk.Grid(column_spacing=12, row_spacing=4)
+            headers = (_("Terminal"), _("Lines"), _("Estimated (MB)"), _("Limit"))
+            for col, text in enumerate(headers):
+                grid.attach(Gtk.Label(label=text, xalign=0), col, 0, 1, 1)
+            usages = sorted(gov.terminals.items(), key=lambda item: -item[1].bytes)
+            for row, (term, usage) in enumerate(usages, 1):
+                try:
+                    title = term.get_window_title() or usage.label
+                except Exception:
+                    title = usage.label
+                limit = _("Infinite") if usage.limit < 0 else '%d' % usage.limit
+                if usage.trimmed is not None:
+                    limit += ' ' + _("(trimmed)")
+                cells = (title, '%d' % usage.rows,
+                         '%.1f' % (usage.bytes / 1048576.0), limit)
+                for col, text in enumerate(cells):
+                    grid.attach(Gtk.Label(label=text, xalign=0), col, row, 1, 1)
+            vbox.append(grid)
+            vbox.append(Gtk.Label(label=_("Total: %.1f MB") % (gov.total() / 1048576.0), xalign=0))
+            row_sb_budget = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+            row_sb_budget.append(Gtk.Label(label=_("Trim idle terminals above (MB, 0 never)"), xalign=0))
+            adj_sb = Gtk.Adjustment(lower=0, upper=1048576, step_increment=64, page_increment=512)
+            self.spin_scrollback_budget = Gtk.SpinButton(adjustment=adj_sb, climb_rate=1.0, digits=0)
+            try:
+                self.spin_scrollback_budget.set_value(float(self.config['scrollback_budget']))
+            except Exception:
+                self.spin_scrollback_budget.set_value(0)
+            row_sb_budget.append(self.spin_scrollback_budget)
+            vbox.append(row_sb_budget)
+            general_box.append(frame)
+        except Exception:
+            pass
+
         scroller_general = Gtk.ScrolledWindow()
         scroller_general.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         scroller_general.set_child(general_box)
@@ -651,6 +697,12 @@ class PreferencesWindow(Gtk.Dialog):
         except Exception:
             self.spin_scrollback.set_value(500)
         row_scroll.append(self.spin_scrollback)
+        self.chk_scrollback_archive = Gtk.CheckButton(label=_("Archive infinite scrollback to disk"))
+        try:
+            self.chk_scrollback_archive.set_active(self.config['scrollback_archive'])
+        except Exception:
+            self.chk_scrollback_archive.set_active(False)
+        row_scroll.append(self.chk_scrollback_archive)
         prof_box.append(row_scroll)
 
         # Palette (16 colors)
@@ -843,6 +895,16 @@ class PreferencesWindow(Gtk.Dialog):
             parent = self.get_transient_for()
             return parent if parent is not None else None
 
+        def _save_scrollback(win):
+            # Snapshot the scrollback of the terminals the layout names
+            from .terminator import Terminator
+            from . import session_scrollback
+            terminals = [t for t in Terminator().terminals if t.get_root() is win]
+            try:
+                session_scrollback.save(terminals)
+            except Exception as ex:
+                err('unable to save session scrollback: %s' % ex)
+
         # Add layout uses current window description (original behavior)
         def on_add_layout(_b):
             win = _get_parent_window()
@@ -867,6 +929,7 @@ class PreferencesWindow(Gtk.Dialog):
                             current_layout = win.describe_layout(save_cwd=True)
                             if self.config.add_layout(name, current_layout):
                                 self.config.save()
+                                _save_scrollback(win)
                                 _refresh_layouts_list()
                                 # Select the new layout
                                 r = self.layouts_list.get_first_child()
@@ -904,6 +967,7 @@ class PreferencesWindow(Gtk.Dialog):
                         pass
                 if self.config.replace_layout(name, current_layout):
                     self.config.save()
+                    _save_scrollback(win)
                     _refresh_layouts_list()
                     # Reselect
                     r = self.layouts_list.get_first_child()
@@ -1154,6 +1218,43 @@ class PreferencesWindow(Gtk.Dialog):
         except Exception:
             pass
 
+        # Time spent in plugin callbacks, and the CPU budget that disables
+        # plugins which exceed it
+        try:
+            frame = Gtk.Frame(label=_("Plugin Time"))
+            vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+            frame.set_child(vbox)
+            timings = registry.get_timings()
+            if timings:
+                grid = Gtk.Grid(column_spacing=12, row_spacing=4)
+                headers = (_("Plugin"), _("Calls"), _("Total (ms)"),
+                           _("CPU (ms)"), _("Slowest (ms)"))
+                for col, text in enumerate(headers):
+                    grid.attach(Gtk.Label(label=text, xalign=0), col, 0, 1, 1)
+                for row, name in enumerate(sorted(timings, key=lambda n: -timings[n].wall), 1):
+                    t = timings[name]
+                    label = name + (' ' + _("(disabled: over budget)") if t.disabled else '')
+                    cells = (label, '%d' % t.calls, '%.1f' % (t.wall * 1000),
+                             '%.1f' % (t.cpu * 1000), '%.1f' % (t.max_wall * 1000))
+                    for col, text in enumerate(cells):
+                        grid.attach(Gtk.Label(label=text, xalign=0), col, row, 1, 1)
+                vbox.append(grid)
+            else:
+                vbox.append(Gtk.Label(label=_("No plugin callbacks have run yet"), xalign=0))
+            row_budget = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+            row_budget.append(Gtk.Label(label=_("Disable plugins using more CPU per minute than (ms, 0 never)"), xalign=0))
+            adj_b = Gtk.Adjustment(lower=0, upper=60000, step_increment=100, page_increment=1000)
+            self.spin_plugin_budget = Gtk.SpinButton(adjustment=adj_b, climb_rate=1.0, digits=0)
+            try:
+                self.spin_plugin_budget.set_value(float(self.config['plugin_cpu_budget']))
+            except Exception:
+                self.spin_plugin_budget.set_value(0)
+            row_budget.append(self.spin_plugin_budget)
+            vbox.append(row_budget)
+            plugins_box.append(frame)
+        except Exception:
+            pass
+
         scroller_plugins = Gtk.ScrolledWindow()
         scroller_plugins.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         scroller_plugins.set_child(plugins_box)
@@ -1289,6 +1390,8 @@ class PreferencesWindow(Gtk.Dialog):
             self.config['ask_before_closing'] = {0:'never',1:'multiple_terminals',2:'always'}.get(idx, 'multiple_terminals')
             # Close button on tab
             self.config['close_button_on_tab'] = self.chk_close_btn.get_active()
+            if hasattr(self, 'spin_scrollback_budget'):
+                self.config['scrollback_budget'] = int(self.spin_scrollback_budget.get_value())
         except Exception:
             pass
 
@@ -1296,6 +1399,8 @@ class PreferencesWindow(Gtk.Dialog):
         try:
             enabled = [name for name, chk in self.plugin_checks.items() if chk.get_active()]
             self.config['enabled_plugins'] = enabled
+            if hasattr(self, 'spin_plugin_budget'):
+                self.config['plugin_cpu_budget'] = int(self.spin_plugin_budget.get_value())
             # Optionally refresh plugin registry
             reg = PluginRegistry()
             reg.load_plugins(force=True)
@@ -1345,6 +1450,8 @@ class PreferencesWindow(Gtk.Dialog):
                 self.config['visible_bell'] = self.chk_visible_bell.get_active()
                 self.config['urgent_bell'] = self.chk_urgent_bell.get_active()
                 self.config['icon_bell'] = self.chk_icon_bell.get_active()
+                from .gtk4bell import invalidate_bell_flags
+                invalidate_bell_flags(profile)
             except Exception:
                 pass
             # Scroll behavior
@@ -1420,6 +1527,7 @@ class PreferencesWindow(Gtk.Dialog):
             except Exception:
                 pass
             self.config['scrollback_infinite'] = self.chk_scrollback_inf.get_active()
+            self.config['scrollback_archive'] = self.chk_scrollback_archive.get_active()
             try:
                 self.config['scrollback_lines'] = int(self.spin_scrollback.get_value())
             except Exception:
@@ -1464,52 +1572,67 @@ class PreferencesWindow(Gtk.Dialog):
         except Exception:
             pass
 
-        # 5) Ask parent to refresh live UI where applicable
+        # 5) Update the live UI, only where the changes reach
+        self.config.base.changed()
+        changes = ConfigDiff(self._config_before, self.config.snapshot())
         parent = self.get_transient_for()
-        if parent:
-            if hasattr(parent, 'refresh_shortcuts'):
-                parent.refresh_shortcuts()
-            if hasattr(parent, 'refresh_titlebars'):
-                parent.refresh_titlebars(self.chk_show_titlebar.get_active())
-            if hasattr(parent, 'refresh_titlebar_position'):
-                parent.refresh_titlebar_position(self.chk_title_bottom.get_active())
-            if hasattr(parent, 'refresh_notebook_prefs'):
-                parent.refresh_notebook_prefs()
-            if hasattr(parent, 'refresh_tab_close_buttons'):
-                parent.refresh_tab_close_buttons()
-            if hasattr(parent, 'refresh_window_hints'):
-                parent.refresh_window_hints(self.chk_always_on_top.get_active(), self.chk_hide_taskbar.get_active())
-            # Apply handle size change
-            if hasattr(parent, 'refresh_handle_size'):
-                try:
-                    parent.refresh_handle_size(int(self.spin_handle.get_value()))
-                except Exception:
-                    pass
-            # Apply broadcast default immediately
-            if hasattr(parent, '_set_groupsend'):
-                try:
-                    bd = {0:'off',1:'group',2:'all'}.get(self.combo_broadcast.get_active(), 'group')
-                    parent._set_groupsend(bd)
-                except Exception:
-                    pass
-            # Apply titlebar styling (colors and font)
-            if hasattr(parent, 'refresh_titlebar_style'):
-                parent.refresh_titlebar_style()
-            # Apply title size visibility change
-            if hasattr(parent, 'refresh_title_sizes'):
-                parent.refresh_title_sizes()
-            # Apply updated profile to focused terminal when relevant
+        windows = [parent] if parent else []
+        try:
+            windows = parent.get_application().get_windows()
+        except Exception:
+            pass
+        for win in windows:
+            if hasattr(win, 'refresh_titlebars'):
+                self._refresh_window(win, changes)
+        self._refresh_terminals(changes)
+
+        self.destroy()
+
+    def _refresh_window(self, win, changes):
+        cfg = self.config
+        # Each refresh is guarded on its own, so one failing does not
+        # leave the window's other settings stale
+        refreshes = (
+            (changes.keybindings, win.refresh_shortcuts),
+            (changes.touches('show_titlebar'),
+             lambda: win.refresh_titlebars(bool(cfg['show_titlebar']))),
+            (changes.touches('title_at_bottom'),
+             lambda: win.refresh_titlebar_position(bool(cfg['title_at_bottom']))),
+            (changes.touches('tab_position', 'scroll_tabbar', 'homogeneous_tabbar'),
+             win.refresh_notebook_prefs),
+            (changes.touches('close_button_on_tab'), win.refresh_tab_close_buttons),
+            (changes.touches('always_on_top', 'hide_from_taskbar'),
+             lambda: win.refresh_window_hints(bool(cfg['always_on_top']),
+                                              bool(cfg['hide_from_taskbar']))),
+            (changes.touches('handle_size'),
+             lambda: win.refresh_handle_size(int(cfg['handle_size']))),
+            (changes.touches('broadcast_default'),
+             lambda: win._set_groupsend(cfg['broadcast_default'])),
+            ([k for k in changes.keys() if k.startswith('title_')],
+             win.refresh_titlebar_style),
+            (changes.touches('title_hide_sizetext'), win.refresh_title_sizes),
+        )
+        for applies, refresh in refreshes:
+            if not applies:
+                continue
+            try:
+                refresh()
+            except Exception as ex:
+                err('Unable to apply preferences to the window: %s' % ex)
+
+    def _refresh_terminals(self, changes):
+        # Re-apply profiles to the terminals using a profile that changed
+        if not changes.profiles:
+            return
+        from .terminator import Terminator
+        for term in list(Terminator().terminals):
             try:
-                term = parent._get_focused_terminal()
-                if term is not None and hasattr(term, 'config') and hasattr(term, 'apply_profile'):
-                    sel_profile = self.profile_combo.get_active_text() or term.config.get_profile()
-                    if term.config.get_profile() == sel_profile:
-                        term.apply_profile()
+                if hasattr(term, 'apply_profile') and \
+                        changes.profile_changed(term.config.get_profile()):
+                    term.apply_profile()
             except Exception:
                 pass
 
-        self.destroy()
-
     def _on_profile_add(self):
         dlg = Gtk.Dialog(title=_("Add Profile"), transient_for=self, modal=True)
         box = dlg.get_content_area()
@@ -0,0 +1,248 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""remote_client.py - Lightweight DBus client for a running Terminator
+
+This module deliberately depends on nothing but Gio, so that remotinator
+does not have to load GTK, the config system or the rest of terminatorlib
+just to send one message. It also supports pipelining: many calls can be in
+flight on one connection, with replies reported in the order the calls were
+made.
+
+The bus name matches the one the DBus service registers for a display.
+Terminals get it as TERMINATOR_DBUS_NAME. Elsewhere it comes from the
+display GDK would open, which is the Wayland one if there is one:
+
+>>> bus_name(None)
+'net.tenshu.Terminator2'
+>>> bus_name(':0.0') == bus_name(':0')
+True
+>>> display_name({'DISPLAY': ':0', 'WAYLAND_DISPLAY': 'wayland-0'})
+'wayland-0'
+>>> display_name({'DISPLAY': ':0', 'WAYLAND_DISPLAY': 'wayland-0',
+...               'GDK_BACKEND': 'x11'})
+':0'
+
+Each command knows how to turn remotinator's options into call arguments:
+
+>>> build_call('hsplit', 'urn:uuid:x', {'execute': 'top', 'title': None})
+('hsplit', '(sa{ss})', ('urn:uuid:x', {'execute': 'top'}))
+>>> build_call('get_terminals', None, {})
+('get_terminals', '()', ())
+>>> format_reply('get_terminals', (['a', 'b'],))
+'a\\nb'
+"""
+
+import os
+import time
+import hashlib
+import gettext
+
+from .version import APP_NAME
+
+BUS_BASE = 'net.tenshu.Terminator2'
+BUS_PATH = '/net/tenshu/Terminator2'
+# Set by Terminator in the environment of the terminals it starts
+BUS_NAME_ENV = 'TERMINATOR_DBUS_NAME'
+
+try:
+    gettext.textdomain(APP_NAME)
+    _ = gettext.gettext
+except Exception:
+    def _(text):
+        return text
+
+
+def bus_name(display=None):
+    """Return the DBus name Terminator uses on an X display"""
+    if not display:
+        return BUS_BASE
+    display = display.partition('.')[0]
+    # In Python 3, hash() uses a different seed on each run, so use hashlib
+    return '%s%s' % (BUS_BASE, hashlib.md5(display.encode('utf-8')).hexdigest())
+
+
+def display_name(environ=None):
+    """Return the name of the display GDK opens in environ"""
+    environ = os.environ if environ is None else environ
+    backend = environ.get('GDK_BACKEND', '').split(',')[0]
+    if environ.get('WAYLAND_DISPLAY') and backend in ('', '*', 'wayland'):
+        return environ['WAYLAND_DISPLAY']
+    return environ.get('DISPLAY')
+
+
+def _options(options):
+    return dict([(k, str(v)) for k, v in options.items() if v is not None])
+
+
+def _read_file(options):
+    with open(options['file']) as handle:
+        return handle.read()
+
+# Argument builders: (uuid, options) -> (signature, arguments)
+_NONE = lambda uuid, options: ('()', ())
+_UUID = lambda uuid, options: ('(s)', (uuid,))
+_OPTS = lambda uuid, options: ('(a{ss})', (_options(options),))
+_UUID_OPTS = lambda uuid, options: ('(sa{ss})', (uuid, _options(options)))
+
+COMMANDS = {
+    #  Command             uuid req. arguments   description
+    'new_window':           [False, _NONE,       _('Open a new window')],
+    'new_tab':              [True,  _UUID,       _('Open a new tab')],
+    'hsplit':               [True,  _UUID_OPTS,  _('Split the current terminal horizontally')],
+    'vsplit':               [True,  _UUID_OPTS,  _('Split the current terminal vertically')],
+    'get_terminals':        [False, _NONE,       _('Get a list of all terminals')],
+    'get_focused_terminal': [False, _NONE,       _('Get the uuid of the current focused terminal')],
+    'describe_terminals':   [False, _NONE,       _('Describe all terminals (uuid, title, cwd, pid, group, profile)')],
+    'create_layout_tree':   [False, lambda uuid, options: ('(s)', (_read_file(options),)),
+                                                 _('Open a window with the json layout given by --file')],
+    'run_commands':         [True,  lambda uuid, options: ('(ass)', (uuid.split(','), options.get('execute') or '')),
+                                                 _('Run --execute in a comma separated list of terminals')],
+    'get_window':           [True,  _UUID,       _('Get the UUID of a parent window')],
+    'get_window_title':     [True,  _UUID,       _('Get the title of a parent window')],
+    'get_tab':              [True,  _UUID,       _('Get the UUID of a parent tab')],
+    'get_tab_title':        [True,  _UUID,       _('Get the title of a parent tab')],
+    'set_tab_title':        [True,  _UUID_OPTS,  _('Set the title of a parent tab')],
+    'bg_img':               [True,  _UUID_OPTS,  _('Set the background image')],
+    'bg_img_all':           [False, _OPTS,       _('Set the background image for all terminals')],
+    'switch_profile':       [True,  _UUID_OPTS,  _('Switch current terminal profile')],
+    'switch_profile_all':   [False, _OPTS,       _('Switch profile of all currently running terminals')],
+    'get_metrics':          [False, _NONE,       _('Get performance metrics as JSON')],
+    'start_metrics':        [False, lambda uuid, options: ('(b)', (True,)),
+                                                 _('Start collecting performance metrics')],
+    'stop_metrics':         [False, lambda uuid, options: ('(b)', (False,)),
+                                                 _('Stop collecting performance metrics')],
+    }
+
+
+# Commands whose DBus method has a different name
+METHODS = {'start_metrics': 'set_metrics_enabled',
+           'stop_metrics': 'set_metrics_enabled'}
+
+
+def build_call(command, uuid, options):
+    """Return (method, signature, arguments) for a remotinator command"""
+    signature, args = COMMANDS[command][1](uuid, options)
+    method = METHODS.get(command, command)
+    return (method, signature, args)
+
+
+def format_reply(command, reply):
+    """Render the unpacked reply of a command as text, or None"""
+    if not reply:
+        return None
+    value = reply[0]
+    if command == 'run_commands':
+        if value:
+            return _('terminals not found: %s') % ', '.join(value)
+        return None
+    if command == 'describe_terminals':
+        return '\n'.join(['\t'.join(['%s=%s' % (k, t[k]) for k in sorted(t)])
+                          for t in value])
+    if isinstance(value, (list, tuple)):
+        return '\n'.join([str(x) for x in value])
+    if value is None or value == '':
+        return None
+    return str(value)
+
+
+class RemoteError(Exception):
+    """A call to Terminator failed"""
+    pass
+
+
+class RemoteClient(object):
+    """One session bus connection to a running Terminator"""
+
+    def __init__(self, name=None, timeout_ms=-1):
+        try:
+            from gi.repository import Gio, GLib
+        except ImportError:
+            raise RemoteError('Unable to initialise Terminator remote library. '
+                              'This probably means Gio is not available')
+        self.Gio = Gio
+        self.GLib = GLib
+        if name is None:
+            name = os.environ.get(BUS_NAME_ENV) or bus_name(display_name())
+        # The service uses its bus name as the interface name as well
+        self.name = name
+        self.timeout = timeout_ms
+        try:
+            self.connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        except GLib.Error as ex:
+            raise RemoteError(str(ex))
+
+    def _error(self, ex):
+        message = self.Gio.DBusError.get_remote_error(ex)
+        if message in ('org.freedesktop.DBus.Error.ServiceUnknown',
+                       'org.freedesktop.DBus.Error.NameHasNoOwner'):
+            return RemoteError("Remotinator can't connect to terminator. "
+                               "May be terminator is not running.")
+        self.Gio.DBusError.strip_remote_error(ex)
+        return RemoteError(ex.message)
+
+    def _params(self, signature, args):
+        if signature == '()':
+            return None
+        return self.GLib.Variant(signature, args)
+
+    def call(self, method, signature='()', args=()):
+        """Make one blocking call and return the unpacked reply tuple"""
+        try:
+            reply = self.connection.call_sync(
+                self.name, BUS_PATH, self.name,
+                method, self._params(signature, args), None,
+                self.Gio.DBusCallFlags.NO_AUTO_START, self.timeout, None)
+        except self.GLib.Error as ex:
+            raise self._error(ex)
+        return reply.unpack() if reply is not None else ()
+
+    def pipeline(self, calls, window=64):
+        """Send (method, signature, args) calls with up to window of them in
+        flight. Returns a list of reply tuples or RemoteError instances, in
+        the order of calls."""
+        calls = list(calls)
+        results = [None] * len(calls)
+        state = {'next': 0, 'outstanding': 0}
+        loop = self.GLib.MainLoop()
+
+        def on_reply(connection, result, index):
+            try:
+                reply = connection.call_finish(result)
+                results[index] = reply.unpack() if reply is not None else ()
+            except self.GLib.Error as ex:
+                results[index] = self._error(ex)
+            state['outstanding'] -= 1
+            send()
+            if state['outstanding'] == 0 and state['next'] >= len(calls):
+                loop.quit()
+
+        def send():
+            while state['outstanding'] < window and state['next'] < len(calls):
+                index = state['next']
+                method, signature, args = calls[index]
+                state['next'] += 1
+                state['outstanding'] += 1
+                self.connection.call(
+                    self.name, BUS_PATH, self.name, method,
+                    self._params(signature, args), None,
+                    self.Gio.DBusCallFlags.NO_AUTO_START, self.timeout, None,
+                    on_reply, index)
+
+        if calls:
+            send()
+            loop.run()
+        return results
+
+
+def benchmark(client, count=1000, method='get_terminals'):
+    """Measure calls per second, one at a time and pipelined"""
+    start = time.perf_counter()
+    for _n in range(count):
+        client.call(method)
+    sequential = time.perf_counter() - start
+    start = time.perf_counter()
+    client.pipeline([(method, '()', ())] * count)
+    pipelined = time.perf_counter() - start
+    return {'calls': count,
+            'sequential_per_sec': count / sequential,
+            'pipelined_per_sec': count / pipelined}
@@ -0,0 +1,116 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""resize_coalescer.py - Rate limit terminal grid resizes
+
+While a paned handle is dragged or a window is resized, a terminal is
+reallocated for every intermediate size. Each grid change makes VTE resize
+the PTY, and the child gets a SIGWINCH and redraws. ResizeCoalescer lets
+at most one grid change through per interval. Sizes in between are
+suppressed. A trailing commit delivers the final size once the allocation
+settles.
+
+>>> now = 0.0
+>>> timers = []
+>>> rc = ResizeCoalescer(interval_ms=100, clock=lambda: now,
+...                      schedule=timers.append)
+>>> rc.filter(800, 600, (10, 20))
+(800, 600)
+>>> now = 0.02
+>>> rc.filter(790, 600, (10, 20))
+(800, 600)
+>>> rc.suppressed, timers
+(1, [80])
+>>> rc.filter(780, 600, (10, 20))
+(800, 600)
+>>> rc.suppressed, len(timers)
+(2, 1)
+>>> now = 0.1
+>>> rc.filter(780, 600, (10, 20))
+(780, 600)
+>>> rc.pending
+False
+
+Allocation changes that leave the character grid alone pass straight
+through, because they never reach the PTY:
+
+>>> rc.filter(785, 605, (10, 20))
+(785, 605)
+
+A timer can fire a little early, and the re-allocation it asks for is then
+suppressed again. fired() lets that suppression schedule another commit,
+so the final size is never lost:
+
+>>> now = 1.0
+>>> timers = []
+>>> rc = ResizeCoalescer(interval_ms=100, clock=lambda: now,
+...                      schedule=timers.append)
+>>> rc.filter(800, 600, (10, 20))
+(800, 600)
+>>> now = 1.0096
+>>> rc.filter(790, 600, (10, 20))
+(800, 600)
+>>> now = 1.0996
+>>> rc.fired()
+>>> rc.filter(790, 600, (10, 20))
+(800, 600)
+>>> timers, rc.pending
+([91, 1], True)
+>>> now = 1.1
+>>> rc.fired()
+>>> rc.filter(790, 600, (10, 20))
+(790, 600)
+"""
+
+import math
+import time
+
+
+class ResizeCoalescer:
+    """Decide which allocation sizes a terminal should act upon"""
+    # Suppressed resizes across all terminals
+    suppressed_total = 0
+
+    def __init__(self, interval_ms=100, clock=None, schedule=None):
+        """schedule(delay_ms) is called once per burst to ask for a
+        re-allocation when the next commit becomes possible"""
+        self.interval = interval_ms / 1000.0
+        self.clock = clock or time.monotonic
+        self.schedule = schedule
+        self.committed = None
+        self.last_commit = None
+        self.pending = False
+        self.suppressed = 0
+
+    def _grid(self, width, height, cell):
+        if not cell or cell[0] <= 0 or cell[1] <= 0:
+            return (width, height)
+        return (width // cell[0], height // cell[1])
+
+    def filter(self, width, height, cell=None):
+        """Return the (width, height) the terminal should lay itself out at.
+        cell is the (width, height) of a character cell, if known."""
+        now = self.clock()
+        if self.committed is not None:
+            old_grid = self._grid(self.committed[0], self.committed[1], cell)
+            if old_grid == self._grid(width, height, cell):
+                # Pixel-only change: no SIGWINCH, so it does not count
+                # against the rate limit
+                self.committed = (width, height)
+                return self.committed
+            wait = self.last_commit + self.interval - now
+            if wait > 0:
+                self.suppressed += 1
+                ResizeCoalescer.suppressed_total += 1
+                if not self.pending:
+                    self.pending = True
+                    if self.schedule is not None:
+                        self.schedule(max(1, int(math.ceil(wait * 1000))))
+                return self.committed
+        self.committed = (width, height)
+        self.last_commit = now
+        self.pending = False
+        return self.committed
+
+    def fired(self):
+        """Note that the commit asked for by schedule() is being made"""
+        self.pending = False
@@ -0,0 +1,280 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""scrollback.py - Keep the scrollback of all terminals within a budget
+
+Profiles set the scrollback of each terminal on its own, so many terminals
+with infinite scrollback can use up all memory. The ScrollbackGovernor
+estimates what each terminal keeps from its retained rows and width. When
+the total passes scrollback_budget it lowers the scrollback limit of
+terminals, hidden and longest idle ones first.
+
+Output is never dropped without notice. Getting close to the budget gives
+a warning, and trimming starts at the first check after that warning:
+
+>>> warnings = []
+>>> gov = ScrollbackGovernor(warn=lambda used, budget: warnings.append(used))
+>>> gov.add('a', 'term-a', -1)
+-1
+>>> gov.add('b', 'term-b', -1)
+-1
+>>> gov.update('a', 20000, 100, visible=True, now=0)
+>>> gov.update('b', 30000, 100, visible=False, now=0)
+>>> gov.total()
+20000000
+>>> gov.check(19000000, now=10)
+[]
+>>> len(warnings)
+1
+>>> gov.check(19000000, now=20)
+[('b', 18000)]
+>>> gov.total() <= 19000000 * TARGET
+True
+
+A trimmed terminal keeps its lower limit when its profile is applied
+again, and while usage stays above RESTORE_AT of the budget:
+
+>>> gov.request('b', -1)
+18000
+>>> gov.report()
+{'term-a': 8000000, 'term-b': 7200000}
+>>> gov.check(19000000, now=25)
+[]
+
+Once usage has gone well down, trimmed terminals get what their profile
+asks for, as long as that still fits below TARGET:
+
+>>> gov.update('a', 100, 100, visible=True, now=30)
+>>> gov.check(19000000, now=30)
+[('b', -1)]
+>>> gov.add('c', 'term-c', 40000)
+40000
+>>> gov.update('c', 5000, 100, now=30)
+>>> gov.terminals['c'].trimmed = 5000
+>>> gov.check(19000000, now=40)
+[]
+>>> gov.check(190000000, now=50)
+[('c', 40000)]
+"""
+
+import time
+
+# Rough memory cost of one cell of scrollback. VTE compresses its
+# scrollback, so this errs on the generous side for plain text
+BYTES_PER_CELL = 4
+# Terminals are never trimmed below this many lines
+MIN_LINES = 1000
+# Warn at this fraction of the budget, and trim down to TARGET of it
+WARN_AT = 0.9
+TARGET = 0.8
+# Give trimmed terminals their scrollback back below this fraction only,
+# well clear of TARGET so that trimming is not undone at the next check
+RESTORE_AT = 0.5
+
+
+class Usage(object):
+    """What the governor knows about one terminal"""
+
+    def __init__(self, label, requested):
+        self.label = label
+        # Scrollback lines the profile asks for, -1 for infinite
+        self.requested = requested
+        # Lower limit imposed by the governor, or None
+        self.trimmed = None
+        self.rows = 0
+        self.columns = 80
+        self.visible = False
+        self.last_active = 0.0
+
+    @property
+    def limit(self):
+        """The scrollback lines the terminal should have"""
+        if self.trimmed is None:
+            return self.requested
+        if self.requested < 0:
+            return self.trimmed
+        return min(self.requested, self.trimmed)
+
+    @property
+    def bytes(self):
+        return self.rows * self.columns * BYTES_PER_CELL
+
+
+class ScrollbackGovernor(object):
+    """Track scrollback usage of all terminals and decide new limits"""
+
+    def __init__(self, warn=None):
+        """warn(used, budget) is called when usage nears the budget"""
+        self.terminals = {}
+        self.warn = warn
+        self.warned = False
+        self.trims = 0
+
+    def add(self, key, label, requested):
+        """Start tracking a terminal. Returns the scrollback to apply"""
+        self.terminals[key] = Usage(label, requested)
+        return requested
+
+    def remove(self, key):
+        self.terminals.pop(key, None)
+
+    def request(self, key, requested):
+        """Record the scrollback a terminal's profile asks for. Returns the
+        scrollback to apply, which may be lower if it was trimmed"""
+        usage = self.terminals.get(key)
+        if usage is None:
+            return requested
+        usage.requested = requested
+        return usage.limit
+
+    def update(self, key, rows, columns, visible=False, focused=False,
+               now=None):
+        """Record a sample of a terminal. A change in its rows or focus
+        counts as activity"""
+        usage = self.terminals.get(key)
+        if usage is None:
+            return
+        now = time.monotonic() if now is None else now
+        if rows != usage.rows or focused:
+            usage.last_active = now
+        usage.rows = rows
+        usage.columns = columns
+        usage.visible = visible
+
+    def total(self):
+        return sum([usage.bytes for usage in self.terminals.values()])
+
+    def report(self):
+        """Return {label: estimated bytes} of every terminal"""
+        return dict([(usage.label, usage.bytes)
+                     for usage in self.terminals.values()])
+
+    def check(self, budget, now=None):
+        """Compare usage with budget bytes. Returns [(key, lines), ...]:
+        the terminals whose scrollback limit must change"""
+        if budget <= 0:
+            return self._restore()
+        used = self.total()
+        if used < budget * WARN_AT:
+            self.warned = False
+            if used < budget * RESTORE_AT:
+                return self._restore(budget * TARGET - used)
+            return []
+        if not self.warned:
+            self.warned = True
+            if self.warn is not None:
+                self.warn(used, budget)
+            return []
+        if used <= budget:
+            return []
+        return self._trim(used - budget * TARGET)
+
+    def _trim(self, excess):
+        changes = []
+        # Hidden terminals first, then the longest idle
+        order = sorted(self.terminals.items(),
+                       key=lambda item: (item[1].visible, item[1].last_active))
+        for key, usage in order:
+            if excess <= 0:
+                break
+            if usage.rows <= MIN_LINES:
+                continue
+            row_bytes = usage.columns * BYTES_PER_CELL
+            keep = max(MIN_LINES, usage.rows - int(-(-excess // row_bytes)))
+            excess -= (usage.rows - keep) * row_bytes
+            usage.rows = keep
+            usage.trimmed = keep
+            self.trims += 1
+            changes.append((key, usage.limit))
+        return changes
+
+    def _restore(self, room=None):
+        """Give trimmed terminals back what their profile asks for, while
+        the lines that lets them keep fit in room bytes. Infinite
+        scrollback only grows with new output, so it always fits"""
+        changes = []
+        for key, usage in self.terminals.items():
+            if usage.trimmed is None:
+                continue
+            if room is not None and usage.requested >= 0:
+                grow = max(0, usage.requested - usage.rows) * \
+                    usage.columns * BYTES_PER_CELL
+                if grow > room:
+                    continue
+                room -= grow
+            usage.trimmed = None
+            changes.append((key, usage.limit))
+        return changes
+
+
+_governor = None
+_watch = {'source': None}
+
+
+def governor():
+    """The process-wide ScrollbackGovernor"""
+    global _governor
+    if _governor is None:
+        _governor = ScrollbackGovernor(warn=_warn)
+    return _governor
+
+
+def retained_rows(vte):
+    """Rows of scrollback a Vte.Terminal currently keeps"""
+    try:
+        adj = vte.get_vadjustment()
+        return max(0, int(adj.get_upper() - adj.get_lower() - adj.get_page_size()))
+    except Exception:
+        return 0
+
+
+def sample():
+    """Update the governor from every tracked terminal"""
+    gov = governor()
+    for terminal in list(gov.terminals):
+        try:
+            gov.update(terminal, retained_rows(terminal),
+                       terminal.get_column_count(),
+                       visible=terminal.get_mapped(),
+                       focused=terminal.has_focus())
+        except Exception:
+            gov.remove(terminal)
+
+
+def _check():
+    from .config import Config
+    sample()
+    budget = int(Config()['scrollback_budget']) * 1024 * 1024
+    for terminal, lines in governor().check(budget):
+        try:
+            terminal.set_scrollback_lines(lines)
+        except Exception:
+            pass
+    return True
+
+
+def _warn(used, budget):
+    from .util import err
+    from .translation import _
+    message = _('Scrollback is using %d MB of the %d MB budget. The scrollback '
+                'of idle terminals will be trimmed.') % (used >> 20, budget >> 20)
+    err(message)
+    try:
+        from gi.repository import Gio
+        app = Gio.Application.get_default()
+        if app is not None:
+            notification = Gio.Notification.new(_('Terminator'))
+            notification.set_body(message)
+            app.send_notification('scrollback-budget', notification)
+    except Exception:
+        pass
+
+
+def watch(interval_s=5):
+    """Check the budget periodically on the main loop"""
+    if _watch['source'] is not None:
+        return
+    from gi.repository import GLib
+    from . import metrics
+    metrics.add_source('scrollback.bytes', lambda: governor().report())
+    metrics.add_source('scrollback.trims', lambda: governor().trims)
+    _watch['source'] = GLib.timeout_add_seconds(interval_s, _check)
@@ -0,0 +1,262 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""scrollback_archive.py - Compressed on-disk archive of scrollback
+
+With scrollback_archive set alongside scrollback_infinite, a terminal keeps
+only scrollback_lines in VTE's memory. Every line that scrolls off the
+screen is streamed to an archive file instead. Lines are stored in
+independently compressed blocks, and a row index records where each block
+starts. Any range of lines can then be read, searched or exported a block
+at a time, without loading the whole archive.
+
+>>> import tempfile
+>>> path = os.path.join(tempfile.mkdtemp(), 'term.tsa')
+>>> archive = ScrollbackArchive(path, block_lines=4)
+>>> archive.append(['line %d' % n for n in range(10)])
+>>> len(archive), len(archive.blocks)
+(10, 2)
+>>> archive.lines(3, 6)
+['line 3', 'line 4', 'line 5']
+>>> list(archive.search('line [79]', regex=True))
+[(7, 'line 7'), (9, 'line 9')]
+>>> archive.close(delete=False)
+
+An archive opened again is read back from its index:
+
+>>> archive = ScrollbackArchive(path)
+>>> len(archive), archive.lines(8, 10)
+(10, ['line 8', 'line 9'])
+>>> archive.close()
+>>> os.path.exists(path)
+False
+"""
+
+import os
+import re
+import zlib
+import struct
+import atexit
+from bisect import bisect_right
+
+from . import metrics
+
+# Lines per compressed block
+BLOCK_LINES = 1024
+# Rows VTE keeps beyond scrollback_lines while archiving. Rows are archived
+# at most once per contents_changed_interval, and a flood can scroll this
+# many past in that time before VTE would drop them unarchived
+HEADROOM = 10000
+# Index record: first line, data offset, compressed length, line count
+_RECORD = struct.Struct('<QQII')
+
+
+class ScrollbackArchive(object):
+    """Append-only file of compressed blocks of lines, with a line index"""
+
+    def __init__(self, path, block_lines=BLOCK_LINES, pinned=False):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.block_lines = block_lines
+        # Kept on close when pinned, deleted otherwise
+        self.pinned = pinned
+        self.blocks = []
+        self.starts = []
+        self.rows = 0
+        self.pending = []
+        self.data = open(path, 'ab+')
+        self.size = self.data.seek(0, os.SEEK_END)
+        self.index = open(self.index_path, 'ab+')
+        self._read_index()
+
+    def _read_index(self):
+        self.index.seek(0)
+        raw = self.index.read()
+        for pos in range(0, len(raw) - _RECORD.size + 1, _RECORD.size):
+            first, offset, length, count = _RECORD.unpack_from(raw, pos)
+            if offset + length > self.size:
+                # Written partially before a crash
+                break
+            self._add_block(first, offset, length, count)
+
+    def _add_block(self, first, offset, length, count):
+        self.blocks.append((first, offset, length, count))
+        self.starts.append(first)
+        self.rows = first + count
+
+    def __len__(self):
+        return self.rows + len(self.pending)
+
+    def append(self, lines):
+        """Add lines, compressing each block as it fills"""
+        self.pending.extend(lines)
+        while len(self.pending) >= self.block_lines:
+            self._write(self.pending[:self.block_lines])
+            del self.pending[:self.block_lines]
+
+    def flush(self):
+        """Write pending lines out as a block of their own"""
+        if self.pending:
+            self._write(self.pending)
+            self.pending = []
+
+    def _write(self, lines):
+        payload = zlib.compress('\n'.join(lines).encode('utf-8'))
+        self.data.seek(0, os.SEEK_END)
+        self.data.write(payload)
+        self.data.flush()
+        self.index.write(_RECORD.pack(self.rows, self.size, len(payload),
+                                      len(lines)))
+        self.index.flush()
+        self._add_block(self.rows, self.size, len(payload), len(lines))
+        self.size += len(payload)
+
+    def _block(self, number):
+        _first, offset, length, count = self.blocks[number]
+        self.data.seek(offset)
+        lines = zlib.decompress(self.data.read(length)).decode('utf-8',
+                                                               'replace')
+        return lines.split('\n')[:count]
+
+    def iter_lines(self, start=0, end=None):
+        """Yield (line number, line) from start up to end, reading one
+        block at a time"""
+        end = len(self) if end is None else min(end, len(self))
+        number = max(0, bisect_right(self.starts, start) - 1)
+        while number < len(self.blocks) and self.starts[number] < end:
+            first = self.starts[number]
+            for offset, line in enumerate(self._block(number)):
+                if start <= first + offset < end:
+                    yield (first + offset, line)
+            number += 1
+        for offset, line in enumerate(self.pending):
+            if start <= self.rows + offset < end:
+                yield (self.rows + offset, line)
+
+    def lines(self, start, end):
+        """Return lines start to end as a list"""
+        return [line for _row, line in self.iter_lines(start, end)]
+
+    def search(self, pattern, regex=False, case_sensitive=True):
+        """Yield (line number, line) for every line matching pattern"""
+        if not regex:
+            pattern = re.escape(pattern)
+        matcher = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        for row, line in self.iter_lines():
+            if matcher.search(line):
+                yield (row, line)
+
+    def export(self, destination):
+        """Write every line to destination, a path, as plain text"""
+        with open(destination, 'w') as handle:
+            for _row, line in self.iter_lines():
+                handle.write(line + '\n')
+
+    def close(self, delete=None):
+        """Close the files, deleting them unless pinned or told not to"""
+        if delete is None:
+            delete = not self.pinned
+        if not delete:
+            self.flush()
+        self.data.close()
+        self.index.close()
+        if delete:
+            for path in (self.path, self.index_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def archive_dir():
+    """Directory holding the archives of running terminals"""
+    cache = os.environ.get('XDG_CACHE_HOME',
+                           os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache, 'terminator', 'scrollback')
+
+
+def _text(vte, first, last, columns=None, start=0):
+    """Text of rows first to last of a Vte.Terminal, from column start of
+    the first row up to and including column columns of the last row"""
+    if columns is None:
+        columns = vte.get_column_count() - 1
+    try:
+        from gi.repository import Vte
+        text = vte.get_text_range_format(Vte.Format.TEXT, first, start, last,
+                                         columns)
+    except (AttributeError, TypeError):
+        text = vte.get_text_range(first, start, last, columns)
+    if isinstance(text, (list, tuple)):
+        text = text[0]
+    return text or ''
+
+
+class TerminalArchiver(object):
+    """Streams the rows of a Vte.Terminal that leave the screen into a
+    ScrollbackArchive"""
+    # Open archivers, closed at exit
+    open_archivers = []
+
+    def __init__(self, vte, name):
+        from .plugin import ContentsWatch
+        directory = archive_dir()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.vte = vte
+        self.archive = ScrollbackArchive(os.path.join(directory, name + '.tsa'))
+        # Next VTE row to archive
+        self.row = None
+        # Rows VTE dropped before they could be archived
+        self.lost = 0
+        self.watch = ContentsWatch().watch(None, vte, self._on_contents)
+        TerminalArchiver.open_archivers.append(self)
+
+    def _on_contents(self, _change):
+        adj = self.vte.get_vadjustment()
+        first = int(adj.get_lower())
+        top = int(adj.get_upper() - adj.get_page_size())
+        if self.row is None:
+            self.row = first
+        if self.row < first:
+            if not self.lost:
+                from .util import err
+                err('Scrollback archive %s is missing %d lines that were '
+                    'dropped before they could be archived' %
+                    (self.archive.path, first - self.row))
+            self.lost += first - self.row
+            metrics.inc('scrollback.archive_lost', first - self.row,
+                        label=os.path.basename(self.archive.path))
+            self.row = first
+        if top <= self.row:
+            return
+        text = _text(self.vte, self.row, top - 1)
+        if text.endswith('\n'):
+            text = text[:-1]
+        self.archive.append(text.split('\n'))
+        self.row = top
+
+    def export(self, destination):
+        """Write the archived lines and then the screen to destination"""
+        self._on_contents(None)
+        self.archive.export(destination)
+        last = int(self.vte.get_vadjustment().get_upper()) - 1
+        if last >= self.row:
+            with open(destination, 'a') as handle:
+                handle.write(_text(self.vte, self.row, last))
+
+    def close(self):
+        """Stop archiving. The archive is deleted unless pinned"""
+        self.watch.cancel()
+        self.archive.close()
+        if self in TerminalArchiver.open_archivers:
+            TerminalArchiver.open_archivers.remove(self)
+
+
+def _close_all():
+    for archiver in list(TerminalArchiver.open_archivers):
+        try:
+            archiver.close()
+        except Exception:
+            pass
+
+
+atexit.register(_close_all)
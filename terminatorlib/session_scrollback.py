@@ -0,0 +1,213 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""session_scrollback.py - Save and restore scrollback with sessions
+
+When a session layout is saved, the scrollback of every terminal is written
+to a gzip file named after the terminal's uuid. The text is read from VTE on
+the main loop, and compressed and written by a background thread. A
+terminal restored from a layout gets its history back the first time it is
+shown, so restoring many panes does not read and parse all their history up
+front.
+
+>>> import tempfile
+>>> path = os.path.join(tempfile.mkdtemp(), 'x.gz')
+>>> write_snapshot(path, ['one\\n', 'two\\n', 'three\\n'])
+>>> read_snapshot(path)
+['one\\n', 'two\\n', 'three\\n']
+>>> read_snapshot(path, keep=2)
+['two\\n', 'three\\n']
+
+Snapshots are kept for the terminals of every saved layout:
+
+>>> sorted(layout_uuids({'window0': {'type': 'Window'},
+...                      'terminal1': {'type': 'Terminal', 'uuid': 'a'},
+...                      'child0': {'children': {'t': {'uuid': 'b'}}}}))
+['a', 'b']
+"""
+
+import os
+import gzip
+import threading
+from collections import deque
+
+from .scrollback_archive import ScrollbackArchive, archive_dir, _text
+
+SUFFIX = '.gz'
+# Serialises background writers, so an older save never lands last
+_lock = threading.Lock()
+
+
+def session_dir():
+    """Directory holding the scrollback of saved sessions"""
+    return os.path.join(os.path.dirname(archive_dir()), 'sessions')
+
+
+def snapshot_path(uuid):
+    return os.path.join(session_dir(), str(uuid) + SUFFIX)
+
+
+def layout_uuids(layout):
+    """Return the set of terminal uuids found in a layout tree"""
+    uuids = set()
+    for key, value in layout.items():
+        if key == 'uuid' and value:
+            uuids.add(str(value))
+        elif isinstance(value, dict):
+            uuids |= layout_uuids(value)
+    return uuids
+
+
+def write_snapshot(path, chunks):
+    """Write chunks of text to a gzip file at path, replacing it in one go"""
+    partial = path + '.part'
+    with gzip.open(partial, 'wt', encoding='utf-8') as handle:
+        for chunk in chunks:
+            handle.write(chunk)
+    os.replace(partial, path)
+
+
+def read_snapshot(path, keep=None):
+    """Return the lines of a snapshot, only the last keep of them if set"""
+    with gzip.open(path, 'rt', encoding='utf-8', errors='replace') as handle:
+        return list(deque(handle, maxlen=keep))
+
+
+def _vte(terminal):
+    return terminal.get_vte() if hasattr(terminal, 'get_vte') else terminal
+
+
+def _uuid(terminal):
+    uuid = getattr(terminal, 'uuid', None)
+    return str(uuid) if uuid else None
+
+
+def capture(terminal):
+    """Read what a snapshot of terminal needs, on the main loop. Returns
+    (uuid, archive path, archived lines, text)"""
+    vte = _vte(terminal)
+    first = int(vte.get_vadjustment().get_lower())
+    archive = None
+    archived = 0
+    archiver = getattr(terminal, '_archiver', None)
+    if archiver is not None:
+        # Lines that left VTE are only in the archive
+        archiver._on_contents(None)
+        archiver.archive.flush()
+        archive = archiver.archive.path
+        archived = len(archiver.archive)
+        first = max(first, archiver.row)
+    # The prompt on the cursor row is left out, the new shell prints its own
+    row = vte.get_cursor_position()[1]
+    text = _text(vte, first, row - 1) if row > first else ''
+    if text and not text.endswith('\n'):
+        text += '\n'
+    return (_uuid(terminal), archive, archived, text)
+
+
+def _chunks(archive, archived, text):
+    if archive is not None:
+        reader = ScrollbackArchive(archive)
+        try:
+            for _row, line in reader.iter_lines(0, archived):
+                yield line + '\n'
+        finally:
+            reader.close(delete=False)
+    yield text
+
+
+def _write(snapshots, keep):
+    from .util import dbg, err
+    with _lock:
+        directory = session_dir()
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            for uuid, archive, archived, text in snapshots:
+                write_snapshot(snapshot_path(uuid),
+                               _chunks(archive, archived, text))
+            for name in os.listdir(directory):
+                if name.endswith(SUFFIX) and name[:-len(SUFFIX)] not in keep:
+                    os.remove(os.path.join(directory, name))
+        except (IOError, OSError) as ex:
+            err('unable to save session scrollback: %s' % ex)
+            return
+        dbg('saved scrollback of %d terminals' % len(snapshots))
+
+
+def save(terminals):
+    """Snapshot the scrollback of terminals in a background thread, and drop
+    the snapshots no saved layout refers to any more. Returns the thread"""
+    from .config import Config
+    config = Config()
+    keep = set()
+    for name in config.list_layouts():
+        keep |= layout_uuids(config.layout_get_config(name) or {})
+    snapshots = []
+    for terminal in terminals:
+        if _uuid(terminal) is None:
+            continue
+        try:
+            snapshots.append(capture(terminal))
+        except Exception:
+            continue
+        keep.add(_uuid(terminal))
+    # Not a daemon, so a save made on the way out still completes
+    thread = threading.Thread(target=_write, args=(snapshots, keep),
+                              name='terminator-session-save')
+    thread.start()
+    return thread
+
+
+def _screen(vte):
+    """What the terminal has printed so far, up to the cursor"""
+    column, row = vte.get_cursor_position()
+    first = int(vte.get_vadjustment().get_lower())
+    if column > 0:
+        return _text(vte, first, row, column - 1)
+    if row > first:
+        text = _text(vte, first, row - 1)
+        return text if text.endswith('\n') else text + '\n'
+    return ''
+
+
+def _feed(vte, path):
+    from .util import dbg
+    lines = vte.get_scrollback_lines()
+    keep = None if lines < 0 else lines + vte.get_row_count()
+    try:
+        history = read_snapshot(path, keep)
+    except (IOError, OSError, EOFError) as ex:
+        dbg('no session scrollback in %s: %s' % (path, ex))
+        return False
+    # The shell has usually printed its prompt by now. Put the history
+    # above it by clearing the terminal and printing the prompt again
+    screen = _screen(vte)
+    if screen:
+        vte.reset(False, True)
+    text = ''.join(history) + screen
+    vte.feed(text.replace('\n', '\r\n').encode('utf-8'))
+    dbg('restored %d lines of scrollback' % len(history))
+    return False
+
+
+def restore(terminal):
+    """Feed the saved scrollback of terminal back when it is first shown.
+    Returns whether there was any to restore"""
+    uuid = _uuid(terminal)
+    if uuid is None:
+        return False
+    path = snapshot_path(uuid)
+    if not os.path.exists(path):
+        return False
+    from gi.repository import GLib
+    vte = _vte(terminal)
+    if vte.get_mapped():
+        GLib.idle_add(_feed, vte, path)
+        return True
+    handler = {}
+
+    def on_map(_widget):
+        vte.disconnect(handler['id'])
+        GLib.idle_add(_feed, vte, path)
+    handler['id'] = vte.connect('map', on_map)
+    return True
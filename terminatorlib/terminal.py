@@ -29,6 +29,7 @@ from .searchbar import Searchbar
 from .translation import _
 from .signalman import Signalman
 from . import plugin
+from . import session_scrollback
 from terminatorlib.layoutlauncher import LayoutLauncher
 from . import regex
 
@@ -1659,7 +1660,7 @@ class Terminal(Gtk.VBox):
 
                 for urlplugin in plugins:
                     if match == self.matches[urlplugin.handler_name]:
-                        newurl = urlplugin.callback(url)
+                        newurl = registry.call(urlplugin, urlplugin.callback, url)
                         if newurl: # If the plugin returns None, it's a false match.
                             dbg('URL prepared by %s plugin' \
                                     % urlplugin.handler_name)
@@ -1908,6 +1909,7 @@ class Terminal(Gtk.VBox):
             self.directory = layout['directory']
         if 'uuid' in layout and layout['uuid'] != '':
             self.uuid = make_uuid(layout['uuid'])
+            session_scrollback.restore(self)
 
     def scroll_by_page(self, pages):
         """Scroll up or down in pages"""
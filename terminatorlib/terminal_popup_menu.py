@@ -321,7 +321,7 @@ class TerminalPopupMenu(object):
             registry.load_plugins()
             plugins = registry.get_plugins_by_capability('terminal_menu')
             for menuplugin in plugins:
-                menuplugin.callback(menuitems, menu, terminal)
+                registry.call(menuplugin, menuplugin.callback, menuitems, menu, terminal)
             
             if len(menuitems) > 0:
                 menu.append(Gtk.SeparatorMenuItem())
@@ -83,6 +83,17 @@ def build_menu_model(terminal) -> Gio.MenuModel:
 
     menu.append_section(None, sec4)
 
+    # Scrollback archive, when the profile keeps one
+    if getattr(terminal, '_archiver', None) is not None:
+        sec_archive = Gio.Menu()
+        sec_archive.append(_('_Export Scrollback…'), 'term.archive_export')
+        sec_archive.append(_('_Keep Scrollback Archive'), 'term.archive_pin')
+        menu.append_section(None, sec_archive)
+
+    sec_record = Gio.Menu()
+    sec_record.append(_('_Record to File…'), 'term.record')
+    menu.append_section(None, sec_record)
+
     # Grouping: only when titlebar hidden (match original)
     try:
         if not bool(cfg['show_titlebar']):
@@ -108,9 +119,17 @@ def build_menu_model(terminal) -> Gio.MenuModel:
         plugin_menu, actions = None, []
     if plugin_menu is not None:
         menu.append_section(_('Plugins'), plugin_menu)
-        # Install actions on terminal's action group (simple and toggle)
+        # Install actions on terminal's action group (simple and toggle).
+        # A cached plugin menu comes with the actions installed last time.
         ag = getattr(terminal, '_action_group', None)
-        if ag is not None:
+        if ag is not None and getattr(terminal, '_plugin_actions', None) is not actions:
+            # Drop the actions of a previous build, which may share names
+            for entry in getattr(terminal, '_plugin_actions', None) or []:
+                try:
+                    ag.remove_action(entry[0])
+                except Exception:
+                    pass
+            terminal._plugin_actions = actions
             for entry in actions:
                 try:
                     # Backward compatibility with (name, cb)
@@ -14,10 +14,12 @@ import random
 from . import borg
 from .borg import Borg
 from .config import Config
+from .configsnapshot import ConfigDiff
 from .keybindings import Keybindings
 from .util import dbg, err, enumerate_descendants
 from .factory import Factory
 from .translation import _
+from . import metrics
 
 try:
     from gi.repository import GdkX11
@@ -67,6 +69,17 @@ class Terminator(Borg):
 
     cur_gtk_theme_name = None
     gtk_settings = None
+    # Snapshot of the config as last applied by reconfigure()
+    applied_config = None
+    # Background colour of a themed VTE, per GTK theme
+    theme_colors = None
+    # Options the application stylesheet is built from
+    style_keys = ('use_theme_colors', 'background_color', 'background_type',
+                  'background_darkness', 'background_image', 'extra_styling',
+                  'handle_size')
+
+    terminal_events = ('terminal-added', 'terminal-removed')
+    terminal_handlers = None
 
     def __init__(self):
         """Class initialiser"""
@@ -96,6 +109,10 @@ class Terminator(Borg):
             self.style_providers = []
         if not self.doing_layout:
             self.doing_layout = False
+        if not self.terminal_handlers:
+            self.terminal_handlers = dict([(e, []) for e in self.terminal_events])
+        if self.theme_colors is None:
+            self.theme_colors = {}
         self.connect_signals()
 
     def connect_signals(self):
@@ -159,18 +176,43 @@ class Terminator(Borg):
             dbg('no windows remain, quitting')
             Gtk.main_quit()
 
+    def connect_terminal_event(self, event, callback):
+        """Call callback(terminal) whenever a terminal is added or removed.
+        event is one of terminal_events"""
+        if event not in self.terminal_handlers:
+            raise ValueError('unknown terminal event: %s' % event)
+        if callback not in self.terminal_handlers[event]:
+            self.terminal_handlers[event].append(callback)
+
+    def disconnect_terminal_event(self, event, callback):
+        """Stop calling callback for event"""
+        try:
+            self.terminal_handlers[event].remove(callback)
+        except (KeyError, ValueError):
+            pass
+
+    def emit_terminal_event(self, event, terminal):
+        """Tell subscribers that terminal was added or removed"""
+        for callback in list(self.terminal_handlers.get(event, [])):
+            try:
+                callback(terminal)
+            except Exception as ex:
+                err('%s handler %s failed: %s' % (event, callback, ex))
+
     def register_terminal(self, terminal):
         """Register a new terminal widget"""
         if terminal not in self.terminals:
             dbg('registering %s:%s' %
                     (id(terminal), type(terminal)))
             self.terminals.append(terminal)
+            self.emit_terminal_event('terminal-added', terminal)
 
     def deregister_terminal(self, terminal):
         """De-register a terminal widget"""
         dbg('de-registering %s:%s' %
                 (id(terminal), type(terminal)))
         self.terminals.remove(terminal)
+        self.emit_terminal_event('terminal-removed', terminal)
 
         if len(self.terminals) == 0:
             dbg('no terminals remain, destroying all windows')
@@ -217,6 +259,7 @@ class Terminator(Borg):
         """Create all the parts necessary to satisfy the specified layout"""
         layout = None
         objects = {}
+        started = metrics.start()
 
         self.doing_layout = True
         self.last_active_window = None
@@ -307,6 +350,7 @@ class Terminator(Borg):
             window.create_layout(layout[windef])
 
         self.layoutname = layoutname
+        metrics.finish('layout.build', started)
 
     def layout_done(self):
         """Layout operations have finished, record that fact"""
@@ -363,11 +407,69 @@ class Terminator(Borg):
         new_gtk_theme_name = settings.get_property(prop.name)
         if new_gtk_theme_name != self.cur_gtk_theme_name:
             self.cur_gtk_theme_name = new_gtk_theme_name
-            self.reconfigure()
+            self.theme_colors = {}
+            self.reconfigure(force=True)
+
+    def theme_background_color(self):
+        """The background colour a VTE gets from the current GTK theme"""
+        theme = self.gtk_settings.get_property('gtk-theme-name')
+        if theme not in self.theme_colors:
+            # Create a dummy window/vte and realise it so it has correct
+            # values to read from
+            tmp_win = Gtk.Window()
+            tmp_vte = Vte.Terminal()
+            tmp_win.add(tmp_vte)
+            tmp_win.realize()
+            bgcolor = tmp_vte.get_style_context().get_background_color(Gtk.StateType.NORMAL)
+            self.theme_colors[theme] = "#{0:02x}{1:02x}{2:02x}".format(
+                    int(bgcolor.red  * 255), int(bgcolor.green * 255),
+                    int(bgcolor.blue * 255))
+            tmp_win.remove(tmp_vte)
+            tmp_win.destroy()
+        return(self.theme_colors[theme])
+
+    def reconfigure(self, force=False):
+        """Update configuration for the whole application. Only what the
+        config changes since the last call affect is updated, unless
+        forced"""
+
+        # Catch edits made to the config dicts directly
+        self.config.base.changed()
+        snapshot = self.config.snapshot()
+        if force:
+            changes = ConfigDiff(None, snapshot)
+        else:
+            changes = ConfigDiff(self.applied_config, snapshot)
+        self.applied_config = snapshot
+        if not changes:
+            dbg('nothing to reconfigure')
+            return
+
+        if changes.touches(*self.style_keys) or changes.profiles_added or \
+                changes.profiles_removed or not self.style_providers:
+            self.restyle()
+
+        # Cause the terminals whose settings changed to reconfigure. Any
+        # global option may affect every terminal
+        for terminal in self.terminals:
+            if changes.globals or \
+                    changes.profile_changed(terminal.get_profile()):
+                terminal.reconfigure()
+
+        # Reparse our keybindings
+        if changes.keybindings:
+            self.keybindings.configure(self.config['keybindings'])
 
-    def reconfigure(self):
-        """Update configuration for the whole application"""
+        # Update tab position if appropriate
+        if changes.touches('tab_position', 'scroll_tabbar'):
+            maker = Factory()
+            for window in self.windows:
+                child = window.get_child()
+                if maker.isinstance(child, 'Notebook'):
+                    child.configure()
 
+    def restyle(self):
+        """Rebuild the application stylesheet"""
         if self.style_providers != []:
             for style_provider in self.style_providers:
                 Gtk.StyleContext.remove_provider_for_screen(
@@ -411,19 +513,7 @@ class Terminator(Borg):
         profiles = self.config.base.profiles
         for profile in list(profiles.keys()):
             if profiles[profile]['use_theme_colors']:
-                # Create a dummy window/vte and realise it so it has correct
-                # values to read from
-                tmp_win = Gtk.Window()
-                tmp_vte = Vte.Terminal()
-                tmp_win.add(tmp_vte)
-                tmp_win.realize()
-                bgcolor = tmp_vte.get_style_context().get_background_color(Gtk.StateType.NORMAL)
-                bgcolor = "#{0:02x}{1:02x}{2:02x}".format(int(bgcolor.red  * 255),
-                                                          int(bgcolor.green * 255),
-                                                          int(bgcolor.blue * 255))
-                tmp_win.remove(tmp_vte)
-                del(tmp_vte)
-                del(tmp_win)
+                bgcolor = self.theme_background_color()
             else:
                 bgcolor = Gdk.RGBA()
                 bgcolor = profiles[profile]['background_color']
@@ -493,20 +583,6 @@ class Terminator(Borg):
                 self.style_providers[idx],
                 Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION+idx)
 
-        # Cause all the terminals to reconfigure
-        for terminal in self.terminals:
-            terminal.reconfigure()
-
-        # Reparse our keybindings
-        self.keybindings.configure(self.config['keybindings'])
-
-        # Update tab position if appropriate
-        maker = Factory()
-        for window in self.windows:
-            child = window.get_child()
-            if maker.isinstance(child, 'Notebook'):
-                child.configure()
-
     def on_css_parsing_error(self, provider, section, error, user_data=None):
         """Report CSS parsing issues"""
         file_path = section.get_file().get_path()
@@ -0,0 +1,162 @@
+# Terminator by Chris Jones <cmsj@tenshu.net>
+# GPL v2 only
+"""watchdog.py - Detect and explain main loop stalls
+
+StallWatchdog runs in a thread and keeps one ping queued on the main loop.
+If the ping has not run after a threshold, the main loop is stuck. The
+watchdog then captures the main thread's Python stack and reports it,
+naming the plugin or module that was running. Reports are rate limited, and
+each stall is reported at most once, however long it lasts.
+
+blame() picks the culprit from a stack, innermost frame last. A plugin
+anywhere on the stack wins, since it is the code that called into whatever
+is blocking:
+
+>>> blame([('/usr/lib/python3/terminatorlib/gtk4window.py', 'terminatorlib.gtk4window'),
+...        ('/usr/lib/python3/terminatorlib/plugins/logger.py', 'logger'),
+...        ('/usr/lib/python3.11/subprocess.py', 'subprocess')])
+'plugin logger'
+>>> blame([('/usr/lib/python3/terminatorlib/gtk4app.py', 'terminatorlib.gtk4app'),
+...        ('/usr/lib/python3/terminatorlib/gtk4terminal.py', 'terminatorlib.gtk4terminal'),
+...        ('/usr/lib/python3.11/json/decoder.py', 'json.decoder')])
+'terminatorlib.gtk4terminal'
+
+The stall logic can be driven by hand, with pings that never run:
+
+>>> pings = []
+>>> reports = []
+>>> dog = StallWatchdog(threshold_ms=500, schedule=pings.append,
+...                     report=reports.append, clock=lambda: now)
+>>> now = 0.0
+>>> dog.check()
+>>> len(pings)
+1
+>>> now = 0.4; dog.check(); len(reports)
+0
+>>> now = 0.6; dog.check(); len(reports), dog.stalls
+(1, 1)
+>>> now = 5.0; dog.check(); len(reports)
+1
+>>> pings[0]()
+False
+>>> dog.check(); len(pings)
+2
+"""
+
+import os
+import sys
+import time
+import threading
+import traceback
+
+from . import metrics
+
+
+def blame(stack):
+    """Name the plugin or module most likely responsible for a stack of
+    (filename, module name) pairs, ordered outermost first"""
+    for filename, module in reversed(stack):
+        if os.path.basename(os.path.dirname(filename)) == 'plugins':
+            return 'plugin %s' % os.path.splitext(os.path.basename(filename))[0]
+    for filename, module in reversed(stack):
+        if module and module.startswith('terminatorlib'):
+            return module
+    return stack[-1][1] if stack else 'unknown'
+
+
+def _stack_of(frame):
+    """Return [(filename, module), ...] for a frame, outermost first"""
+    stack = []
+    while frame is not None:
+        stack.append((frame.f_code.co_filename,
+                      frame.f_globals.get('__name__', '')))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class StallWatchdog(object):
+    """Report stalls of the main loop, from a helper thread"""
+
+    def __init__(self, threshold_ms=500, interval_ms=None, min_report_s=30,
+                 schedule=None, report=None, clock=None):
+        """schedule(func) must queue func on the main loop, report(text)
+        publishes a report. They default to GLib.idle_add and stderr"""
+        self.threshold = threshold_ms / 1000.0
+        self.interval = (interval_ms or max(50, threshold_ms // 4)) / 1000.0
+        self.min_report = min_report_s
+        self.clock = clock or time.monotonic
+        self.schedule = schedule
+        self.report = report or self._print
+        self.main_thread = threading.main_thread().ident
+        self.sent = None
+        self.reported = False
+        self.last_report = None
+        self.stalls = 0
+        self.unreported = 0
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def _print(self, text):
+        try:
+            sys.stderr.write(text)
+        except IOError:
+            pass
+
+    def _pong(self):
+        if self.reported:
+            metrics.observe('mainloop.stall', (self.clock() - self.sent) * 1000.0)
+        self.sent = None
+        return False
+
+    def check(self):
+        """Queue a ping if none is pending, or report if it is overdue"""
+        now = self.clock()
+        # _pong clears sent on the main loop at any time, so read it once
+        sent = self.sent
+        if sent is None:
+            self.reported = False
+            self.sent = now
+            self.schedule(self._pong)
+            return
+        if self.reported or now - sent < self.threshold:
+            return
+        self.reported = True
+        self.stalls += 1
+        metrics.inc('mainloop.stalls')
+        if self.last_report is not None and now - self.last_report < self.min_report:
+            self.unreported += 1
+            return
+        self.last_report = now
+        self.report(self.describe(now - sent))
+        self.unreported = 0
+
+    def describe(self, stalled):
+        """Build a report of the main thread's current stack"""
+        frame = sys._current_frames().get(self.main_thread)
+        stack = _stack_of(frame)
+        lines = ['Terminator main loop stalled for %dms in %s' %
+                 (stalled * 1000, blame(stack))]
+        if self.unreported:
+            lines.append('(%d further stalls were not reported)' % self.unreported)
+        if frame is not None:
+            lines.extend([l.rstrip('\n') for l in traceback.format_stack(frame)])
+        return '\n'.join(lines) + '\n'
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start watching from a daemon thread"""
+        if self.schedule is None:
+            from gi.repository import GLib
+            self.schedule = GLib.idle_add
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run,
+                                           name='terminator-watchdog',
+                                           daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()